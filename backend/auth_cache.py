@@ -0,0 +1,99 @@
+"""Short-lived caches for decoded JWTs and authenticated users"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class TTLCache:
+    """Size-bounded LRU mapping whose entries expire after a TTL"""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a live entry, or None"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store an entry, optionally with a TTL shorter than the default"""
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        """Drop an entry"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Get hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class AuthCache:
+    """Caches decoded token payloads by token hash and users by id.
+
+    Token entries never outlive the token's own ``exp`` claim, and users are
+    re-read from the database once their entry's TTL runs out, so a change
+    to a user takes effect within ``ttl_seconds``.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10000):
+        self.tokens = TTLCache(ttl_seconds, max_entries)
+        self.users = TTLCache(ttl_seconds, max_entries)
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get_payload(self, token: str) -> Optional[Dict[str, Any]]:
+        """Get the cached payload of an already verified token"""
+        return self.tokens.get(self.token_key(token))
+
+    def set_payload(self, token: str, payload: Dict[str, Any]) -> None:
+        """Cache a verified token payload until at most its expiry"""
+        ttl = None
+        if "exp" in payload:
+            ttl = float(payload["exp"]) - time.time()
+        self.tokens.set(self.token_key(token), payload, ttl)
+
+    def get_user(self, user_id: str) -> Optional[Any]:
+        """Get a cached user"""
+        return self.users.get(user_id)
+
+    def set_user(self, user_id: str, user: Any) -> None:
+        """Cache a user loaded from the database"""
+        self.users.set(user_id, user)
+
+    def stats(self) -> dict:
+        """Get hit/miss counters for both caches"""
+        return {"tokens": self.tokens.stats(), "users": self.users.stats()}
@@ -0,0 +1,4 @@
+"""Performance benchmarks for NOTEZ FUN Backend
+
+Run from the ``backend`` directory, e.g. ``python -m benchmarks.bcrypt_event_loop_lag``.
+"""
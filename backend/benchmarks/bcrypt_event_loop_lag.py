@@ -0,0 +1,89 @@
+"""Event-loop lag while hashing passwords inline vs. on the worker pool
+
+Usage: python -m benchmarks.bcrypt_event_loop_lag [--requests 16] [--rounds 12]
+
+A probe task sleeps for a fixed interval in a loop and records how late
+each wake-up is. Meanwhile a burst of concurrent "registrations" hashes
+passwords either directly on the event loop (the old register/login
+path) or through PasswordHasher. Lag percentiles are printed per mode.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from config import settings
+from hashing import PasswordHasher
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe(lags, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(time.perf_counter() - start - PROBE_INTERVAL, 0.0))
+
+
+def summarize(lags, elapsed, requests):
+    ordered = sorted(lags)
+
+    def pct(p):
+        return ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000
+
+    return {
+        "samples": len(ordered),
+        "lag_p50_ms": round(pct(0.50), 2),
+        "lag_p99_ms": round(pct(0.99), 2),
+        "lag_max_ms": round(ordered[-1] * 1000, 2),
+        "lag_mean_ms": round(statistics.mean(ordered) * 1000, 2),
+        "elapsed_s": round(elapsed, 3),
+        "hashes_per_s": round(requests / elapsed, 2),
+    }
+
+
+async def run(mode: str, requests: int, hasher: PasswordHasher):
+    lags = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 4)
+
+    async def register(i):
+        if mode == "inline":
+            hasher.context.hash(f"Password{i}")
+        else:
+            await hasher.hash(f"Password{i}")
+        # Yield like a real handler awaiting its insert would
+        await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(register(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    return summarize(lags, elapsed, requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(rounds=args.rounds, max_workers=args.workers, max_queue=args.requests)
+    results = {
+        "rounds": args.rounds,
+        "workers": args.workers,
+        "requests": args.requests,
+        "inline": asyncio.run(run("inline", args.requests, hasher)),
+        "pool": asyncio.run(run("pool", args.requests, hasher)),
+    }
+    hasher.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""CPU time and allocations of list responses, model-based vs. lean
+
+Usage: python -m benchmarks.list_serialization [--items 1000] [--repeat 50]
+
+Encodes a page of synthetic page documents (as Motor returns them) the
+way the list endpoints used to, building a ``Page`` model per document
+and letting FastAPI run it through ``jsonable_encoder`` into a
+``JSONResponse``, and the lean way, filling projected documents'
+defaults and encoding them with orjson. Reports CPU milliseconds and
+peak traced allocations per response, plus the response size, as JSON.
+"""
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "notez_fun_benchmark")
+
+from server import PAGE_SHAPE, Page  # noqa: E402
+from serialization import list_response  # noqa: E402
+
+
+def make_documents(count: int):
+    now = datetime.utcnow().replace(microsecond=0)
+    return [{
+        "id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "pagename": f"page-{i}",
+        "title": f"Page {i}",
+        "short_description": "A short description of the page",
+        "long_description": "Lorem ipsum dolor sit amet. " * 20,
+        "view_count": i * 7,
+        "is_maintenance": False,
+        "is_suspended": False,
+        "suspension_reason": None,
+        "created_at": now - timedelta(minutes=i),
+        "updated_at": now - timedelta(minutes=i),
+    } for i in range(count)]
+
+
+def model_based(documents):
+    content = {"items": [Page(**document) for document in documents], "next_cursor": None}
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def lean(documents):
+    return list_response(PAGE_SHAPE.dump(documents), None).body
+
+
+def measure(encode, documents, repeat: int) -> dict:
+    encode(documents)  # warm up
+
+    gc.collect()
+    cpu_start = time.process_time()
+    for _ in range(repeat):
+        body = encode(documents)
+    cpu_ms = (time.process_time() - cpu_start) / repeat * 1000
+
+    gc.collect()
+    tracemalloc.start()
+    encode(documents)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "cpu_ms": round(cpu_ms, 2),
+        "peak_kib": round(peak / 1024, 1),
+        "body_bytes": len(body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    documents = make_documents(args.items)
+    assert json.loads(model_based(documents)) == json.loads(lean(documents))
+
+    results = {
+        "items": args.items,
+        "model_based": measure(model_based, documents, args.repeat),
+        "lean": measure(lean, documents, args.repeat),
+    }
+    results["cpu_speedup"] = round(results["model_based"]["cpu_ms"] / results["lean"]["cpu_ms"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""Concurrent load test for the NOTEZ FUN API
+
+Usage:
+    python -m benchmarks.load_test --in-memory --output results.json
+    python -m benchmarks.load_test --mongo-url mongodb://localhost:27017 --output results.json
+    python -m benchmarks.load_test --in-memory --compare baseline.json
+
+The FastAPI ``app`` is booted in-process (startup/shutdown hooks included)
+and driven through an ASGI transport, so no server or network is needed.
+``--mongo-url`` runs against a real MongoDB using a throwaway database;
+``--in-memory`` uses the optional ``mongomock-motor`` package instead.
+
+Each scenario (public page reads, logins, feedback posts, owner listing,
+notification polling) runs on its own for ``--duration`` seconds with
+``--concurrency`` async clients, followed by a weighted mix of all of
+them. For every phase the report gives p50/p95/p99 latency, throughput,
+error count and Mongo operations per request (background work such as
+view-count flushes included), as JSON.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+PASSWORD = "Benchmark1"
+
+SCENARIO_WEIGHTS = {
+    "public_page_read": 60,
+    "notification_poll": 20,
+    "feedback_post": 10,
+    "owner_listing": 5,
+    "login": 5,
+}
+
+MOCK_COLLECTION_METHODS = [
+    "bulk_write", "count_documents", "delete_many", "delete_one", "find",
+    "find_one", "find_one_and_delete", "find_one_and_update", "insert_many",
+    "insert_one", "update_many", "update_one", "aggregate",
+]
+
+
+class OpCounter:
+    """Counts Mongo operations issued by the app"""
+
+    IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "endSessions", "saslStart", "saslContinue", "buildinfo", "buildInfo"}
+
+    def __init__(self):
+        self.count = 0
+
+    # pymongo.monitoring.CommandListener interface
+    def started(self, event):
+        if event.command_name not in self.IGNORED_COMMANDS:
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def install_in_memory_backend(counter: OpCounter) -> None:
+    try:
+        import mongomock_motor
+    except ImportError:
+        sys.exit("--in-memory needs the mongomock-motor package: pip install mongomock-motor")
+    import motor.motor_asyncio
+
+    collection_class = mongomock_motor.AsyncMongoMockCollection
+    for name in MOCK_COLLECTION_METHODS:
+        original = getattr(collection_class, name)
+
+        def make_wrapper(original):
+            def wrapper(self, *args, **kwargs):
+                counter.count += 1
+                return original(self, *args, **kwargs)
+            return wrapper
+
+        setattr(collection_class, name, make_wrapper(original))
+    motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+
+
+def load_server(args, counter: OpCounter):
+    os.environ["DB_NAME"] = f"notez_fun_bench_{uuid.uuid4().hex[:8]}"
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    # Every simulated client shares one address, and raw throughput is what is measured
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["ADMISSION_ENABLED"] = "false"
+    if args.in_memory:
+        os.environ["MONGO_URL"] = "mongodb://in-memory"
+        os.environ["BROADCAST_BACKEND"] = "local"
+        install_in_memory_backend(counter)
+    else:
+        from pymongo import monitoring
+        os.environ["MONGO_URL"] = args.mongo_url
+        monitoring.register(counter)
+    sys.path.insert(0, str(BACKEND_DIR))
+    return importlib.import_module("server")
+
+
+async def seed(server, users: int, pages: int) -> Dict[str, List]:
+    password_hash = await server.password_hasher.hash(PASSWORD)
+    now = datetime.utcnow()
+    user_docs = [{
+        "id": str(uuid.uuid4()),
+        "username": f"bench_user_{i}",
+        "email": f"bench_user_{i}@example.com",
+        "password_hash": password_hash,
+        "created_at": now,
+    } for i in range(users)]
+    page_docs = [server.Page(
+        user_id=user_docs[i % users]["id"],
+        pagename=f"bench-page-{i}",
+        title=f"Benchmark page {i}",
+        short_description="A page used for load testing",
+        long_description="Lorem ipsum dolor sit amet. " * 20,
+    ).dict() for i in range(pages)]
+    await server.db.users.insert_many(user_docs)
+    await server.db.pages.insert_many(page_docs)
+    return {
+        "users": user_docs,
+        "pages": page_docs,
+        "tokens": [server.create_access_token({"sub": user["id"]}) for user in user_docs],
+        "owner_token": server.create_access_token({"sub": "owner", "role": "owner"}),
+    }
+
+
+def build_scenarios(data) -> Dict[str, Callable]:
+    def auth(token):
+        return {"Authorization": f"Bearer {token}"}
+
+    async def public_page_read(client):
+        # Skewed towards a few hot pages, like real traffic
+        index = min(int(random.paretovariate(1.2)) - 1, len(data["pages"]) - 1)
+        pagename = data["pages"][index]["pagename"]
+        response = await client.get(f"/api/public/page/{pagename}")
+        if response.status_code >= 400:
+            return response
+        # Like the browser: the content may come from a cache, the view is always counted
+        return await client.post(f"/api/public/page/{pagename}/view")
+
+    async def login(client):
+        user = random.choice(data["users"])
+        return await client.post("/api/login", json={"email": user["email"], "password": PASSWORD})
+
+    async def feedback_post(client):
+        page = random.choice(data["pages"])
+        return await client.post(
+            "/api/feedback",
+            json={"page_id": page["id"], "message": "Great page!"},
+            headers=auth(random.choice(data["tokens"])),
+        )
+
+    async def owner_listing(client):
+        return await client.get("/api/owner/pages", headers=auth(data["owner_token"]))
+
+    async def notification_poll(client):
+        return await client.get("/api/notifications/unread-count", headers=auth(random.choice(data["tokens"])))
+
+    return {
+        "public_page_read": public_page_read,
+        "login": login,
+        "feedback_post": feedback_post,
+        "owner_listing": owner_listing,
+        "notification_poll": notification_poll,
+    }
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+async def run_phase(client, pick: Callable[[], Callable], duration: float, concurrency: int, counter: OpCounter) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await pick()(client)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    ops_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ops = counter.count - ops_before
+
+    latencies.sort()
+    requests = len(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / requests * 1000, 2) if requests else 0.0,
+        "mongo_ops_per_request": round(ops / requests, 2) if requests else 0.0,
+    }
+
+
+async def run(args, server, counter: OpCounter) -> dict:
+    import httpx
+
+    await server.app.router.startup()
+    try:
+        data = await seed(server, args.users, args.pages)
+        scenarios = build_scenarios(data)
+        transport = httpx.ASGITransport(app=server.app)
+        results = {}
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            selected = args.scenarios or list(scenarios)
+            for name in selected:
+                results[name] = await run_phase(client, lambda name=name: scenarios[name], args.duration, args.concurrency, counter)
+                print(f"{name:>18}: {json.dumps(results[name])}", file=sys.stderr)
+
+            names = list(SCENARIO_WEIGHTS)
+            weights = [SCENARIO_WEIGHTS[name] for name in names]
+            results["mixed"] = await run_phase(
+                client, lambda: scenarios[random.choices(names, weights)[0]], args.duration, args.concurrency, counter
+            )
+            print(f"{'mixed':>18}: {json.dumps(results['mixed'])}", file=sys.stderr)
+        if not args.in_memory:
+            await server.mongo.client.drop_database(os.environ["DB_NAME"])
+        return results
+    finally:
+        await server.app.router.shutdown()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    baseline = json.loads(Path(baseline_path).read_text())["scenarios"]
+    print(f"\nChange vs {baseline_path}:", file=sys.stderr)
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        deltas = []
+        for metric in ("p50_ms", "p99_ms", "throughput_rps", "mongo_ops_per_request"):
+            if previous[metric]:
+                change = (current[metric] - previous[metric]) / previous[metric] * 100
+                deltas.append(f"{metric} {change:+.1f}%")
+        print(f"{name:>18}: {', '.join(deltas)}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the NOTEZ FUN API")
+    backend = parser.add_mutually_exclusive_group(required=True)
+    backend.add_argument("--mongo-url", help="MongoDB to run against (a temporary database is used)")
+    backend.add_argument("--in-memory", action="store_true", help="use mongomock-motor instead of MongoDB")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--bcrypt-rounds", type=int, default=int(os.getenv("BCRYPT_ROUNDS", 12)))
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIO_WEIGHTS))
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="print the change against a previous JSON report")
+    args = parser.parse_args()
+
+    counter = OpCounter()
+    server = load_server(args, counter)
+    results = asyncio.run(run(args, server, counter))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "backend": "in-memory" if args.in_memory else "mongodb",
+            "duration_seconds": args.duration,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "pages": args.pages,
+            "bcrypt_rounds": args.bcrypt_rounds,
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Read routing check against a replica set
+
+Usage:
+    docker compose -f docker-compose.replica.yml up -d
+    python -m benchmarks.read_routing --mongo-url "mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0"
+
+Uses the same read policies as the API: records which member serves each
+read and checks that staleness-tolerant reads go to secondaries, pinned
+reads go to the primary, and that a read-back after an update on the
+primary sees the update. Prints a JSON report and exits 1 if any check
+fails.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from pymongo import ReadPreference, monitoring
+from pymongo.read_preferences import SecondaryPreferred
+
+from database import MongoConnection
+
+
+class ServedBy(monitoring.CommandListener):
+    def __init__(self):
+        self.finds = Counter()
+
+    def started(self, event):
+        if event.command_name == "find":
+            host, port = event.connection_id
+            self.finds[f"{host}:{port}"] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def served_by(listener: ServedBy, reads) -> Counter:
+    listener.finds.clear()
+    await reads()
+    return Counter(listener.finds)
+
+
+async def run(args):
+    listener = ServedBy()
+    mongo = MongoConnection(args.mongo_url, args.database, event_listeners=[listener])
+    stale = SecondaryPreferred(max_staleness=args.max_staleness)
+    secondary_pages = mongo.database_proxy(read_preference=stale).pages
+    primary_pages = mongo.database_proxy(read_preference=ReadPreference.PRIMARY).pages
+    try:
+        hello = await mongo.client.admin.command("hello")
+        if "setName" not in hello:
+            sys.exit("Not a replica set; start one with docker-compose.replica.yml")
+        primary = hello["primary"]
+        page_id = str(uuid.uuid4())
+        await primary_pages.insert_one({"id": page_id, "pagename": f"routing-{page_id}", "title": "v0"})
+
+        async def stale_reads():
+            for _ in range(args.reads):
+                await secondary_pages.find_one({"id": page_id})
+
+        async def pinned_reads():
+            for _ in range(args.reads):
+                await primary_pages.find_one({"id": page_id})
+
+        stale_members = await served_by(listener, stale_reads)
+        pinned_members = await served_by(listener, pinned_reads)
+
+        # Update and read back at once, as mark-read then the unread count does
+        stale_read_backs = 0
+        for version in range(1, args.reads + 1):
+            await primary_pages.update_one(
+                {"id": page_id}, {"$set": {"title": f"v{version}", "updated_at": datetime.utcnow()}}
+            )
+            page = await primary_pages.find_one({"id": page_id})
+            if page["title"] != f"v{version}":
+                stale_read_backs += 1
+
+        await primary_pages.delete_one({"id": page_id})
+        checks = {
+            "stale_reads_avoid_primary": primary not in stale_members,
+            "pinned_reads_use_primary": set(pinned_members) == {primary},
+            "pinned_reads_see_own_writes": stale_read_backs == 0,
+        }
+        return {
+            "primary": primary,
+            "stale_reads_served_by": dict(stale_members),
+            "pinned_reads_served_by": dict(pinned_members),
+            "pinned_stale_read_backs": stale_read_backs,
+            "checks": checks,
+        }
+    finally:
+        mongo.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replica set read routing check")
+    parser.add_argument("--mongo-url", required=True)
+    parser.add_argument("--database", default="notez_fun_routing_check")
+    parser.add_argument("--reads", type=int, default=50)
+    parser.add_argument("--max-staleness", type=int, default=90)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    failed = [name for name, ok in report["checks"].items() if not ok]
+    if failed:
+        print(f"Failed: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Page search latency against a large pages collection
+
+Usage:
+    python -m benchmarks.search_latency --mongo-url mongodb://localhost:27017 --pages 1000000
+    python -m benchmarks.search_latency --mongo-url ... --database notez_fun_search_bench --keep
+
+Seeds ``--pages`` synthetic pages and builds the search index for them
+(both skipped when the database already holds that many, so ``--keep``
+lets later runs reuse the data), then times ``SearchIndex.search`` for
+queries of different selectivity: a rare term, a mid-frequency term, the
+most common term and a two-term query, for the first and a deep results
+page. Page text is drawn from a Zipf-distributed vocabulary so term
+frequencies resemble natural language. Reports p50/p95/p99 per query, and
+the index keys each query's postings read examined, as JSON and exits 1
+if any p95 is over ``--budget-ms``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from indexes import INDEXES
+from search import PAGE_COUNT, SearchIndex, parse_query
+
+VOCABULARY_SIZE = 20000
+SEED_BATCH = 5000
+
+
+def make_vocabulary(rng: random.Random):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 10))))
+    return sorted(words)
+
+
+def make_sampler(vocabulary, rng: random.Random):
+    # Zipf weights: the word of rank r is 1/r as frequent as the most common one
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    return lambda count: rng.choices(vocabulary, weights, k=count)
+
+
+async def seed(collection, pages: int, sample, rng: random.Random):
+    existing = await collection.estimated_document_count()
+    if existing >= pages:
+        print(f"Reusing {existing} existing pages", file=sys.stderr)
+        return
+    now = datetime.utcnow()
+    for start in range(existing, pages, SEED_BATCH):
+        batch = []
+        for i in range(start, min(start + SEED_BATCH, pages)):
+            batch.append({
+                "id": str(uuid.uuid4()),
+                "user_id": str(uuid.uuid4()),
+                "pagename": f"search-bench-{i}",
+                "title": " ".join(sample(rng.randint(2, 6))).title(),
+                "short_description": " ".join(sample(rng.randint(8, 16))),
+                "long_description": " ".join(sample(rng.randint(60, 200))),
+                "view_count": 0,
+                "is_maintenance": False,
+                "is_suspended": rng.random() < 0.01,
+                "suspension_reason": None,
+                "created_at": now - timedelta(seconds=i),
+                "updated_at": now - timedelta(seconds=i),
+            })
+        await collection.insert_many(batch, ordered=False)
+        print(f"Seeded {start + len(batch)}/{pages} pages", file=sys.stderr)
+
+
+async def build_index(database, search_index: SearchIndex):
+    pages = await database.pages.count_documents({"is_suspended": {"$ne": True}})
+    counted = await database.search_terms.find_one({"_id": PAGE_COUNT})
+    if counted and counted["pages"] >= pages:
+        print(f"Reusing the search index of {counted['pages']} pages", file=sys.stderr)
+        return
+    started = time.perf_counter()
+    indexed = await search_index.rebuild()
+    print(f"Indexed {indexed} pages in {time.perf_counter() - started:.0f} s", file=sys.stderr)
+
+
+async def keys_examined(database, query: str, max_results: int):
+    # Work per term is bounded by max_results, whatever the term's frequency
+    examined = {}
+    for term in parse_query(query)[0]:
+        explained = await database.command({
+            "explain": {
+                "find": "search_postings",
+                "filter": {"term": term},
+                "projection": {"_id": 0, "pagename": 1, "weight": 1},
+                "sort": {"weight": -1},
+                "limit": max_results,
+            },
+            "verbosity": "executionStats",
+        })
+        stats = explained["executionStats"]
+        examined[term] = {"keys": stats["totalKeysExamined"], "documents": stats["totalDocsExamined"]}
+    return examined
+
+
+async def time_query(search_index: SearchIndex, query: str, cursor, repeat: int):
+    latencies = []
+    results = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        documents, next_cursor = await search_index.search(query, 20, cursor)
+        latencies.append(time.perf_counter() - started)
+        results = len(documents)
+    latencies.sort()
+
+    def pct(p):
+        return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 2)
+
+    return {"results": results, "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}, next_cursor
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng)
+    client = AsyncIOMotorClient(args.mongo_url)
+    database = client[args.database]
+    collection = database.pages
+    search_index = SearchIndex(database)
+    try:
+        await seed(collection, args.pages, make_sampler(vocabulary, rng), rng)
+        await collection.create_indexes(INDEXES["pages"])
+        await database.search_postings.create_indexes(INDEXES["search_postings"])
+        await build_index(database, search_index)
+
+        queries = {
+            "rare_term": vocabulary[-1],
+            "mid_term": vocabulary[len(vocabulary) // 10],
+            "common_term": vocabulary[0],
+            "two_terms": f"{vocabulary[5]} {vocabulary[500]}",
+        }
+        report = {"pages": await collection.estimated_document_count(), "budget_ms": args.budget_ms, "queries": {}}
+        for name, query in queries.items():
+            first, cursor = await time_query(search_index, query, None, args.repeat)
+            report["queries"][name] = {
+                "query": query,
+                "keys_examined": await keys_examined(database, query, 1000),
+                "first_page": first,
+            }
+            if cursor:
+                # A few pages in, to include the cost of skipping ranked results
+                for _ in range(4):
+                    _, cursor = await search_index.search(query, 20, cursor)
+                    if not cursor:
+                        break
+                if cursor:
+                    report["queries"][name]["sixth_page"], _ = await time_query(search_index, query, cursor, args.repeat)
+        return report
+    finally:
+        if not args.keep:
+            await client.drop_database(args.database)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page search latency benchmark")
+    parser.add_argument("--mongo-url", required=True)
+    parser.add_argument("--database", default="notez_fun_search_bench")
+    parser.add_argument("--pages", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--budget-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded database for later runs")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    over = [
+        f"{name} ({phase})"
+        for name, phases in report["queries"].items()
+        for phase, result in phases.items()
+        if phase not in ("query", "keys_examined") and result["p95_ms"] > args.budget_ms
+    ]
+    if over:
+        print(f"Over the {args.budget_ms} ms p95 budget: {', '.join(over)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
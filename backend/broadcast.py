@@ -0,0 +1,195 @@
+"""Cross-worker message broadcasting for NOTEZ FUN Backend"""
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[Dict[str, Any]], Any]
+
+
+class Broadcast:
+    """In-process publish/subscribe.
+
+    Delivers messages only to subscribers in the current process. Used on
+    its own for single-worker deployments and tests, and as the base for
+    backends that also reach the other gunicorn workers.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._subscribers: Dict[str, List[Callback]] = defaultdict(list)
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        """Register a callback (sync or async) for messages on a channel"""
+        self._subscribers[channel].append(callback)
+
+    def unsubscribe(self, channel: str, callback: Callback) -> None:
+        """Remove a previously registered callback"""
+        if callback in self._subscribers.get(channel, []):
+            self._subscribers[channel].remove(callback)
+
+    async def _deliver(self, channel: str, message: Dict[str, Any]) -> None:
+        for callback in list(self._subscribers.get(channel, [])):
+            try:
+                result = callback(message)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                logger.exception("Broadcast subscriber failed on channel %s", channel)
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """Publish a message to every subscriber of a channel"""
+        self.published += 1
+        await self._deliver(channel, message)
+
+    async def start(self) -> None:
+        """Start receiving messages from other workers"""
+
+    async def stop(self) -> None:
+        """Stop receiving messages from other workers"""
+
+    def stats(self) -> dict:
+        """Get publish/receive counters"""
+        return {
+            "backend": "local",
+            "published": self.published,
+            "received": self.received,
+            "channels": sorted(self._subscribers),
+        }
+
+
+class MongoBroadcast(Broadcast):
+    """Publish/subscribe across workers through a Mongo collection.
+
+    Messages are inserted into a small TTL-expired collection and every
+    worker watches that collection for inserts with a change stream.
+    Change streams need a replica set; on a standalone server the watcher
+    polls the collection every ``poll_interval`` seconds instead. Each poll
+    reads back ``POLL_OVERLAP_SECONDS`` before the previous one, so inserts
+    that commit late or come from a worker with a skewed clock are still
+    seen, and skips the messages it has already delivered.
+    """
+
+    POLL_OVERLAP_SECONDS = 5.0
+
+    def __init__(self, collection, retention_seconds: int = 3600, poll_interval: float = 1.0):
+        super().__init__()
+        self._collection = collection
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.mode = "change_stream"
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        await super().publish(channel, message)
+        try:
+            await self._collection.insert_one({
+                "channel": channel,
+                "message": message,
+                "origin": self.origin,
+                "created_at": datetime.utcnow(),
+            })
+        except PyMongoError:
+            logger.exception("Failed to broadcast message on channel %s", channel)
+
+    async def _watch(self):
+        resume_token = None
+        delay = 1.0
+        while True:
+            try:
+                pipeline = [{"$match": {"operationType": "insert"}}]
+                async with self._collection.watch(pipeline, resume_after=resume_token) as stream:
+                    self.connected = True
+                    delay = 1.0
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        document = change["fullDocument"]
+                        if document.get("origin") == self.origin:
+                            continue
+                        self.received += 1
+                        await self._deliver(document["channel"], document["message"])
+            except OperationFailure as exc:
+                self.connected = False
+                if exc.code in (40573, 40324):
+                    logger.warning(
+                        "Change streams are not supported by this MongoDB deployment; "
+                        "polling for broadcasts every %s seconds instead", self.poll_interval
+                    )
+                    await self._poll()
+                    return
+                logger.exception("Broadcast change stream failed")
+            except PyMongoError:
+                self.connected = False
+                logger.exception("Broadcast change stream failed")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    async def _poll(self):
+        self.mode = "polling"
+        seen: Dict[Any, datetime] = {}
+        since = datetime.utcnow()
+        while True:
+            polled_at = datetime.utcnow()
+            window = since - timedelta(seconds=self.POLL_OVERLAP_SECONDS)
+            try:
+                # Served by the TTL index on created_at
+                documents = await self._collection.find(
+                    {"created_at": {"$gte": window}, "origin": {"$ne": self.origin}}
+                ).sort("created_at", 1).to_list(None)
+            except PyMongoError:
+                self.connected = False
+                logger.exception("Broadcast poll failed")
+            else:
+                self.connected = True
+                since = polled_at
+                for document in documents:
+                    if document["_id"] in seen:
+                        continue
+                    seen[document["_id"]] = document["created_at"]
+                    self.received += 1
+                    await self._deliver(document["channel"], document["message"])
+                seen = {key: created_at for key, created_at in seen.items() if created_at >= window}
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self) -> None:
+        try:
+            await self._collection.create_index(
+                "created_at", expireAfterSeconds=self.retention_seconds
+            )
+        except PyMongoError:
+            logger.exception("Failed to ensure broadcast TTL index")
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected = False
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({"backend": "mongo", "mode": self.mode, "connected": self.connected})
+        return stats
+
+
+def create_broadcast(backend: str, database, poll_interval: float = 1.0) -> Broadcast:
+    """Create the broadcast backend named in settings"""
+    if backend == "mongo":
+        return MongoBroadcast(database.broadcast_events, poll_interval=poll_interval)
+    if backend == "local":
+        return Broadcast()
+    raise ValueError(f"Unknown broadcast backend: {backend}")
@@ -25,6 +25,18 @@ class Settings:
     MONGO_URL: str = os.getenv("MONGO_URL", "mongodb://localhost:27017")
     DB_NAME: str = os.getenv("DB_NAME", "notez_fun_db")
     
+    # MongoDB Connection Pool Configuration (per worker process)
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+    MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", 5))
+    MONGO_MAX_IDLE_TIME_MS: int = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000))
+    MONGO_COMPRESSORS: str = os.getenv("MONGO_COMPRESSORS", "zstd,zlib")
+    MONGO_READ_PREFERENCE: str = os.getenv("MONGO_READ_PREFERENCE", "primary")
+    
+    # Secondary Read Configuration (staleness-tolerant endpoints read from secondaries)
+    MONGO_SECONDARY_READS_ENABLED: bool = os.getenv("MONGO_SECONDARY_READS_ENABLED", "true").lower() == "true"
+    MONGO_SECONDARY_MAX_STALENESS_SECONDS: int = int(os.getenv("MONGO_SECONDARY_MAX_STALENESS_SECONDS", 90))
+    
     # JWT Configuration
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "notez-fun-secret-key-2024")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
@@ -40,6 +52,106 @@ class Settings:
     # Security Configuration
     OWNER_PASSWORD: str = os.getenv("OWNER_PASSWORD", "onlyOwner12$")
     BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+    
+    # View Counter Configuration
+    VIEW_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("VIEW_FLUSH_INTERVAL_SECONDS", 5))
+    VIEW_FLUSH_MAX_PENDING: int = int(os.getenv("VIEW_FLUSH_MAX_PENDING", 10000))
+    
+    # Trending Pages Configuration
+    TRENDING_WINDOW_HOURS: int = int(os.getenv("TRENDING_WINDOW_HOURS", 48))
+    TRENDING_HALF_LIFE_HOURS: float = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 6))
+    TRENDING_SIZE: int = int(os.getenv("TRENDING_SIZE", 50))
+    TRENDING_REFRESH_INTERVAL_SECONDS: float = float(os.getenv("TRENDING_REFRESH_INTERVAL_SECONDS", 60))
+    
+    # Public Page Cache Configuration
+    PAGE_CACHE_ENABLED: bool = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+    PAGE_CACHE_TTL_SECONDS: float = float(os.getenv("PAGE_CACHE_TTL_SECONDS", 30))
+    PAGE_CACHE_MAX_ENTRIES: int = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", 10000))
+    PAGE_CACHE_MAX_BYTES: int = int(os.getenv("PAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    
+    # Public Page HTTP Caching Configuration (browsers and CDNs)
+    PUBLIC_PAGE_MAX_AGE_SECONDS: int = int(os.getenv("PUBLIC_PAGE_MAX_AGE_SECONDS", 60))
+    PUBLIC_PAGE_STALE_WHILE_REVALIDATE_SECONDS: int = int(os.getenv("PUBLIC_PAGE_STALE_WHILE_REVALIDATE_SECONDS", 300))
+    
+    # Server-Side Rendering Configuration (rendered public page HTML, served by nginx from this directory)
+    SSR_CACHE_DIR: str = os.getenv("SSR_CACHE_DIR", "/tmp/notez_fun_rendered")
+    SSR_FEEDBACK_LIMIT: int = int(os.getenv("SSR_FEEDBACK_LIMIT", 50))
+    
+    # Rate Limiting Configuration ("<requests>/<second|minute|hour|day>" token buckets per client)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "mongo")
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+    RATE_LIMIT_LOGIN: str = os.getenv("RATE_LIMIT_LOGIN", "10/minute")
+    RATE_LIMIT_REGISTER: str = os.getenv("RATE_LIMIT_REGISTER", "10/hour")
+    RATE_LIMIT_FEEDBACK: str = os.getenv("RATE_LIMIT_FEEDBACK", "10/minute")
+    RATE_LIMIT_PAGE_VIEW: str = os.getenv("RATE_LIMIT_PAGE_VIEW", "60/minute")
+    
+    # Admission Control Configuration (per worker)
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 200))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", 200))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", 1.0))
+    ADMISSION_MAX_LOOP_LAG_SECONDS: float = float(os.getenv("ADMISSION_MAX_LOOP_LAG_SECONDS", 0.5))
+    
+    # Auth Cache Configuration
+    AUTH_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 30))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000))
+    
+    # Database Index Configuration (create missing indexes from indexes.py at startup)
+    ENSURE_INDEXES_ON_STARTUP: bool = os.getenv("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
+    
+    # List Pagination Configuration
+    LIST_PAGE_SIZE: int = int(os.getenv("LIST_PAGE_SIZE", 50))
+    LIST_MAX_PAGE_SIZE: int = int(os.getenv("LIST_MAX_PAGE_SIZE", 200))
+    
+    # Bulk Page Operations Configuration
+    BULK_MAX_PAGES: int = int(os.getenv("BULK_MAX_PAGES", 1000))
+    BULK_WRITE_BATCH_SIZE: int = int(os.getenv("BULK_WRITE_BATCH_SIZE", 500))
+    
+    # Search Configuration
+    SEARCH_MAX_RESULTS: int = int(os.getenv("SEARCH_MAX_RESULTS", 1000))
+    SEARCH_SNIPPET_LENGTH: int = int(os.getenv("SEARCH_SNIPPET_LENGTH", 160))
+    
+    # Export Configuration
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+    
+    # Notification Stream Configuration
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("NOTIFICATION_STREAM_HEARTBEAT_SECONDS", 25))
+    NOTIFICATION_STREAM_QUEUE_SIZE: int = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", 32))
+    NOTIFICATION_STREAM_TICKET_SECONDS: int = int(os.getenv("NOTIFICATION_STREAM_TICKET_SECONDS", 60))
+    
+    # Unread Counter Configuration
+    UNREAD_RECONCILE_INTERVAL_SECONDS: float = float(os.getenv("UNREAD_RECONCILE_INTERVAL_SECONDS", 3600))
+    UNREAD_RECONCILE_SETTLE_SECONDS: float = float(os.getenv("UNREAD_RECONCILE_SETTLE_SECONDS", 5))
+    
+    # Notification Dispatch Configuration
+    NOTIFICATION_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_BATCH_SIZE", 100))
+    NOTIFICATION_BATCH_LINGER_SECONDS: float = float(os.getenv("NOTIFICATION_BATCH_LINGER_SECONDS", 0.05))
+    NOTIFICATION_QUEUE_SIZE: int = int(os.getenv("NOTIFICATION_QUEUE_SIZE", 10000))
+    NOTIFICATION_RETRY_INTERVAL_SECONDS: float = float(os.getenv("NOTIFICATION_RETRY_INTERVAL_SECONDS", 30))
+    NOTIFICATION_MAX_ATTEMPTS: int = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", 10))
+    
+    # Retention Configuration (days; 0 keeps data in the hot collections indefinitely)
+    NOTIFICATION_READ_TTL_DAYS: float = float(os.getenv("NOTIFICATION_READ_TTL_DAYS", 30))
+    NOTIFICATION_ARCHIVE_AFTER_DAYS: float = float(os.getenv("NOTIFICATION_ARCHIVE_AFTER_DAYS", 180))
+    FEEDBACK_ARCHIVE_AFTER_DAYS: float = float(os.getenv("FEEDBACK_ARCHIVE_AFTER_DAYS", 365))
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", 1000))
+    ARCHIVE_INTERVAL_SECONDS: float = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", 3600))
+    
+    # Background Job Scheduler Configuration
+    SCHEDULER_LEASE_SECONDS: float = float(os.getenv("SCHEDULER_LEASE_SECONDS", 30))
+    SCHEDULER_DRAIN_TIMEOUT_SECONDS: float = float(os.getenv("SCHEDULER_DRAIN_TIMEOUT_SECONDS", 10))
+    
+    # Cross-worker Broadcast Configuration ("mongo" or "local")
+    BROADCAST_BACKEND: str = os.getenv("BROADCAST_BACKEND", "mongo")
+    BROADCAST_POLL_INTERVAL_SECONDS: float = float(os.getenv("BROADCAST_POLL_INTERVAL_SECONDS", 1))
+    
+    # Metrics Configuration
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_MULTIPROC_DIR: str = os.getenv("METRICS_MULTIPROC_DIR", "")
+    METRICS_EXPORT_INTERVAL_SECONDS: float = float(os.getenv("METRICS_EXPORT_INTERVAL_SECONDS", 5))
     
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
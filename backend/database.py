@@ -0,0 +1,130 @@
+"""MongoDB connection for NOTEZ FUN Backend
+
+Gunicorn runs with ``preload_app``, so the app module is imported once in
+the master and the workers are forked from it. A client created there
+would hand every worker copies of the same pooled sockets and monitor
+threads. ``MongoConnection`` instead creates its Motor client in the
+process that first uses it, and forgets it in a forked child so each
+worker builds its own pool. ``db`` can still be used at import time:
+collections taken from it resolve against the current process's client
+when they are used.
+
+Reads are routed per endpoint: ``database_proxy(read_preference=...)``
+gives a database whose collections use another read preference, such as
+``stale_read_preference`` for reads that tolerate replication lag.
+"""
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.read_preferences import ReadPreference, SecondaryPreferred
+
+
+def client_options(settings) -> Dict[str, Any]:
+    """Connection pool and driver options from ``Settings``"""
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS or None,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+    }
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    return options
+
+
+def stale_read_preference(settings):
+    """Read preference for reads that can be up to ``MONGO_SECONDARY_MAX_STALENESS_SECONDS`` behind"""
+    if not settings.MONGO_SECONDARY_READS_ENABLED:
+        return ReadPreference.PRIMARY
+    # Falls back to the primary when no secondary is fresh enough
+    return SecondaryPreferred(max_staleness=settings.MONGO_SECONDARY_MAX_STALENESS_SECONDS)
+
+
+class MongoConnection:
+    """One Motor client per process, created on first use.
+
+    Options are passed to ``AsyncIOMotorClient`` as keyword arguments, so
+    they take precedence over the same options in the URL.
+    """
+
+    def __init__(self, url: str, database_name: str, event_listeners: Iterable = (), **options):
+        self.url = url
+        self.database_name = database_name
+        self._event_listeners = list(event_listeners)
+        self._options = options
+        self._client: Optional[AsyncIOMotorClient] = None
+        self.clients_created = 0
+        self.db = DatabaseProxy(self)
+        # The parent's client is dropped, not closed: closing it would shut
+        # sockets the parent still uses
+        os.register_at_fork(after_in_child=self._forget_client)
+
+    def _forget_client(self) -> None:
+        self._client = None
+
+    @property
+    def client(self) -> AsyncIOMotorClient:
+        """This process's client"""
+        if self._client is None:
+            self._client = AsyncIOMotorClient(self.url, event_listeners=self._event_listeners, **self._options)
+            self.clients_created += 1
+        return self._client
+
+    def get_database(self, **options) -> AsyncIOMotorDatabase:
+        """This process's database handle"""
+        return self.client.get_database(self.database_name, **options)
+
+    def database_proxy(self, **options) -> "DatabaseProxy":
+        """A database whose collections use ``options``, e.g. ``read_preference``"""
+        return DatabaseProxy(self, **options)
+
+    def close(self) -> None:
+        """Close this process's client, if it was created"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+class DatabaseProxy:
+    """Stands in for the current process's ``AsyncIOMotorDatabase``"""
+
+    def __init__(self, connection: MongoConnection, **options):
+        self._connection = connection
+        self._options = options
+        self._collections: Dict[str, CollectionProxy] = {}
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or hasattr(AsyncIOMotorDatabase, name):
+            return getattr(self._connection.get_database(**self._options), name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> "CollectionProxy":
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = CollectionProxy(self._connection, name, **self._options)
+        return collection
+
+
+class CollectionProxy:
+    """Stands in for a collection of the current process's database"""
+
+    def __init__(self, connection: MongoConnection, name: str, **options):
+        self._connection = connection
+        self.name = name
+        self._options = options
+        self._client = None
+        self._collection = None
+
+    def with_options(self, **options) -> "CollectionProxy":
+        """The same collection with other options, still resolved per process"""
+        return CollectionProxy(self._connection, self.name, **{**self._options, **options})
+
+    def __getattr__(self, attr: str):
+        client = self._connection.client
+        if self._client is not client:
+            database = client.get_database(self._connection.database_name)
+            self._collection = database.get_collection(self.name, **self._options)
+            self._client = client
+        return getattr(self._collection, attr)
@@ -11,6 +11,7 @@ max_requests = 1000
 max_requests_jitter = 100
 timeout = 120
 keepalive = 2
+# Safe with preloading: database.py creates the Mongo client inside each worker
 preload_app = True
 
 # Logging
@@ -30,10 +31,20 @@ limit_request_field_size = 8190
 # Performance
 worker_tmp_dir = '/dev/shm'
 
+# Metrics: workers share snapshots through this directory so /metrics covers all of them
+os.environ.setdefault('METRICS_MULTIPROC_DIR', '/dev/shm/notez_fun_metrics')
+
 # Graceful timeout for worker restart
 graceful_timeout = 120
 
 # Callbacks
+def on_starting(server):
+    # Snapshots from a previous run would be merged into the new totals
+    metrics_dir = os.environ['METRICS_MULTIPROC_DIR']
+    if os.path.isdir(metrics_dir):
+        for name in os.listdir(metrics_dir):
+            os.remove(os.path.join(metrics_dir, name))
+
 def when_ready(server):
     server.log.info("NOTEZ FUN Backend is ready to serve requests")
 
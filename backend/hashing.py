@@ -0,0 +1,87 @@
+"""Password hashing on a bounded worker pool"""
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool and its queue are full"""
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification off the event loop.
+
+    bcrypt releases the GIL while it works, so a small thread pool keeps
+    the event loop responsive. At most ``max_workers + max_queue`` calls
+    may be in flight; further calls fail fast with PasswordHasherBusy so
+    the caller can shed load instead of queueing without bound. A call
+    holds its slot until the pool is done with it: a caller that goes away
+    cancels a call still queued, but one already running keeps its slot
+    until bcrypt returns.
+    """
+
+    def __init__(self, rounds: int = 12, max_workers: int = 2, max_queue: int = 32):
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._in_flight = 0
+
+        # Counters
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _release(self, future: Future) -> None:
+        self._in_flight -= 1
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    async def _run(self, func, *args):
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        future = self._executor.submit(func, *args)
+
+        def done(future):
+            # Called on the worker thread, or on this one if cancelled before it started
+            try:
+                loop.call_soon_threadsafe(self._release, future)
+            except RuntimeError:
+                pass  # The loop is closed; nothing is left to account for
+
+        future.add_done_callback(done)
+        # Cancelling the caller cancels a queued call; a running one finishes and then releases its slot
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password"""
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        """Check a password against a stored hash"""
+        return await self._run(self.context.verify, password, password_hash)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads once queued work is done"""
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """Get pool occupancy counters"""
+        return {
+            "rounds": self.rounds,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,59 @@
+"""HTTP validators and conditional request handling for cacheable responses"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+
+
+def make_etag(key: str, modified: datetime) -> str:
+    """A weak ETag for the ``key`` representation last modified at ``modified``"""
+    return f'W/"{key}-{int(_as_utc(modified).timestamp() * 1000)}"'
+
+
+def http_date(moment: datetime) -> str:
+    """Format a timestamp as an HTTP date"""
+    return format_datetime(_as_utc(moment), usegmt=True)
+
+
+def cache_control(max_age: int, stale_while_revalidate: int) -> str:
+    """A shared-cache friendly ``Cache-Control`` value"""
+    value = f"public, max-age={max_age}"
+    if stale_while_revalidate:
+        value += f", stale-while-revalidate={stale_while_revalidate}"
+    return value
+
+
+def validator_headers(etag: str, modified: datetime, cache_control_value: str) -> Dict[str, str]:
+    """Headers sent with both full and 304 responses"""
+    return {"ETag": etag, "Last-Modified": http_date(modified), "Cache-Control": cache_control_value}
+
+
+def _strip_weak(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, modified: datetime) -> bool:
+    """Whether the request's validators still match, per RFC 9110 section 13.2.2"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: W/"x" and "x" match
+        tags = {_strip_weak(tag.strip()) for tag in if_none_match.split(",")}
+        return _strip_weak(etag) in tags
+
+    if_modified_since: Optional[str] = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return _as_utc(modified).replace(microsecond=0) <= since
+    return False
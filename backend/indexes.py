@@ -0,0 +1,284 @@
+"""Index declarations and query-plan checks for NOTEZ FUN Backend
+
+The backend ensures these indexes at startup, so databases that were not
+created from ``scripts/init-mongo.js`` get them too. Run as a script to
+check every query shape the API issues against the live database:
+
+    python -m indexes verify           # explain() each shape, exit 1 on COLLSCAN
+    python -m indexes ensure verify    # create missing indexes first
+"""
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEX_OPTIONS_CONFLICT = 85
+
+# Archives are rarely read, so they trade CPU for a smaller footprint on disk and in cache
+ARCHIVE_STORAGE = {"wiredTiger": {"configString": "block_compressor=zstd"}}
+
+# Options for collections that must be created explicitly, before their indexes
+COLLECTIONS: Dict[str, Dict[str, Any]] = {
+    "notifications_archive": {"storageEngine": ARCHIVE_STORAGE},
+    "feedback_archive": {"storageEngine": ARCHIVE_STORAGE},
+}
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("username", ASCENDING)], unique=True),
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "pages": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("pagename", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel([("view_count", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("view_count", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "feedback": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("page_id", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel([("page_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "notifications": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)]),
+        IndexModel([("is_read", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel([("type", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("is_read", ASCENDING)]),
+        # Deleting a page removes its notifications by page_id
+        IndexModel([("page_id", ASCENDING)]),
+        # The TTL index on read_at is created at startup from the configured retention
+    ],
+    "notifications_archive": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("page_id", ASCENDING)]),
+    ],
+    "feedback_archive": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("page_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "page_view_buckets": [
+        # The TTL index on hour is created by TrendingTracker, which owns the retention window
+        IndexModel([("hour", ASCENDING), ("pagename", ASCENDING)], unique=True),
+    ],
+    "notification_counters": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "stream_tickets": [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "search_postings": [
+        # Best postings of a term first, covering the query; a page's postings are an _id range
+        IndexModel([("term", ASCENDING), ("weight", DESCENDING), ("pagename", ASCENDING)]),
+    ],
+    "notification_outbox": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("next_attempt_at", ASCENDING)]),
+    ],
+}
+
+_NOW = datetime(2024, 1, 1)
+_NEWEST_FIRST = [("created_at", DESCENDING), ("id", DESCENDING)]
+_OLDEST_FIRST = [("created_at", ASCENDING), ("id", ASCENDING)]
+
+# (collection, description, filter, sort) for every query the API issues.
+# Full scans that are intended, such as reconciling every unread counter,
+# are left out.
+QUERY_SHAPES: List[Tuple[str, str, Dict[str, Any], Optional[List[Tuple[str, int]]]]] = [
+    ("users", "user by id", {"id": "x"}, None),
+    ("users", "user by email", {"email": "x@example.com"}, None),
+    ("users", "user by username", {"username": "x"}, None),
+    ("users", "usernames for owner listing", {"id": {"$in": ["x", "y"]}}, None),
+    ("pages", "public page by pagename", {"pagename": "x"}, None),
+    ("pages", "page by id", {"id": "x"}, None),
+    ("pages", "pages by ids", {"id": {"$in": ["x", "y"]}}, None),
+    ("pages", "own page by id", {"id": "x", "user_id": "y"}, None),
+    ("pages", "user's pages", {"user_id": "x"}, _NEWEST_FIRST),
+    ("pages", "user's page ids", {"user_id": "x"}, None),
+    ("pages", "owner listing by date", {}, _NEWEST_FIRST),
+    ("pages", "owner listing by views", {}, [("view_count", DESCENDING), ("id", DESCENDING)]),
+    ("pages", "owner listing of suspended pages", {"is_suspended": True}, _NEWEST_FIRST),
+    ("pages", "owner listing, next page", {
+        "$or": [{"created_at": {"$lt": _NOW}}, {"created_at": _NOW, "id": {"$lt": "x"}}],
+    }, _NEWEST_FIRST),
+    ("pages", "user's pages export", {"user_id": "x"}, _OLDEST_FIRST),
+    ("pages", "search results", {
+        "pagename": {"$in": ["x", "y"]}, "is_suspended": {"$ne": True}, "is_maintenance": {"$ne": True},
+    }, None),
+    ("pages", "owner pages export", {}, _OLDEST_FIRST),
+    ("feedback", "page feedback", {"page_id": "x"}, _NEWEST_FIRST),
+    ("feedback", "page feedback delete", {"page_id": "x"}, None),
+    ("feedback", "feedback export for a user's pages", {"page_id": {"$in": ["x", "y"]}}, _OLDEST_FIRST),
+    ("feedback", "owner feedback export", {}, _OLDEST_FIRST),
+    ("notifications", "user's notifications", {"user_id": "x"}, _NEWEST_FIRST),
+    ("notifications", "mark one read", {"id": "x", "user_id": "y", "is_read": False}, None),
+    ("notifications", "mark all read / unread count", {"user_id": "x", "is_read": False}, None),
+    ("notifications", "unread reconciliation", {"is_read": False}, None),
+    ("notifications", "unread recount of mismatched users", {"is_read": False, "user_id": {"$in": ["x", "y"]}}, None),
+    ("notifications", "page notifications delete", {"page_id": "x"}, None),
+    ("notifications", "unread notifications of deleted pages", {"page_id": {"$in": ["x", "y"]}, "is_read": False}, None),
+    ("notifications", "user's notifications export", {"user_id": "x"}, _OLDEST_FIRST),
+    ("notifications", "owner notifications export", {}, _OLDEST_FIRST),
+    ("page_view_buckets", "trending window", {"hour": {"$gte": _NOW}}, None),
+    ("pages", "top pages", {"is_suspended": {"$ne": True}, "is_maintenance": {"$ne": True}}, [
+        ("view_count", DESCENDING), ("id", DESCENDING),
+    ]),
+    ("notification_counters", "unread counter", {"user_id": "x"}, None),
+    ("notification_outbox", "due outbox entries", {
+        "next_attempt_at": {"$lte": _NOW}, "attempts": {"$lt": 10},
+    }, [("next_attempt_at", ASCENDING)]),
+    ("notification_outbox", "outbox entries by id", {"id": {"$in": ["x", "y"]}}, None),
+    ("notifications", "archival candidates", {"created_at": {"$lt": _NOW}}, [("created_at", ASCENDING)]),
+    ("feedback", "archival candidates", {"created_at": {"$lt": _NOW}}, [("created_at", ASCENDING)]),
+    ("notifications_archive", "user's archived notifications", {"user_id": "x"}, _NEWEST_FIRST),
+    ("notifications_archive", "archived page notifications delete", {"page_id": "x"}, None),
+    ("feedback_archive", "archived page feedback", {"page_id": "x"}, _NEWEST_FIRST),
+    ("feedback_archive", "archived page feedback delete", {"page_id": "x"}, None),
+    ("stream_tickets", "redeem a stream ticket", {"_id": "x", "expires_at": {"$gt": _NOW}}, None),
+    ("search_postings", "best postings of a term", {"term": "garden"}, [("weight", DESCENDING)]),
+    ("search_postings", "postings of a page", {"_id": {"$gte": "x\t", "$lt": "x\n"}}, None),
+    ("search_postings", "excluded terms of candidates", {"_id": {"$in": ["x\tgarden", "y\tgarden"]}}, None),
+    ("search_terms", "page counts of terms", {"_id": {"$in": ["garden", "tip"]}}, None),
+]
+
+
+async def ensure_collections(database) -> None:
+    """Create the collections declared with options, unless they exist already"""
+    for collection_name, options in COLLECTIONS.items():
+        try:
+            await database.create_collection(collection_name, **options)
+        except CollectionInvalid:
+            pass  # Created earlier, possibly by another worker
+        except OperationFailure as exc:
+            logger.warning("Could not create collection %s: %s", collection_name, exc)
+
+
+async def ensure_ttl_index(collection, field: str, expire_after_seconds: Optional[int]) -> None:
+    """Create the TTL index on ``field``, or change its expiry; ``None`` drops it.
+
+    Retention windows come from settings, so an index created with another
+    window is updated in place with ``collMod``.
+    """
+    if expire_after_seconds is None:
+        try:
+            await collection.drop_index([(field, ASCENDING)])
+        except OperationFailure:
+            pass  # Never created
+        return
+    try:
+        await collection.create_index(field, expireAfterSeconds=expire_after_seconds)
+    except OperationFailure as exc:
+        if exc.code != INDEX_OPTIONS_CONFLICT:
+            raise
+        await collection.database.command({
+            "collMod": collection.name,
+            "index": {"keyPattern": {field: 1}, "expireAfterSeconds": expire_after_seconds},
+        })
+
+
+async def ensure_indexes(database) -> Dict[str, List[str]]:
+    """Create any declared collection and index that is missing and return the index names per collection.
+
+    ``createIndexes`` is a no-op for indexes that already exist, so this is
+    safe to run on every start and from several workers at once. An index
+    that conflicts with an existing one of the same name or keys is logged
+    and skipped rather than failing startup.
+    """
+    await ensure_collections(database)
+    created = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        try:
+            created[collection_name] = await collection.create_indexes(indexes)
+            continue
+        except OperationFailure:
+            pass
+        # Retry one by one so a single conflict does not hold back the rest
+        names = []
+        for index in indexes:
+            try:
+                names.extend(await collection.create_indexes([index]))
+            except OperationFailure as exc:
+                logger.warning("Could not create index %s on %s: %s", index.document["name"], collection_name, exc)
+        created[collection_name] = names
+    return created
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    if isinstance(plan, dict):
+        stages = [plan["stage"]] if "stage" in plan else []
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+        return stages
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in _plan_stages(item)]
+    return []
+
+
+async def verify_query_plans(database) -> List[Dict[str, Any]]:
+    """Explain every query shape and return one report per shape"""
+    reports = []
+    for collection_name, description, query, sort in QUERY_SHAPES:
+        command = {"find": collection_name, "filter": query}
+        if sort:
+            command["sort"] = dict(sort)
+        explained = await database.command({"explain": command, "verbosity": "queryPlanner"})
+        stages = _plan_stages(explained["queryPlanner"]["winningPlan"])
+        reports.append({
+            "collection": collection_name,
+            "query": description,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return reports
+
+
+async def _main(actions: List[str]) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    database = client[os.environ["DB_NAME"]]
+    failed = False
+    try:
+        if "ensure" in actions:
+            for collection_name, names in (await ensure_indexes(database)).items():
+                print(f"{collection_name}: {', '.join(names)}")
+        if "verify" in actions:
+            for report in await verify_query_plans(database):
+                status = "COLLSCAN" if report["collscan"] else "ok"
+                print(f"{status:>8}  {report['collection']}: {report['query']} ({' > '.join(report['stages'])})")
+                failed = failed or report["collscan"]
+    finally:
+        client.close()
+    if failed:
+        print("Some queries scan whole collections; declare an index for them in indexes.py", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    actions = sys.argv[1:] or ["verify"]
+    unknown = set(actions) - {"ensure", "verify"}
+    if unknown:
+        sys.exit(f"Unknown action(s): {', '.join(sorted(unknown))}; use ensure and/or verify")
+    sys.exit(asyncio.run(_main(actions)))
@@ -0,0 +1,475 @@
+"""Prometheus metrics for NOTEZ FUN Backend
+
+Per-route request latency, in-flight requests, event-loop lag, Mongo
+command counts/durations attributed to the route that issued them and
+Mongo connection pool checkouts.
+
+Under gunicorn each worker periodically writes a snapshot of its metrics
+to ``<multiproc_dir>/<pid>.json``; ``/metrics`` on any worker merges all
+snapshots, so the exposition covers the whole node. Counters and
+histograms from exited workers are kept so totals stay monotonic, while
+gauges only include live workers.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 50)
+JOB_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+BACKGROUND_ROUTE = "background"
+UNMATCHED_ROUTE = "unmatched"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Mongo listeners record from driver threads while the loop thread
+        # renders, so every read-modify-write and every read holds the lock
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict:
+        return {
+            "type": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": self._samples(),
+        }
+
+    def _samples(self) -> list:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Gauge merged across workers with ``mode`` ("sum" or "max")"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), mode: str = "sum"):
+        super().__init__(name, documentation, labelnames)
+        self.mode = mode
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot["mode"] = self.mode
+        return snapshot
+
+    def _samples(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, the +Inf bucket last, then sum
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[bucket] += 1
+            state[-1] += value
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+    def _samples(self):
+        with self._lock:
+            return [[list(labels), list(state)] for labels, state in self._values.items()]
+
+
+class Registry:
+    """Holds this worker's metrics and renders the merged exposition"""
+
+    def __init__(self, multiproc_dir: Optional[str] = None):
+        self.multiproc_dir = Path(multiproc_dir) if multiproc_dir else None
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> dict:
+        return {"pid": os.getpid(), "metrics": {name: metric.snapshot() for name, metric in self._metrics.items()}}
+
+    def write_snapshot(self) -> None:
+        """Persist this worker's snapshot for the other workers to read"""
+        if self.multiproc_dir is None:
+            return
+        self.multiproc_dir.mkdir(parents=True, exist_ok=True)
+        path = self.multiproc_dir / f"{os.getpid()}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp_path, path)
+
+    def _collect_snapshots(self) -> List[Tuple[dict, bool]]:
+        own = self.snapshot()
+        snapshots = [(own, True)]
+        if self.multiproc_dir is None or not self.multiproc_dir.exists():
+            return snapshots
+        for path in self.multiproc_dir.glob("*.json"):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if snapshot["pid"] == own["pid"]:
+                continue
+            snapshots.append((snapshot, _pid_alive(snapshot["pid"])))
+        return snapshots
+
+    def render(self) -> str:
+        """Render every worker's metrics, merged, in Prometheus text format"""
+        merged: Dict[str, dict] = {}
+        for snapshot, alive in self._collect_snapshots():
+            for name, metric in snapshot["metrics"].items():
+                if metric["type"] == "gauge" and not alive:
+                    continue
+                target = merged.setdefault(name, {**metric, "samples": {}})
+                for labels, value in metric["samples"]:
+                    key = tuple(labels)
+                    current = target["samples"].get(key)
+                    if current is None:
+                        target["samples"][key] = value
+                    elif metric["type"] == "histogram":
+                        target["samples"][key] = [a + b for a, b in zip(current, value)]
+                    elif metric["type"] == "gauge" and metric.get("mode") == "max":
+                        target["samples"][key] = max(current, value)
+                    else:
+                        target["samples"][key] = current + value
+
+        lines = []
+        for name, metric in sorted(merged.items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            labelnames = metric["labelnames"]
+            for labels, value in sorted(metric["samples"].items()):
+                if metric["type"] == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(list(metric["buckets"]) + ["+Inf"], value[:-1]):
+                        cumulative += count
+                        le = bound if bound == "+Inf" else _format_value(bound)
+                        lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le=le)} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(value[-1])}")
+                    lines.append(f"{name}_count{_format_labels(labelnames, labels)} {cumulative}")
+                else:
+                    lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, labels, le: Optional[str] = None) -> str:
+    pairs = list(zip(labelnames, labels))
+    if le is not None:
+        pairs.append(("le", le))
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(str(value))}"' for name, value in pairs) + "}"
+
+
+class RequestStats:
+    """Mongo work attributed to the request currently being served"""
+
+    __slots__ = ("scope", "mongo_commands")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.mongo_commands = 0
+
+    @property
+    def route(self) -> str:
+        # The router stores the matched route in the scope once routing is done
+        return getattr(self.scope.get("route"), "path", UNMATCHED_ROUTE)
+
+
+# Motor runs driver calls on executor threads with a copy of the caller's
+# context, so command listeners can see which request issued a command.
+_current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("current_request", default=None)
+
+
+class AppMetrics:
+    """The metrics this application records"""
+
+    def __init__(self, multiproc_dir: Optional[str] = None, export_interval: float = 5.0, lag_interval: float = 0.5):
+        self.registry = Registry(multiproc_dir)
+        self.export_interval = export_interval
+        self.lag_interval = lag_interval
+        register = self.registry.register
+        self.requests_total = register(Counter(
+            "http_requests_total", "HTTP requests served", ("route", "method", "status")))
+        self.request_duration = register(Histogram(
+            "http_request_duration_seconds", "HTTP request latency", ("route", "method")))
+        self.requests_in_flight = register(Gauge(
+            "http_requests_in_flight", "HTTP requests currently being served"))
+        self.loop_lag = register(Histogram(
+            "event_loop_lag_seconds", "Event-loop scheduling delay"))
+        self.loop_lag_max = register(Gauge(
+            "event_loop_lag_max_seconds", "Largest event-loop delay in the last export interval", mode="max"))
+        self.mongo_commands = register(Counter(
+            "mongo_commands_total", "MongoDB commands issued", ("route", "command")))
+        self.mongo_failures = register(Counter(
+            "mongo_command_failures_total", "MongoDB commands that failed", ("route", "command")))
+        self.mongo_duration = register(Histogram(
+            "mongo_command_duration_seconds", "MongoDB command latency", ("route", "command")))
+        self.mongo_per_request = register(Histogram(
+            "mongo_commands_per_request", "MongoDB commands issued per HTTP request", ("route",), buckets=COUNT_BUCKETS))
+        self.pool_checkouts = register(Counter(
+            "mongo_pool_checkouts_total", "MongoDB connection checkouts by outcome", ("address", "outcome")))
+        self.pool_checkout_wait = register(Histogram(
+            "mongo_pool_checkout_wait_seconds", "Time spent waiting for a pooled MongoDB connection", ("address",)))
+        self.pool_in_use = register(Gauge(
+            "mongo_pool_connections_in_use", "MongoDB connections checked out of the pool", ("address",)))
+        self.pool_connections = register(Gauge(
+            "mongo_pool_connections", "Open MongoDB connections", ("address",)))
+        self.pool_clears = register(Counter(
+            "mongo_pool_cleared_total", "MongoDB connection pools cleared after an error", ("address",)))
+        self.job_runs = register(Counter(
+            "scheduler_job_runs_total", "Background job runs by outcome", ("job", "outcome")))
+        self.job_duration = register(Histogram(
+            "scheduler_job_duration_seconds", "Background job run time", ("job",), buckets=JOB_BUCKETS))
+        self._tasks: List[asyncio.Task] = []
+        self._window_lag = 0.0
+
+    def command_listener(self) -> monitoring.CommandListener:
+        """A pymongo listener recording commands against the current route"""
+        return _MongoCommandListener(self)
+
+    def pool_listener(self) -> monitoring.ConnectionPoolListener:
+        """A pymongo listener recording connection pool checkouts and wait times"""
+        return _MongoPoolListener(self)
+
+    def mongo_listeners(self) -> list:
+        """Every pymongo listener, for the client's ``event_listeners``"""
+        return [self.command_listener(), self.pool_listener()]
+
+    def _record_command(self, command: str, duration: float, failed: bool) -> None:
+        request = _current_request.get()
+        route = BACKGROUND_ROUTE if request is None else request.route
+        self.mongo_commands.inc(route, command)
+        self.mongo_duration.observe(duration, route, command)
+        if failed:
+            self.mongo_failures.inc(route, command)
+        if request is not None:
+            request.mongo_commands += 1
+
+    def record_job(self, job: str, duration: float, failed: bool) -> None:
+        """Record a background job run; the scheduler's ``on_run`` callback"""
+        self.job_runs.inc(job, "failure" if failed else "success")
+        self.job_duration.observe(duration, job)
+
+    async def _monitor_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            lag = max(loop.time() - start - self.lag_interval, 0.0)
+            self.loop_lag.observe(lag)
+            self._window_lag = max(self._window_lag, lag)
+
+    async def _export(self):
+        while True:
+            await asyncio.sleep(self.export_interval)
+            self.loop_lag_max.set(self._window_lag)
+            self._window_lag = 0.0
+            try:
+                self.registry.write_snapshot()
+            except OSError:
+                logger.exception("Failed to write metrics snapshot")
+
+    def start(self) -> None:
+        """Start the event-loop lag monitor and the snapshot exporter"""
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._monitor_loop_lag()), loop.create_task(self._export())]
+
+    async def stop(self) -> None:
+        """Stop the background tasks and write a final snapshot"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            self.registry.write_snapshot()
+        except OSError:
+            logger.exception("Failed to write metrics snapshot")
+
+    def render(self) -> str:
+        """Prometheus text exposition for the whole node"""
+        return self.registry.render()
+
+
+class _MongoCommandListener(monitoring.CommandListener):
+    def __init__(self, metrics: AppMetrics):
+        self._metrics = metrics
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._metrics._record_command(event.command_name, event.duration_micros / 1e6, failed=False)
+
+    def failed(self, event):
+        self._metrics._record_command(event.command_name, event.duration_micros / 1e6, failed=True)
+
+
+class _MongoPoolListener(monitoring.ConnectionPoolListener):
+    # A checkout's events are published on the thread performing it, so
+    # the start time is kept per thread to measure the wait
+    def __init__(self, metrics: AppMetrics):
+        self._metrics = metrics
+        self._local = threading.local()
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def _waited(self) -> float:
+        started = getattr(self._local, "started", None)
+        return 0.0 if started is None else time.perf_counter() - started
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        address = self._address(event)
+        self._metrics.pool_checkout_wait.observe(self._waited(), address)
+        self._metrics.pool_checkouts.inc(address, "ok")
+        self._metrics.pool_in_use.inc(address)
+
+    def connection_check_out_failed(self, event):
+        address = self._address(event)
+        self._metrics.pool_checkout_wait.observe(self._waited(), address)
+        self._metrics.pool_checkouts.inc(address, event.reason)
+
+    def connection_checked_in(self, event):
+        self._metrics.pool_in_use.dec(self._address(event))
+
+    def connection_created(self, event):
+        self._metrics.pool_connections.inc(self._address(event))
+
+    def connection_closed(self, event):
+        self._metrics.pool_connections.dec(self._address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._metrics.pool_clears.inc(self._address(event))
+
+    def pool_closed(self, event):
+        pass
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request by its route template"""
+
+    def __init__(self, app, metrics: AppMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        request = RequestStats(scope)
+        token = _current_request.set(request)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        metrics.requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.requests_in_flight.dec()
+            route = request.route
+            method = scope["method"]
+            metrics.requests_total.inc(route, method, str(status["code"]))
+            metrics.request_duration.observe(duration, route, method)
+            metrics.mongo_per_request.observe(request.mongo_commands, route)
+            _current_request.reset(token)
@@ -0,0 +1,155 @@
+"""Denormalized per-user unread notification counters"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+class UnreadCounters:
+    """Maintains ``{user_id, unread_count}`` documents next to the notifications.
+
+    Counters are adjusted with ``$inc`` whenever notifications are inserted
+    or marked read, so reading a user's unread count is a single indexed
+    lookup however long their history is. Increments only touch existing
+    counters; a user's counter is seeded from their notifications the first
+    time it is read, so notifications from before it existed are counted.
+    ``reconcile`` recomputes the counters from the notifications collection
+    to repair drift left by a failed second write or by a notification that
+    arrived while its counter was being seeded; it runs as a scheduler job.
+    ``read_counters``, the same collection with a secondary read preference,
+    serves ``get`` when given.
+    """
+
+    def __init__(
+        self,
+        counters,
+        notifications,
+        reconcile_interval: float = 3600.0,
+        read_counters=None,
+        settle_seconds: float = 5.0,
+    ):
+        self._counters = counters
+        self._read_counters = read_counters if read_counters is not None else counters
+        self._notifications = notifications
+        self.reconcile_interval = reconcile_interval
+        self.settle_seconds = settle_seconds
+        self.reconciliations = 0
+        self.corrections = 0
+
+    async def increment(self, user_id: str, amount: int = 1) -> int:
+        """Add to a user's unread count and return the new value"""
+        counter = await self._counters.find_one_and_update(
+            {"user_id": user_id},
+            {"$inc": {"unread_count": amount}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if counter is None:
+            # Not seeded yet; the count is taken after the change that called this
+            return await self._seed(user_id)
+        return max(counter["unread_count"], 0)
+
+    async def increment_many(self, counts: Dict[str, int]) -> None:
+        """Add to several users' unread counts with one bulk write"""
+        if not counts:
+            return
+        await self._counters.bulk_write([
+            UpdateOne({"user_id": user_id}, {"$inc": {"unread_count": amount}})
+            for user_id, amount in counts.items()
+        ], ordered=False)
+
+    async def decrement(self, user_id: str, amount: int = 1) -> int:
+        """Subtract from a user's unread count and return the new value"""
+        return await self.increment(user_id, -amount)
+
+    async def get(self, user_id: str) -> int:
+        """Get a user's unread count, seeding the counter on first use"""
+        counter = await self._read_counters.find_one({"user_id": user_id})
+        if counter is not None:
+            return max(counter["unread_count"], 0)
+        return await self._seed(user_id)
+
+    async def _seed(self, user_id: str) -> int:
+        count = await self._notifications.count_documents({"user_id": user_id, "is_read": False})
+        counter = await self._counters.find_one_and_update(
+            {"user_id": user_id},
+            {"$setOnInsert": {"unread_count": count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        # Another request may have seeded it first
+        return max(counter["unread_count"], 0)
+
+    async def _unread_counts(self, user_ids: Optional[List[str]] = None) -> Dict[str, int]:
+        match = {"is_read": False}
+        if user_ids is not None:
+            match["user_id"] = {"$in": user_ids}
+        counts = {}
+        async for row in self._notifications.aggregate([
+            {"$match": match},
+            {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+        ]):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+    async def reconcile(self) -> int:
+        """Recompute every counter from the notifications and return how many were corrected.
+
+        Inserting or marking notifications read and adjusting the counter
+        are two writes, so a counter compared while one is halfway done
+        looks wrong although it is about to be right. A mismatch is
+        therefore only corrected if, ``settle_seconds`` later, the user's
+        unread notifications still number the same and the counter still
+        holds the value first read (the update is conditional on it), by
+        which time the second write of any change seen halfway has landed.
+        A change whose second write is delayed longer than that can still
+        leave a counter off by its amount until the next run.
+        """
+        observed = {
+            counter["user_id"]: counter["unread_count"]
+            async for counter in self._counters.find({}, {"_id": 0, "user_id": 1, "unread_count": 1})
+        }
+        actual = await self._unread_counts()
+        mismatched = {
+            user_id: actual.get(user_id, 0)
+            for user_id in observed.keys() | actual.keys()
+            if observed.get(user_id) != actual.get(user_id, 0)
+        }
+
+        corrected = 0
+        if mismatched:
+            await asyncio.sleep(self.settle_seconds)
+            settled = await self._unread_counts(list(mismatched))
+            operations = []
+            for user_id, expected in mismatched.items():
+                if settled.get(user_id, 0) != expected:
+                    # Still changing; checked again next run
+                    continue
+                if user_id in observed:
+                    operations.append(UpdateOne(
+                        {"user_id": user_id, "unread_count": observed[user_id]}, {"$set": {"unread_count": expected}}
+                    ))
+                else:
+                    # Only create missing counters; one seeded since the read above is left alone
+                    operations.append(UpdateOne(
+                        {"user_id": user_id}, {"$setOnInsert": {"unread_count": expected}}, upsert=True
+                    ))
+            if operations:
+                result = await self._counters.bulk_write(operations, ordered=False)
+                corrected = result.modified_count + result.upserted_count
+        if corrected:
+            logger.info("Corrected %d unread notification counters", corrected)
+        self.reconciliations += 1
+        self.corrections += corrected
+        return corrected
+
+    def stats(self) -> dict:
+        """Get reconciliation counters"""
+        return {
+            "reconciliations": self.reconciliations,
+            "corrections": self.corrections,
+            "reconcile_interval_seconds": self.reconcile_interval,
+            "settle_seconds": self.settle_seconds,
+        }
@@ -0,0 +1,269 @@
+"""Batched, asynchronous notification delivery through a durable outbox"""
+import asyncio
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class NotificationChannel:
+    """A destination notifications are fanned out to (database, email, ...)"""
+
+    name = "base"
+
+    async def deliver(self, notifications: List[Dict[str, Any]]) -> None:
+        """Deliver a batch; raise to have the batch retried from the outbox"""
+        raise NotImplementedError
+
+
+class MongoNotificationChannel(NotificationChannel):
+    """Stores notifications with one ``insert_many`` per batch.
+
+    Retried batches may contain notifications that were already stored;
+    those fail on the unique ``id`` index and are skipped, so delivery is
+    idempotent. Unread counters are bumped once per user per batch.
+    """
+
+    name = "mongo"
+
+    def __init__(self, collection, counters, on_delivered: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None):
+        self._collection = collection
+        self._counters = counters
+        self._on_delivered = on_delivered
+
+    async def deliver(self, notifications: List[Dict[str, Any]]) -> None:
+        try:
+            # insert_many adds _id to the documents it is given, so pass copies
+            await self._collection.insert_many([dict(n) for n in notifications], ordered=False)
+        except BulkWriteError as exc:
+            errors = exc.details.get("writeErrors", [])
+            if any(error["code"] != DUPLICATE_KEY for error in errors):
+                raise
+            duplicates = {error["index"] for error in errors}
+            notifications = [n for i, n in enumerate(notifications) if i not in duplicates]
+
+        if notifications:
+            await self._counters.increment_many(Counter(n["user_id"] for n in notifications))
+            if self._on_delivered is not None:
+                await self._on_delivered(notifications)
+
+
+class NotificationDispatcher:
+    """Delivers notifications in batches through a durable Mongo outbox.
+
+    ``enqueue`` only queues the notification in memory, one entry per
+    channel, so the request creating it does no notification I/O. A
+    consumer task drains the queue, coalescing up to ``batch_size`` entries
+    (waiting at most ``linger`` seconds for a batch to fill), writes the
+    whole batch to the outbox collection with one ``insert_many``, hands it
+    to its channels and deletes the entries once a channel took them.
+    Entries a channel fails to take, and entries left behind by a worker
+    that stopped while delivering them, become due after ``retry_interval``
+    seconds and are redelivered by ``retry_outbox`` (a scheduler job) with
+    exponential backoff until ``max_attempts``. Channels skip notifications
+    they already stored, so an entry delivered twice is harmless.
+
+    Only entries still waiting in memory, at most ``linger`` seconds' worth
+    under normal load, are lost if the worker crashes; ``stop`` drains the
+    queue on a graceful shutdown. The queue is bounded; when it is full the
+    entry is written straight to the outbox and left to ``retry_outbox``,
+    so callers only pay for the write while delivery is falling behind.
+    """
+
+    def __init__(
+        self,
+        outbox,
+        channels: List[NotificationChannel],
+        batch_size: int = 100,
+        linger: float = 0.05,
+        queue_size: int = 10000,
+        retry_interval: float = 30.0,
+        max_attempts: int = 10,
+    ):
+        self._outbox = outbox
+        self._channels = {channel.name: channel for channel in channels}
+        self.batch_size = batch_size
+        self.linger = linger
+        self.retry_interval = retry_interval
+        self.max_attempts = max_attempts
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._consumer: Optional[asyncio.Task] = None
+
+        # Counters
+        self.enqueued = 0
+        self.deferred = 0
+        self.processed = 0
+        self.batches = 0
+        self.delivery_failures = 0
+        self.retried = 0
+
+    def add_channel(self, channel: NotificationChannel) -> None:
+        """Register another delivery channel"""
+        self._channels[channel.name] = channel
+
+    def _entries(self, notifications: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return [{
+            "id": str(uuid.uuid4()),
+            "channel": channel,
+            "payload": notification,
+            "attempts": 0,
+            "last_error": None,
+            # Picked up by retry_outbox only if this worker has not delivered it by then
+            "next_attempt_at": now + timedelta(seconds=self.retry_interval),
+            "created_at": now,
+        } for notification in notifications for channel in self._channels]
+
+    async def _write_outbox(self, entries: List[Dict[str, Any]]) -> None:
+        # insert_many adds _id to the documents it is given, so pass copies
+        await self._outbox.insert_many([dict(entry) for entry in entries], ordered=False)
+
+    async def enqueue(self, notification: Dict[str, Any]) -> None:
+        """Queue a notification for delivery; it reaches the outbox with the consumer's next batch"""
+        self.enqueued += 1
+        overflow = []
+        for entry in self._entries([notification]):
+            try:
+                self._queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                overflow.append(entry)
+        if overflow:
+            await self._write_outbox(overflow)
+            self.deferred += len(overflow)
+
+    async def deliver_many(self, notifications: List[Dict[str, Any]]) -> None:
+        """Deliver notifications created together (bulk operations) as one batch, bypassing the queue"""
+        if not notifications:
+            return
+        self.enqueued += len(notifications)
+        entries = self._entries(notifications)
+        await self._write_outbox(entries)
+        await self._deliver(entries)
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.linger
+        while len(batch) < self.batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _deliver(self, entries: List[Dict[str, Any]]) -> int:
+        """Hand outbox entries to their channels, delete the delivered ones and return how many were"""
+        self.batches += 1
+        now = datetime.utcnow()
+        by_channel: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            by_channel.setdefault(entry["channel"], []).append(entry)
+
+        delivered = 0
+        for name, channel_entries in by_channel.items():
+            channel = self._channels.get(name)
+            ids = [entry["id"] for entry in channel_entries]
+            try:
+                if channel is None:
+                    raise LookupError(f"Unknown notification channel: {name}")
+                await channel.deliver([entry["payload"] for entry in channel_entries])
+            except Exception as exc:
+                self.delivery_failures += len(ids)
+                logger.warning("Channel %s failed to deliver %d notifications: %r", name, len(ids), exc)
+                await self._reschedule(channel_entries, exc, now)
+                continue
+            try:
+                await self._outbox.delete_many({"id": {"$in": ids}})
+            except PyMongoError:
+                # Delivered; a later retry finds them already stored and only deletes them
+                logger.warning("Failed to clear %d delivered outbox entries", len(ids), exc_info=True)
+            delivered += len(ids)
+        self.processed += len(entries)
+        return delivered
+
+    async def _reschedule(self, entries: List[Dict[str, Any]], error: Exception, now: datetime) -> None:
+        # Exponential backoff based on the attempt count of each entry
+        for entry in entries:
+            delay = self.retry_interval * (2 ** (entry["attempts"] + 1))
+            try:
+                await self._outbox.update_one(
+                    {"id": entry["id"]},
+                    {
+                        "$inc": {"attempts": 1},
+                        "$set": {"last_error": repr(error), "next_attempt_at": now + timedelta(seconds=delay)},
+                    },
+                )
+            except PyMongoError:
+                # The entry stays due at its previous time and is retried as it is
+                logger.warning("Failed to reschedule outbox entry %s", entry["id"], exc_info=True)
+
+    async def _consume(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write_outbox(batch)
+            except PyMongoError:
+                # Still delivered now, but a failed delivery can no longer be retried
+                logger.exception("Failed to write %d notifications to the outbox", len(batch))
+            try:
+                await self._deliver(batch)
+            except Exception:
+                logger.exception("Failed to deliver %d notifications; they stay in the outbox", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def retry_outbox(self) -> int:
+        """Redeliver due outbox entries and return how many succeeded"""
+        entries = await self._outbox.find(
+            {"next_attempt_at": {"$lte": datetime.utcnow()}, "attempts": {"$lt": self.max_attempts}}
+        ).sort("next_attempt_at", 1).to_list(self.batch_size)
+        if not entries:
+            return 0
+        succeeded = await self._deliver(entries)
+        self.retried += succeeded
+        return succeeded
+
+    def start(self) -> None:
+        """Start the consumer task"""
+        if self._consumer is None or self._consumer.done():
+            self._consumer = asyncio.get_running_loop().create_task(self._consume())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Deliver what is still queued, then stop the consumer"""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "%d queued notifications were not delivered before shutdown; they stay in the outbox",
+                self._queue.qsize(),
+            )
+        if self._consumer is not None:
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+            self._consumer = None
+
+    def stats(self) -> dict:
+        """Get queue and delivery counters"""
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "deferred_to_retry": self.deferred,
+            "processed": self.processed,
+            "batches": self.batches,
+            "delivery_failures": self.delivery_failures,
+            "retried_from_outbox": self.retried,
+            "channels": sorted(self._channels),
+        }
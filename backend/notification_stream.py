@@ -0,0 +1,142 @@
+"""Server-sent event streams for per-user notification updates"""
+import asyncio
+import hashlib
+import json
+import logging
+import secrets
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(event: str, data: Any) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class NotificationHub:
+    """Fans notification events out to the SSE connections of this worker.
+
+    Each connection owns a small bounded queue and costs one idle coroutine
+    until something is published for its user; no database work is done
+    per connection. When a slow client's queue is full the oldest event is
+    dropped. Events from other workers arrive through the broadcast channel
+    and are passed to ``dispatch``.
+    """
+
+    def __init__(self, queue_size: int = 32, heartbeat_seconds: float = 25.0, retry_ms: int = 5000):
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.retry_ms = retry_ms
+        self._connections: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self.connections = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def connect(self, user_id: str) -> asyncio.Queue:
+        """Register a new connection for a user"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._connections[user_id].add(queue)
+        self.connections += 1
+        return queue
+
+    def disconnect(self, user_id: str, queue: asyncio.Queue) -> None:
+        """Forget a closed connection"""
+        queues = self._connections.get(user_id)
+        if queues is None or queue not in queues:
+            return
+        queues.discard(queue)
+        self.connections -= 1
+        if not queues:
+            del self._connections[user_id]
+
+    def send(self, queue: asyncio.Queue, event: str, data: Any) -> None:
+        """Queue an event for one connection, after the events already queued for it"""
+        if queue.full():
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait((event, data))
+        self.delivered += 1
+
+    def dispatch(self, message: Dict[str, Any]) -> None:
+        """Queue ``{"user_id", "event", "data"}`` for every connection of that user"""
+        for queue in self._connections.get(message["user_id"], ()):
+            self.send(queue, message["event"], message["data"])
+
+    async def stream(self, user_id: str, queue: asyncio.Queue) -> AsyncIterator[str]:
+        """Yield SSE frames for a connection until the client goes away"""
+        try:
+            yield f"retry: {self.retry_ms}\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event, data)
+        finally:
+            self.disconnect(user_id, queue)
+
+    def stats(self) -> dict:
+        """Get connection and delivery counters"""
+        return {
+            "connections": self.connections,
+            "users": len(self._connections),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+class StreamTickets:
+    """Short-lived, single-use tickets that authenticate a notification stream.
+
+    ``EventSource`` cannot send an Authorization header, so the stream URL
+    carries a ticket instead of the bearer token; access logs then only
+    ever record tickets that are already spent or about to expire. Tickets
+    live in ``collection`` (under their SHA-256, with a TTL index on
+    ``expires_at``) so any worker can redeem a ticket another one issued.
+    """
+
+    def __init__(self, collection, ttl_seconds: float = 60.0):
+        self._collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.issued = 0
+        self.redeemed = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _key(ticket: str) -> str:
+        return hashlib.sha256(ticket.encode()).hexdigest()
+
+    async def issue(self, user_id: str) -> str:
+        """Create a ticket for ``user_id``"""
+        ticket = secrets.token_urlsafe(32)
+        await self._collection.insert_one({
+            "_id": self._key(ticket),
+            "user_id": user_id,
+            "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+        })
+        self.issued += 1
+        return ticket
+
+    async def redeem(self, ticket: str) -> Optional[str]:
+        """Consume a ticket and return its user id, or ``None`` if it is unknown, used or expired"""
+        document = await self._collection.find_one_and_delete(
+            {"_id": self._key(ticket), "expires_at": {"$gt": datetime.utcnow()}}
+        )
+        if document is None:
+            self.rejected += 1
+            return None
+        self.redeemed += 1
+        return document["user_id"]
+
+    def stats(self) -> dict:
+        """Get ticket counters"""
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "issued": self.issued,
+            "redeemed": self.redeemed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,67 @@
+"""Bulk page updates and deletes with per-page results"""
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from pymongo import DeleteOne, UpdateOne
+
+BULK_OK = "ok"
+BULK_NOT_FOUND = "not_found"
+
+
+def _batches(items: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _results(page_ids: List[str], pages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    done = {page["id"] for page in pages}
+    return [{"page_id": page_id, "status": BULK_OK if page_id in done else BULK_NOT_FOUND} for page_id in page_ids]
+
+
+async def _still_matching(collection, pages: List[Dict[str, Any]], scope: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Pages deleted between the lookup and the write are reported as not found
+    remaining = set(await collection.distinct("id", {"id": {"$in": [page["id"] for page in pages]}, **scope}))
+    return [page for page in pages if page["id"] in remaining]
+
+
+async def bulk_update_pages(
+    collection,
+    page_ids: List[str],
+    scope: Dict[str, Any],
+    update: Dict[str, Any],
+    projection: Dict[str, Any],
+    batch_size: int,
+) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+    """Apply ``update`` to the pages matching ``scope`` and return per-page results and the updated pages.
+
+    The pages are looked up once (with ``projection``, as they were before
+    the update) and written with unordered ``bulk_write`` batches of
+    ``batch_size``; ``scope`` (e.g. the owner's ``user_id``) is part of
+    every filter.
+    """
+    page_ids = list(dict.fromkeys(page_ids))
+    pages = await collection.find({"id": {"$in": page_ids}, **scope}, projection).to_list(len(page_ids))
+    matched = 0
+    for batch in _batches(pages, batch_size):
+        result = await collection.bulk_write(
+            [UpdateOne({"id": page["id"], **scope}, update) for page in batch], ordered=False
+        )
+        matched += result.matched_count
+    if matched < len(pages):
+        pages = await _still_matching(collection, pages, scope)
+    return _results(page_ids, pages), pages
+
+
+async def bulk_delete_pages(
+    collection,
+    page_ids: List[str],
+    scope: Dict[str, Any],
+    projection: Dict[str, Any],
+    batch_size: int,
+) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+    """Delete the pages matching ``scope`` and return per-page results and the deleted pages"""
+    page_ids = list(dict.fromkeys(page_ids))
+    pages = await collection.find({"id": {"$in": page_ids}, **scope}, projection).to_list(len(page_ids))
+    for batch in _batches(pages, batch_size):
+        await collection.bulk_write([DeleteOne({"id": page["id"], **scope}) for page in batch], ordered=False)
+    # A page deleted by someone else between the lookup and the write is gone all the same
+    return _results(page_ids, pages), pages
@@ -0,0 +1,163 @@
+"""Read-through cache for public page documents"""
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+import bson
+
+from single_flight import SingleFlight
+
+Loader = Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class PageCache:
+    """Cache interface; this base implementation caches nothing"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached document, or None if absent or expired"""
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a document"""
+
+    def invalidate(self, key: str) -> None:
+        """Drop a document from the cache"""
+        self.invalidations += 1
+
+    def invalidate_many(self, keys: Iterable[str]) -> None:
+        """Drop several documents from the cache"""
+        for key in keys:
+            self.invalidate(key)
+
+    def clear(self) -> None:
+        """Drop every document from the cache"""
+
+    async def get_or_load(self, key: str, loader: Loader) -> Optional[Dict[str, Any]]:
+        """Return the cached document, loading and caching it on a miss"""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        return await loader()
+
+    def stats(self) -> dict:
+        """Get hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "none",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+class LRUPageCache(PageCache):
+    """In-process LRU cache with a TTL, an entry limit and a memory budget.
+
+    Entry size is measured as the BSON-encoded document size. Concurrent
+    misses for the same key share a single load, and a load that races
+    with an invalidation is not stored.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._stale_loads: Set[str] = set()
+        self._loading = SingleFlight()
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.bytes -= entry[1]
+        return True
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(value)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        size = len(bson.encode(value))
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, dict(value))
+        self.bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        super().invalidate(key)
+        if key in self._loading:
+            self._stale_loads.add(key)
+        self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._stale_loads.update(self._loading)
+        self.bytes = 0
+
+    async def get_or_load(self, key: str, loader: Loader) -> Optional[Dict[str, Any]]:
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        value = await self._loading.run(key, lambda: self._load(key, loader))
+        return dict(value) if value is not None else None
+
+    async def _load(self, key: str, loader: Loader) -> Optional[Dict[str, Any]]:
+        try:
+            value = await loader()
+        finally:
+            stale = key in self._stale_loads
+            self._stale_loads.discard(key)
+        if value is not None and not stale:
+            self.set(key, value)
+        return value
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({
+            "backend": "lru",
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "coalesced_loads": self._loading.shared,
+        })
+        return stats
+
+
+def create_page_cache(enabled: bool, ttl_seconds: float, max_entries: int, max_bytes: int) -> PageCache:
+    """Create the page cache configured in settings"""
+    if not enabled:
+        return PageCache()
+    return LRUPageCache(ttl_seconds=ttl_seconds, max_entries=max_entries, max_bytes=max_bytes)
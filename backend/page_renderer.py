@@ -0,0 +1,190 @@
+"""Server-side rendered public pages with an on-disk HTML cache"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from html import escape
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import quote
+
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+Renderer = Callable[[], Awaitable[Optional[str]]]
+
+# Bump when the markup changes so files rendered by an older release are not served
+RENDER_VERSION = "1"
+
+_DOCUMENT = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title} | NOTEZ FUN</title>
+<meta name="description" content="{description}">
+<style>
+body{{margin:0;font-family:system-ui,-apple-system,sans-serif;background:#f5f3ff;color:#1f2937}}
+main{{max-width:48rem;margin:0 auto;padding:2rem 1rem}}
+.card{{background:#fff;border-radius:.75rem;box-shadow:0 10px 15px -3px rgba(0,0,0,.1);padding:2rem;margin-bottom:2rem}}
+header{{text-align:center;margin-bottom:2rem}}
+h1{{font-size:2.25rem;margin:0 0 1rem}}
+.lead{{font-size:1.25rem;color:#4b5563}}
+.muted{{font-size:.875rem;color:#6b7280}}
+.body{{white-space:pre-wrap;line-height:1.6}}
+.feedback{{background:#f9fafb;border-radius:.5rem;padding:1rem;margin-top:1rem}}
+.feedback strong{{color:#9333ea}}
+.banner{{border-radius:.75rem;padding:1.5rem}}
+.suspended{{background:#fef2f2;color:#991b1b}}
+.maintenance{{background:#fffbeb;color:#92400e}}
+a.button{{display:inline-block;margin-top:1rem;padding:.5rem 1rem;border-radius:.5rem;background:#9333ea;color:#fff;text-decoration:none}}
+</style>
+</head>
+<body>
+<main>
+{content}
+</main>
+</body>
+</html>
+"""
+
+_PAGE = """<article class="card">
+<header>
+<h1>{title}</h1>
+<p class="lead">{short_description}</p>
+<p class="muted">Views: <span id="view-count">&hellip;</span></p>
+</header>
+<div class="body">{long_description}</div>
+</article>
+<section class="card">
+<h2>Feedback</h2>
+{feedback}
+<a class="button" href="/{pagename_url}?app=1">Leave feedback</a>
+</section>
+<script>
+fetch("/api/public/page/" + {pagename_json} + "/view", {{method: "POST"}})
+  .then(function (response) {{ return response.json(); }})
+  .then(function (data) {{ document.getElementById("view-count").textContent = data.view_count; }})
+  .catch(function () {{}});
+</script>"""
+
+_FEEDBACK = """<div class="feedback"><strong>{username}</strong> <span class="muted">{date}</span><p>{message}</p></div>"""
+
+
+def _date(value: Any) -> str:
+    return value.strftime("%b %d, %Y") if isinstance(value, datetime) else ""
+
+
+def render_page_html(page: Dict[str, Any], feedback: List[Dict[str, Any]]) -> str:
+    """Render a public page and its latest feedback as a standalone HTML document"""
+    title = escape(page["title"])
+    if page.get("is_suspended"):
+        reason = page.get("suspension_reason")
+        content = (
+            '<div class="banner suspended"><h2>🚫 Page Suspended</h2>'
+            "<p>This page has been suspended by the administrator.</p>"
+            + (f"<p><strong>Reason:</strong> {escape(reason)}</p>" if reason else "")
+            + "</div>"
+        )
+    elif page.get("is_maintenance"):
+        content = (
+            '<div class="banner maintenance"><h2>🚧 Under Maintenance</h2>'
+            "<p>This page is currently under maintenance. Please check back later!</p></div>"
+        )
+    else:
+        items = "\n".join(
+            _FEEDBACK.format(username=escape(item["username"]), date=_date(item.get("created_at")), message=escape(item["message"]))
+            for item in feedback
+        ) or '<p class="muted">No feedback yet. Be the first to share your thoughts!</p>'
+        content = _PAGE.format(
+            title=title,
+            short_description=escape(page["short_description"]),
+            long_description=escape(page["long_description"]),
+            feedback=items,
+            pagename_url=escape(quote(page["pagename"], safe="")),
+            # JSON inside <script>: escape "<" so the value cannot close the tag
+            pagename_json=json.dumps(page["pagename"]).replace("<", "\\u003c"),
+        )
+    return _DOCUMENT.format(title=title, description=escape(page["short_description"]), content=content)
+
+
+class RenderedPageCache:
+    """Rendered HTML per pagename, stored as files for zero-copy serving.
+
+    Files are written atomically (temporary file and rename) so a reader
+    never sees a partial page, and workers on the same host share them.
+    Concurrent misses for one page render it once. A render that is
+    invalidated while in flight is redone, so an update can never be
+    overwritten by the older render.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._rendering = SingleFlight()
+        self._stale_renders: Set[str] = set()
+        self.hits = 0
+        self.renders = 0
+        self.invalidations = 0
+
+    def path_for(self, pagename: str) -> Path:
+        """The file a page is cached in"""
+        return self.directory / f"{hashlib.sha256(pagename.encode()).hexdigest()}.html"
+
+    def _write(self, path: Path, html: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(html, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    async def get_or_render(self, pagename: str, render: Renderer) -> Optional[Path]:
+        """Return the cached file for a page, rendering it on a miss; None if the page does not exist"""
+        path = self.path_for(pagename)
+        if path.exists():
+            self.hits += 1
+            return path
+
+        return await self._rendering.run(pagename, lambda: self._render(pagename, path, render))
+
+    async def _render(self, pagename: str, path: Path, render: Renderer) -> Optional[Path]:
+        try:
+            while True:
+                html = await render()
+                if html is None:
+                    return None
+                self.renders += 1
+                await asyncio.to_thread(self._write, path, html)
+                if pagename not in self._stale_renders:
+                    return path
+                # Invalidated while rendering: the file may hold the old content, render again
+                self._stale_renders.discard(pagename)
+        finally:
+            self._stale_renders.discard(pagename)
+
+    def invalidate(self, pagename: str) -> None:
+        """Drop a page's rendered HTML"""
+        self.invalidations += 1
+        if pagename in self._rendering:
+            self._stale_renders.add(pagename)
+        try:
+            self.path_for(pagename).unlink(missing_ok=True)
+        except OSError:
+            logger.exception("Failed to remove rendered page %s", pagename)
+
+    def clear(self) -> None:
+        """Drop every rendered page"""
+        self._stale_renders.update(self._rendering)
+        for path in self.directory.glob("*.html"):
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        """Get hit/render counters"""
+        return {
+            "directory": str(self.directory),
+            "hits": self.hits,
+            "renders": self.renders,
+            "invalidations": self.invalidations,
+            "rendering": len(self._rendering),
+        }
@@ -0,0 +1,96 @@
+"""Opaque cursor (keyset) pagination helpers"""
+import base64
+import json
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def _encode_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, datetime):
+        return {"t": "dt", "v": value.isoformat()}
+    return {"t": "raw", "v": value}
+
+
+def _decode_value(encoded: Dict[str, Any]) -> Any:
+    # Cursors come from clients, so only plain scalars may reach the query; a
+    # document such as {"$ne": null} would otherwise be read as an operator
+    value = encoded["v"]
+    if encoded["t"] == "dt" and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if encoded["t"] == "raw":
+        if isinstance(value, str) or (isinstance(value, int) and not isinstance(value, bool)):
+            return value
+        if isinstance(value, float) and math.isfinite(value):
+            return value
+    raise InvalidCursor("Malformed cursor")
+
+
+def encode_cursor(sort_field: str, document: Dict[str, Any]) -> str:
+    """Build an opaque cursor pointing just past ``document``"""
+    payload = {"f": sort_field, "k": _encode_value(document.get(sort_field)), "id": document["id"]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort_field: str) -> Tuple[Any, str]:
+    """Decode a cursor into the ``(sort value, id)`` it points past"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if payload["f"] != sort_field:
+            raise InvalidCursor("Cursor was issued for a different sort order")
+        if not isinstance(payload["id"], str):
+            raise InvalidCursor("Malformed cursor")
+        return _decode_value(payload["k"]), payload["id"]
+    except InvalidCursor:
+        raise
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+
+
+def keyset_filter(sort_field: str, direction: int, value: Any, last_id: str) -> Dict[str, Any]:
+    """Match documents strictly after ``(value, last_id)`` in the given sort order"""
+    op = "$lt" if direction < 0 else "$gt"
+    return {
+        "$or": [
+            {sort_field: {op: value}},
+            {sort_field: value, "id": {op: last_id}},
+        ]
+    }
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    sort_field: str = "created_at",
+    direction: int = -1,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch one page of documents ordered by ``(sort_field, id)``.
+
+    Returns the documents and the cursor for the next page, or None when
+    this is the last page. Backed by a compound ``(sort_field, id)`` index
+    every page is a bounded index range scan.
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_field)
+        query = {"$and": [query, keyset_filter(sort_field, direction, value, last_id)]}
+
+    documents = await (
+        collection.find(query, projection)
+        .sort([(sort_field, direction), ("id", direction)])
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(sort_field, documents[-1])
+    return documents, next_cursor
@@ -0,0 +1,368 @@
+"""Per-client rate limiting and admission control for NOTEZ FUN Backend"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class RateLimit:
+    """A token bucket of ``capacity`` requests, refilled over ``period`` seconds"""
+
+    __slots__ = ("capacity", "rate")
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """Parse ``"<requests>/<second|minute|hour|day>"``"""
+        count, _, period = spec.partition("/")
+        if period not in PERIODS or not count.strip().isdigit() or int(count) < 1:
+            raise ValueError(f"Invalid rate limit {spec!r}; expected e.g. '10/minute'")
+        return cls(int(count), PERIODS[period])
+
+    def __repr__(self) -> str:
+        return f"RateLimit(capacity={self.capacity}, rate={self.rate:.4g}/s)"
+
+
+class RateLimitStore:
+    """Token buckets kept in this process, evicting the least recently used keys"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, limit: RateLimit, cost: int = 1) -> float:
+        """Draw ``cost`` tokens; return 0 if allowed, else the seconds until they would be available"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = float(limit.capacity)
+        else:
+            tokens = min(float(limit.capacity), bucket[0] + (now - bucket[1]) * limit.rate)
+            self._buckets.move_to_end(key)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / limit.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def acquire(self, key: str, limit: RateLimit, cost: int = 1) -> float:
+        """Like ``take``; shared stores consult other workers"""
+        return self.take(key, limit, cost)
+
+    async def start(self) -> None:
+        """Prepare the store"""
+
+    def stats(self) -> dict:
+        """Get store counters"""
+        return {"backend": "local", "keys": len(self._buckets)}
+
+
+class MongoRateLimitStore(RateLimitStore):
+    """Token buckets shared by all workers, one document per key.
+
+    Each check refills and draws from the bucket with a single upsert
+    using an update pipeline timed by the server clock (``$$NOW``), so
+    workers agree on elapsed time. Documents expire through a TTL index
+    once their bucket would be full again. The in-process buckets act as
+    a pre-filter: the shared bucket has seen at least the requests this
+    worker saw, so a key the local bucket rejects is rejected without a
+    round trip. If Mongo is unavailable the local decision stands.
+    """
+
+    def __init__(self, collection, max_keys: int = 100000):
+        super().__init__(max_keys)
+        self._collection = collection
+        self.local_rejections = 0
+        self.errors = 0
+
+    @staticmethod
+    def _pipeline(limit: RateLimit, cost: int) -> list:
+        elapsed = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000]}
+        refilled = {"$min": [
+            limit.capacity,
+            {"$add": [{"$ifNull": ["$tokens", limit.capacity]}, {"$multiply": [elapsed, limit.rate]}]},
+        ]}
+        return [
+            {"$set": {"tokens": refilled, "updated_at": "$$NOW"}},
+            {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+            {"$set": {
+                "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                "expires_at": {"$add": ["$$NOW", int(limit.capacity / limit.rate * 1000)]},
+            }},
+        ]
+
+    async def acquire(self, key: str, limit: RateLimit, cost: int = 1) -> float:
+        wait = self.take(key, limit, cost)
+        if wait:
+            self.local_rejections += 1
+            return wait
+        try:
+            bucket = await self._collection.find_one_and_update(
+                {"_id": key},
+                self._pipeline(limit, cost),
+                projection={"tokens": 1, "allowed": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except PyMongoError:
+            self.errors += 1
+            logger.warning("Shared rate limit check failed for %s; using the local bucket", key, exc_info=True)
+            return 0.0
+        if bucket["allowed"]:
+            return 0.0
+        return (cost - bucket["tokens"]) / limit.rate
+
+    async def start(self) -> None:
+        """Ensure the bucket TTL index"""
+        try:
+            await self._collection.create_index("expires_at", expireAfterSeconds=0)
+        except PyMongoError:
+            logger.exception("Failed to ensure rate limit TTL index")
+
+    def stats(self) -> dict:
+        return {
+            "backend": "mongo",
+            "local_keys": len(self._buckets),
+            "local_rejections": self.local_rejections,
+            "errors": self.errors,
+        }
+
+
+def create_rate_limit_store(backend: str, database, max_keys: int) -> RateLimitStore:
+    """Create the rate limit store named in settings"""
+    if backend == "mongo":
+        return MongoRateLimitStore(database.rate_limits, max_keys=max_keys)
+    if backend == "local":
+        return RateLimitStore(max_keys=max_keys)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+class RateLimiter:
+    """Named rate limit rules checked against a store.
+
+    Rules listed in ``local_rules`` always use in-process buckets, for
+    paths where a shared round trip per request would cost more than the
+    work it protects.
+    """
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        rules: Dict[str, RateLimit],
+        local_rules: Iterable[str] = (),
+        enabled: bool = True,
+    ):
+        self.store = store
+        self.local_store = RateLimitStore(max_keys=store.max_keys)
+        self.rules = rules
+        self.local_rules = set(local_rules)
+        self.enabled = enabled
+        self.allowed: Dict[str, int] = {name: 0 for name in rules}
+        self.limited: Dict[str, int] = {name: 0 for name in rules}
+
+    async def check(self, rule: str, key: str, cost: int = 1) -> float:
+        """Count a request by ``key`` against ``rule``; return 0 if allowed, else seconds to wait"""
+        if not self.enabled:
+            return 0.0
+        store = self.local_store if rule in self.local_rules else self.store
+        wait = await store.acquire(f"{rule}:{key}", self.rules[rule], cost)
+        if wait:
+            self.limited[rule] += 1
+        else:
+            self.allowed[rule] += 1
+        return wait
+
+    async def start(self) -> None:
+        """Prepare the shared store"""
+        if self.enabled:
+            await self.store.start()
+
+    def stats(self) -> dict:
+        """Get per-rule counters"""
+        return {
+            "enabled": self.enabled,
+            "rules": {
+                name: {
+                    "capacity": limit.capacity,
+                    "per_second": round(limit.rate, 4),
+                    "shared": name not in self.local_rules,
+                    "allowed": self.allowed[name],
+                    "limited": self.limited[name],
+                }
+                for name, limit in self.rules.items()
+            },
+            "store": self.store.stats(),
+        }
+
+
+class AdmissionController:
+    """Caps concurrent requests per worker and sheds the excess.
+
+    Up to ``max_in_flight`` requests run at once; up to ``max_queue`` more
+    wait at most ``queue_timeout`` seconds for a slot, in arrival order.
+    Anything beyond that is refused straight away, as is every new request
+    while the measured event-loop lag exceeds ``max_loop_lag``, so an
+    overloaded worker answers quickly instead of timing everyone out.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 200,
+        max_queue: int = 200,
+        queue_timeout: float = 1.0,
+        max_loop_lag: float = 0.5,
+        probe_interval: float = 0.1,
+        enabled: bool = True,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_loop_lag = max_loop_lag
+        self.probe_interval = probe_interval
+        self.enabled = enabled
+        self.in_flight = 0
+        self.loop_lag = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.shed_loop_lag = 0
+
+    async def acquire(self) -> bool:
+        """Wait for a request slot; False if the request should be refused"""
+        if self.loop_lag > self.max_loop_lag:
+            self.shed_loop_lag += 1
+            return False
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # Unlike wait_for, wait always raises when cancelled, even if the slot arrived
+            await asyncio.wait((waiter,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                # A slot was handed over just as the client went away
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        if not waiter.done():
+            self._discard(waiter)
+            self.shed_timeout += 1
+            return False
+        self.admitted += 1
+        return True
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        """Free a slot, handing it to the longest waiting request if any"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    async def _probe_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.probe_interval)
+            self.loop_lag = max(loop.time() - start - self.probe_interval, 0.0)
+
+    def start(self) -> None:
+        """Start measuring event-loop lag"""
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._probe_loop_lag())
+
+    async def stop(self) -> None:
+        """Stop measuring event-loop lag"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Get admission counters"""
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "loop_lag_seconds": round(self.loop_lag, 4),
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "shed_loop_lag": self.shed_loop_lag,
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware answering 503 when the admission controller refuses a request"""
+
+    def __init__(self, app, controller: AdmissionController, exempt_paths: Iterable[str] = (), exempt_prefixes: Iterable[str] = ()):
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = frozenset(exempt_paths)
+        self.exempt_prefixes = tuple(exempt_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not self.controller.enabled
+            or scope["type"] != "http"
+            or scope["path"] in self.exempt_paths
+            or scope["path"].startswith(self.exempt_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire():
+            body = json.dumps({"detail": "Server is busy, please try again"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", b"1"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
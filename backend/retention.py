@@ -0,0 +1,81 @@
+"""Archival of old notifications and feedback to cold collections"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class Archiver:
+    """Moves documents older than ``older_than_days`` from a hot collection to a cold one.
+
+    Documents are copied by ``created_at`` order in batches of
+    ``batch_size`` and then deleted from the hot collection, so the hot
+    indexes and working set only cover recent data. A batch that was
+    copied but not deleted (the run was interrupted) is copied again
+    harmlessly: documents keep their ``_id`` and duplicates are skipped.
+    ``on_archived`` is awaited with every batch that was moved.
+    """
+
+    def __init__(
+        self,
+        hot,
+        cold,
+        older_than_days: float,
+        batch_size: int = 1000,
+        on_archived: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+    ):
+        self._hot = hot
+        self._cold = cold
+        self.older_than_days = older_than_days
+        self.batch_size = batch_size
+        self.on_archived = on_archived
+
+        # Counters
+        self.runs = 0
+        self.archived = 0
+        self.last_run_archived = 0
+
+    async def archive(self) -> int:
+        """Move every document past the cutoff and return how many were moved"""
+        cutoff = datetime.utcnow() - timedelta(days=self.older_than_days)
+        moved = 0
+        while True:
+            batch = await self._hot.find({"created_at": {"$lt": cutoff}}).sort("created_at", 1).limit(
+                self.batch_size
+            ).to_list(self.batch_size)
+            if not batch:
+                break
+            try:
+                await self._cold.insert_many(batch, ordered=False)
+            except BulkWriteError as exc:
+                if any(error["code"] != DUPLICATE_KEY for error in exc.details.get("writeErrors", [])):
+                    raise
+            await self._hot.delete_many({"_id": {"$in": [document["_id"] for document in batch]}})
+            moved += len(batch)
+            self.archived += len(batch)
+            if self.on_archived is not None:
+                await self.on_archived(batch)
+            if len(batch) < self.batch_size:
+                break
+
+        if moved:
+            logger.info("Archived %d documents from %s to %s", moved, self._hot.name, self._cold.name)
+        self.runs += 1
+        self.last_run_archived = moved
+        return moved
+
+    def stats(self) -> dict:
+        """Get archival counters"""
+        return {
+            "collection": self._hot.name,
+            "archive_collection": self._cold.name,
+            "older_than_days": self.older_than_days,
+            "runs": self.runs,
+            "archived": self.archived,
+            "last_run_archived": self.last_run_archived,
+        }
@@ -0,0 +1,268 @@
+"""In-process background job scheduler for NOTEZ FUN Backend"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+LEADER_LEASE = "scheduler_leader"
+
+
+class Job:
+    """A named unit of background work and its timing counters"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Optional[Callable[[], Awaitable]] = None,
+        interval: Optional[float] = None,
+        singleton: bool = False,
+        wakeup: Optional[asyncio.Event] = None,
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.singleton = singleton
+        self.wakeup = wakeup
+        self.running = 0
+
+        # Counters
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds: Optional[float] = None
+        self.last_started_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def stats(self) -> dict:
+        """Get run counters and timings"""
+        return {
+            "interval_seconds": self.interval,
+            "singleton": self.singleton,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_not_leader": self.skipped,
+            "last_started_at": self.last_started_at,
+            "last_duration_seconds": None if self.last_seconds is None else round(self.last_seconds, 4),
+            "mean_duration_seconds": round(self.total_seconds / self.runs, 4) if self.runs else None,
+            "max_duration_seconds": round(self.max_seconds, 4),
+            "last_error": self.last_error,
+        }
+
+
+class JobScheduler:
+    """Runs periodic and one-shot jobs on the event loop of this worker.
+
+    Periodic jobs run every ``interval`` seconds, or as soon as their
+    ``wakeup`` event is set. Singleton jobs only run on the worker holding
+    the leader lease, a document in ``leases`` that the holder renews every
+    third of ``lease_seconds``; when the holder stops renewing (it crashed
+    or shut down) another worker takes over once the lease has expired.
+    One-shot jobs run once, as soon as they are submitted.
+
+    ``stop`` drains: no new runs start, runs in progress get up to
+    ``drain_timeout`` seconds to finish and are cancelled after that, and
+    the lease is released so the next leader does not wait for it to
+    expire. ``on_run(name, seconds, failed)`` is called after every run.
+    """
+
+    def __init__(
+        self,
+        leases,
+        lease_seconds: float = 30.0,
+        drain_timeout: float = 10.0,
+        on_run: Optional[Callable[[str, float, bool], None]] = None,
+    ):
+        self._leases = leases
+        self.lease_seconds = lease_seconds
+        self.drain_timeout = drain_timeout
+        self.on_run = on_run
+        self.worker_id: Optional[str] = None
+        self.is_leader = False
+        self.jobs: Dict[str, Job] = {}
+        self._loops: Dict[str, asyncio.Task] = {}
+        self._runs: Set[asyncio.Task] = set()
+        self._stopping = False
+
+        # Counters
+        self.leader_elections = 0
+        self.lease_errors = 0
+
+    def every(
+        self,
+        name: str,
+        func: Callable[[], Awaitable],
+        interval: float,
+        singleton: bool = False,
+        wakeup: Optional[asyncio.Event] = None,
+    ) -> Job:
+        """Register ``func`` to run every ``interval`` seconds once the scheduler starts"""
+        if name in self.jobs:
+            raise ValueError(f"Job {name!r} is already registered")
+        job = self.jobs[name] = Job(name, func, interval, singleton, wakeup)
+        return job
+
+    def submit(self, name: str, coroutine: Awaitable) -> None:
+        """Run a one-shot job now; ``stop`` waits for it"""
+        job = self.jobs.get(name)
+        if job is None:
+            job = self.jobs[name] = Job(name)
+        self._track(self._execute(job, coroutine))
+
+    def _track(self, coroutine: Awaitable) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._runs.add(task)
+        task.add_done_callback(self._runs.discard)
+        return task
+
+    async def _execute(self, job: Job, coroutine: Awaitable) -> None:
+        job.running += 1
+        job.last_started_at = datetime.utcnow()
+        started = time.perf_counter()
+        failed = False
+        try:
+            await coroutine
+        except asyncio.CancelledError:
+            failed = True
+            job.last_error = "cancelled"
+            raise
+        except Exception as exc:
+            failed = True
+            job.last_error = repr(exc)
+            logger.exception("Job %s failed", job.name)
+        finally:
+            elapsed = time.perf_counter() - started
+            job.running -= 1
+            job.runs += 1
+            job.failures += failed
+            job.total_seconds += elapsed
+            job.max_seconds = max(job.max_seconds, elapsed)
+            job.last_seconds = elapsed
+            if self.on_run is not None:
+                self.on_run(job.name, elapsed, failed)
+
+    async def _wait(self, job: Job) -> None:
+        if job.wakeup is None:
+            await asyncio.sleep(job.interval)
+            return
+        try:
+            await asyncio.wait_for(job.wakeup.wait(), timeout=job.interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _periodic(self, job: Job) -> None:
+        while not self._stopping:
+            if job.singleton and not self.is_leader:
+                job.skipped += 1
+                # Check back at the lease cadence so a new leader picks the job up promptly
+                await asyncio.sleep(min(job.interval, self.lease_seconds / 3))
+                continue
+            # Shielded so that stopping the loop lets a run in progress drain
+            await asyncio.shield(self._track(self._execute(job, job.func())))
+            await self._wait(job)
+
+    async def _try_lease(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            lease = await self._leases.find_one_and_update(
+                {"_id": LEADER_LEASE, "$or": [{"holder": self.worker_id}, {"expires_at": {"$lt": now}}]},
+                {"$set": {
+                    "holder": self.worker_id,
+                    "expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "renewed_at": now,
+                }},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # The lease exists and is held by another live worker
+            return False
+        return lease is not None and lease["holder"] == self.worker_id
+
+    async def _elect(self) -> None:
+        try:
+            leader = await self._try_lease()
+        except PyMongoError:
+            self.lease_errors += 1
+            logger.warning("Failed to renew the scheduler lease", exc_info=True)
+            # Without a confirmed lease another worker may already have taken over
+            leader = False
+        if leader and not self.is_leader:
+            self.leader_elections += 1
+            logger.info("Worker %s is now the scheduler leader", self.worker_id)
+        elif self.is_leader and not leader:
+            logger.info("Worker %s lost the scheduler leadership", self.worker_id)
+        self.is_leader = leader
+
+    async def _lead(self) -> None:
+        while not self._stopping:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await self._elect()
+
+    async def _release_lease(self) -> None:
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        try:
+            await self._leases.update_one(
+                {"_id": LEADER_LEASE, "holder": self.worker_id}, {"$set": {"expires_at": datetime.utcnow()}}
+            )
+        except PyMongoError:
+            logger.warning("Failed to release the scheduler lease; it expires on its own", exc_info=True)
+
+    async def start(self) -> None:
+        """Contend for the leader lease and start every registered periodic job"""
+        # Chosen here rather than at import so each forked worker gets its own
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stopping = False
+        loop = asyncio.get_running_loop()
+        if any(job.singleton for job in self.jobs.values()):
+            await self._elect()
+            self._loops[LEADER_LEASE] = loop.create_task(self._lead())
+        for name, job in self.jobs.items():
+            if job.interval is not None:
+                self._loops[name] = loop.create_task(self._periodic(job))
+
+    async def stop(self) -> None:
+        """Stop scheduling, give running jobs ``drain_timeout`` to finish, and release the lease"""
+        self._stopping = True
+        for task in self._loops.values():
+            task.cancel()
+        await asyncio.gather(*self._loops.values(), return_exceptions=True)
+        self._loops.clear()
+
+        # Jobs may submit follow-up jobs while draining
+        deadline = time.monotonic() + self.drain_timeout
+        while self._runs:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                pending = set(self._runs)
+                logger.warning("Cancelling %d background jobs still running after the drain timeout", len(pending))
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                break
+            await asyncio.wait(set(self._runs), timeout=remaining)
+        await self._release_lease()
+
+    def stats(self) -> dict:
+        """Get leadership and per-job counters"""
+        return {
+            "worker_id": self.worker_id,
+            "is_leader": self.is_leader,
+            "leader_elections": self.leader_elections,
+            "lease_errors": self.lease_errors,
+            "in_flight": len(self._runs),
+            "jobs": {name: job.stats() for name, job in sorted(self.jobs.items())},
+        }
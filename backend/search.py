@@ -0,0 +1,359 @@
+"""Page search backed by an incrementally maintained inverted index
+
+Every public page is tokenized into ``search_postings``, one document per
+(page, term) holding the term's precomputed weight in that page, and
+``search_terms`` counts the pages containing each term. Postings are
+indexed by term and weight, so a query reads at most ``max_results``
+postings per term, best first, however many pages match.
+"""
+import asyncio
+import base64
+import json
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+
+from pagination import InvalidCursor
+
+logger = logging.getLogger(__name__)
+
+# Field weights; title matches rank above description matches
+SEARCH_WEIGHTS = {"title": 10, "short_description": 4, "long_description": 1}
+
+RESULT_FIELDS = ["id", "pagename", "title", "short_description", "view_count", "created_at"]
+
+PUBLIC_PAGE = {"is_suspended": {"$ne": True}, "is_maintenance": {"$ne": True}}
+
+# BM25 saturation and length normalization. Weights are computed when a page
+# is indexed, so lengths are normalized against a fixed reference length
+# rather than the collection average.
+K1 = 1.2
+B = 0.75
+REFERENCE_LENGTH = 200
+
+MAX_TERM_LENGTH = 64
+
+# Terms are word characters only, so this key cannot collide with one
+PAGE_COUNT = "#pages"
+
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+_WORD = re.compile(r"\w+")
+_TERM = re.compile(r"[\w']+")
+
+
+def _stem(word: str) -> str:
+    # Light plural folding so "pages" finds "page" and "stories" finds "story"
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("sses", "shes", "ches", "xes", "zes", "oes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Index terms of ``text`` in order, without stop words and one-letter words"""
+    terms = []
+    for word in _WORD.findall((text or "").lower()):
+        if len(word) > 1 and word not in STOP_WORDS:
+            terms.append(_stem(word)[:MAX_TERM_LENGTH])
+    return terms
+
+
+def parse_query(query: str) -> Tuple[List[str], List[str]]:
+    """Index terms to match and index terms to exclude (``-word``)"""
+    include, exclude = [], []
+    for token in query.split():
+        if token.startswith("-"):
+            exclude.extend(tokenize(token[1:]))
+        else:
+            include.extend(tokenize(token))
+    return list(dict.fromkeys(include)), list(dict.fromkeys(exclude))
+
+
+def parse_terms(query: str) -> List[str]:
+    """Lowercased words to highlight, dropping negations (``-word``) and one-letter words"""
+    terms = []
+    for token in query.split():
+        if token.startswith("-"):
+            continue
+        terms.extend(term.lower() for term in _TERM.findall(token) if len(term) > 1)
+    return list(dict.fromkeys(terms))
+
+
+def term_weights(page: Dict[str, Any]) -> Dict[str, float]:
+    """BM25 weight of every term of ``page``, counting field weights as repeated occurrences"""
+    frequencies: Counter = Counter()
+    length = 0
+    for field, weight in SEARCH_WEIGHTS.items():
+        terms = tokenize(page.get(field))
+        length += weight * len(terms)
+        for term in terms:
+            frequencies[term] += weight
+    norm = K1 * (1 - B + B * length / REFERENCE_LENGTH)
+    return {term: round(tf * (K1 + 1) / (tf + norm), 4) for term, tf in frequencies.items()}
+
+
+def _idf(pages: int, containing: int) -> float:
+    return math.log(1 + (pages - containing + 0.5) / (containing + 0.5))
+
+
+def _posting_id(pagename: str, term: str) -> str:
+    # Keyed by pagename first, so one page's postings are a range of _id
+    return f"{pagename}\t{term}"
+
+
+def _page_postings(pagename: str) -> Dict[str, Any]:
+    # "\n" is the character after "\t"
+    return {"_id": {"$gte": f"{pagename}\t", "$lt": f"{pagename}\n"}}
+
+
+def build_snippet(text: str, terms: List[str], length: int = 160) -> Tuple[str, List[List[int]]]:
+    """A window of ``text`` around the first matched term and the ``[start, end]`` of each match in it.
+
+    Terms match at word starts, so "page" also highlights "pages" the way
+    plural folding matched it.
+    """
+    if not text:
+        return "", []
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\w*", re.IGNORECASE) if terms else None
+    first = pattern.search(text) if pattern else None
+
+    start = 0
+    if first and first.start() > length // 3:
+        # Start the window at a word boundary a little before the first match
+        start = text.rfind(" ", 0, first.start() - length // 4) + 1
+    end = start + length
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        if space > start:
+            end = space
+    else:
+        end = len(text)
+
+    window = text[start:end].rstrip()
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    highlights = []
+    if pattern:
+        highlights = [[match.start() + len(prefix), match.end() + len(prefix)] for match in pattern.finditer(window)]
+    return prefix + window + suffix, highlights
+
+
+def _encode_offset(offset: int) -> str:
+    raw = json.dumps({"o": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_offset(token: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        offset = json.loads(raw)["o"]
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(offset, int) or offset < 0:
+        raise InvalidCursor("Malformed cursor")
+    return offset
+
+
+class SearchIndex:
+    """Inverted index of public pages, kept in ``search_postings`` and ``search_terms``.
+
+    ``refresh`` re-reads the given pages from ``database`` and rewrites
+    their postings, so it is called with the pagenames of every page that
+    was created, edited, suspended, put in maintenance or deleted. Page
+    counts per term are adjusted by the difference, which a concurrent
+    refresh of the same page can skew slightly; they only weight terms
+    against each other, and ``rebuild`` recomputes them.
+
+    Queries read from ``read_database`` and fetch at most ``max_results``
+    postings per term, in weight order, then score the union of those
+    candidates. The page of results is addressed by rank offset, as the
+    ranking is recomputed per request.
+    """
+
+    def __init__(self, database, read_database=None):
+        self._db = database
+        self._read_db = read_database if read_database is not None else database
+
+        # Counters
+        self.queries = 0
+        self.pages_refreshed = 0
+        self.postings_written = 0
+        self.rebuilds = 0
+
+    async def refresh(self, pagenames: Iterable[str]) -> int:
+        """Rewrite the postings of ``pagenames`` from their current documents and return how many are indexed"""
+        pagenames = list(dict.fromkeys(pagenames))
+        if not pagenames:
+            return 0
+        projection = {"_id": 0, "pagename": 1, **{field: 1 for field in SEARCH_WEIGHTS}}
+        pages = {
+            page["pagename"]: page
+            async for page in self._db.pages.find({"pagename": {"$in": pagenames}, **PUBLIC_PAGE}, projection)
+        }
+
+        operations = []
+        page_counts: Counter = Counter()
+        for pagename in pagenames:
+            old_terms = {
+                posting["_id"].split("\t", 1)[1]
+                async for posting in self._db.search_postings.find(_page_postings(pagename), {"_id": 1})
+            }
+            weights = term_weights(pages[pagename]) if pagename in pages else {}
+            for term, weight in weights.items():
+                operations.append(ReplaceOne(
+                    {"_id": _posting_id(pagename, term)},
+                    {"term": term, "pagename": pagename, "weight": weight},
+                    upsert=True,
+                ))
+            for term in old_terms - weights.keys():
+                operations.append(DeleteOne({"_id": _posting_id(pagename, term)}))
+            page_counts.update(weights.keys() - old_terms)
+            page_counts.subtract(old_terms - weights.keys())
+            if weights and not old_terms:
+                page_counts[PAGE_COUNT] += 1
+            elif old_terms and not weights:
+                page_counts[PAGE_COUNT] -= 1
+
+        if operations:
+            await self._db.search_postings.bulk_write(operations, ordered=False)
+            self.postings_written += len(operations)
+        await self._count_pages(page_counts)
+        self.pages_refreshed += len(pagenames)
+        return len(pages)
+
+    async def _count_pages(self, page_counts: Counter) -> None:
+        operations = [
+            UpdateOne({"_id": term}, {"$inc": {"pages": count}}, upsert=True)
+            for term, count in page_counts.items()
+            if count
+        ]
+        if operations:
+            await self._db.search_terms.bulk_write(operations, ordered=False)
+
+    async def rebuild(self, batch_size: int = 1000) -> int:
+        """Index every public page from scratch and return how many were indexed"""
+        from indexes import INDEXES
+
+        # Dropping is much cheaper than deleting every posting one by one
+        await self._db.search_postings.drop()
+        await self._db.search_terms.drop()
+        await self._db.search_postings.create_indexes(INDEXES["search_postings"])
+
+        projection = {"_id": 0, "pagename": 1, **{field: 1 for field in SEARCH_WEIGHTS}}
+        indexed = 0
+        postings: List[Dict[str, Any]] = []
+        page_counts: Counter = Counter()
+        async for page in self._db.pages.find(PUBLIC_PAGE, projection).batch_size(batch_size):
+            weights = term_weights(page)
+            if not weights:
+                continue
+            indexed += 1
+            page_counts.update(weights.keys())
+            page_counts[PAGE_COUNT] += 1
+            postings.extend(
+                {"_id": _posting_id(page["pagename"], term), "term": term, "pagename": page["pagename"], "weight": weight}
+                for term, weight in weights.items()
+            )
+            if indexed % batch_size == 0:
+                await self._db.search_postings.insert_many(postings, ordered=False)
+                await self._count_pages(page_counts)
+                self.postings_written += len(postings)
+                postings, page_counts = [], Counter()
+        if postings:
+            await self._db.search_postings.insert_many(postings, ordered=False)
+            self.postings_written += len(postings)
+        await self._count_pages(page_counts)
+
+        self.rebuilds += 1
+        logger.info("Rebuilt the search index for %d pages", indexed)
+        return indexed
+
+    async def _top_postings(self, term: str, limit: int) -> List[Dict[str, Any]]:
+        # Covered by the (term, weight, pagename) index
+        return await self._read_db.search_postings.find(
+            {"term": term}, {"_id": 0, "pagename": 1, "weight": 1}
+        ).sort("weight", -1).limit(limit).to_list(limit)
+
+    async def search(
+        self,
+        query: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        max_results: int = 1000,
+        snippet_length: int = 160,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Search public pages, best match first; the cursor carries the offset of the next result"""
+        offset = _decode_offset(cursor) if cursor else 0
+        self.queries += 1
+        include, exclude = parse_query(query)
+        if offset >= max_results or not include:
+            return [], None
+
+        counts = {
+            document["_id"]: document["pages"]
+            async for document in self._read_db.search_terms.find({"_id": {"$in": include + [PAGE_COUNT]}})
+        }
+        total = max(counts.get(PAGE_COUNT, 0), 1)
+        terms = [term for term in include if counts.get(term, 0) > 0]
+        if not terms:
+            return [], None
+
+        scores: Dict[str, float] = defaultdict(float)
+        for term, postings in zip(terms, await asyncio.gather(*(self._top_postings(term, max_results) for term in terms))):
+            idf = _idf(total, counts[term])
+            for posting in postings:
+                scores[posting["pagename"]] += idf * posting["weight"]
+        if exclude:
+            excluded = self._read_db.search_postings.find(
+                {"_id": {"$in": [_posting_id(pagename, term) for pagename in scores for term in exclude]}},
+                {"pagename": 1},
+            )
+            async for posting in excluded:
+                scores.pop(posting["pagename"], None)
+
+        # Ties break by pagename so the order is stable between requests
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:max_results]
+        window = ranked[offset:offset + limit]
+        next_cursor = _encode_offset(offset + limit) if offset + limit < len(ranked) else None
+        if not window:
+            return [], None
+
+        projection = {"_id": 0, "long_description": 1, **{field: 1 for field in RESULT_FIELDS}}
+        pages = {
+            page["pagename"]: page
+            async for page in self._read_db.pages.find(
+                {"pagename": {"$in": [pagename for pagename, _ in window]}, **PUBLIC_PAGE}, projection
+            )
+        }
+        highlight = parse_terms(query)
+        documents = []
+        for pagename, score in window:
+            # Skips pages suspended or deleted since their postings were read
+            document = pages.get(pagename)
+            if document is None:
+                continue
+            document["snippet"], document["highlights"] = build_snippet(
+                document.pop("long_description", "") or document.get("short_description", ""), highlight, snippet_length
+            )
+            document["score"] = round(score, 4)
+            documents.append(document)
+        return documents, next_cursor
+
+    def stats(self) -> dict:
+        """Get query and indexing counters"""
+        return {
+            "queries": self.queries,
+            "pages_refreshed": self.pages_refreshed,
+            "postings_written": self.postings_written,
+            "rebuilds": self.rebuilds,
+        }
@@ -0,0 +1,41 @@
+"""Lean serialization of Mongo documents for list responses"""
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+
+class DocumentShape:
+    """The public fields of a model, used to read and encode raw documents.
+
+    ``projection`` fetches exactly the model's fields from Mongo (and not
+    ``_id``), and ``dump`` fills in the model's static defaults for fields
+    older documents may be missing. Documents are then encoded by orjson
+    as they are, without building and validating a model per item; the
+    documents were validated by the same model when they were written.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields = list(model.model_fields)
+        self.projection: Dict[str, int] = {"_id": 0, **{name: 1 for name in self.fields}}
+        self.defaults: Dict[str, Any] = {
+            name: field.default
+            for name, field in model.model_fields.items()
+            if field.default is not PydanticUndefined
+        }
+
+    def dump(self, documents: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Projected documents with missing defaulted fields filled in"""
+        if not self.defaults:
+            return list(documents)
+        return [
+            document if len(document) == len(self.fields) else {**self.defaults, **document}
+            for document in documents
+        ]
+
+
+def list_response(items: List[Dict[str, Any]], next_cursor: Optional[str]) -> ORJSONResponse:
+    """A paginated ``{items, next_cursor}`` body encoded straight to bytes"""
+    return ORJSONResponse({"items": items, "next_cursor": next_cursor})
@@ -1,26 +1,157 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import math
+from collections import Counter
 import os
 import logging
 from pathlib import Path
+from pymongo import ReadPreference, ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError, WaitQueueTimeoutError
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional
 import uuid
 from datetime import datetime, timedelta
 import jwt
-from passlib.context import CryptContext
 import re
 
+from config import settings
+from database import MongoConnection, client_options, stale_read_preference
+from export import EXPORT_FORMATS, create_encoder, stream_export
+from auth_cache import AuthCache
+from broadcast import create_broadcast
+from hashing import PasswordHasher, PasswordHasherBusy
+from http_cache import cache_control, is_not_modified, make_etag, validator_headers
+from indexes import ensure_indexes, ensure_ttl_index
+from metrics import AppMetrics, MetricsMiddleware
+from notification_counters import UnreadCounters
+from notification_dispatch import MongoNotificationChannel, NotificationDispatcher
+from notification_stream import NotificationHub, StreamTickets
+from page_bulk import BULK_OK, bulk_delete_pages, bulk_update_pages
+from page_cache import create_page_cache
+from page_renderer import RENDER_VERSION, RenderedPageCache, render_page_html
+from pagination import InvalidCursor, fetch_page
+from rate_limit import AdmissionController, AdmissionMiddleware, RateLimit, RateLimiter, create_rate_limit_store
+from retention import Archiver
+from scheduler import JobScheduler
+from search import SearchIndex
+from trending import TrendingTracker
+from serialization import DocumentShape, list_response
+from view_counter import ViewCounter
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Request, event-loop and Mongo command metrics
+app_metrics = AppMetrics(
+    multiproc_dir=settings.METRICS_MULTIPROC_DIR or None,
+    export_interval=settings.METRICS_EXPORT_INTERVAL_SECONDS,
+)
+
+# MongoDB connection; each worker creates its own client on first use
+mongo = MongoConnection(
+    settings.MONGO_URL,
+    settings.DB_NAME,
+    event_listeners=app_metrics.mongo_listeners() if settings.METRICS_ENABLED else [],
+    **client_options(settings),
+)
+db = mongo.db
+# Read-your-writes paths: a user who just registered must be found on their next request,
+# and a count read right after mark-read must not be the one from before it
+primary_db = mongo.database_proxy(read_preference=ReadPreference.PRIMARY)
+# Staleness-tolerant reads (search, feedback, owner listings) are spread over
+# secondaries, bounded by max staleness
+secondary_db = mongo.database_proxy(read_preference=stale_read_preference(settings))
+
+# Cross-worker messaging
+broadcast = create_broadcast(settings.BROADCAST_BACKEND, db, poll_interval=settings.BROADCAST_POLL_INTERVAL_SECONDS)
+PAGE_CACHE_CHANNEL = "page_cache"
+
+# Public page cache, keyed by pagename
+page_cache = create_page_cache(
+    enabled=settings.PAGE_CACHE_ENABLED,
+    ttl_seconds=settings.PAGE_CACHE_TTL_SECONDS,
+    max_entries=settings.PAGE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.PAGE_CACHE_MAX_BYTES,
+)
+
+# Server-rendered public pages, shared on disk by the workers of a host
+rendered_pages = RenderedPageCache(os.path.join(settings.SSR_CACHE_DIR, RENDER_VERSION))
+PAGE_HTML_CHANNEL = "page_html"
+
+# Trending pages from hourly view buckets, ranked in the background
+trending = TrendingTracker(
+    db.page_view_buckets,
+    db.pages,
+    window_hours=settings.TRENDING_WINDOW_HOURS,
+    half_life_hours=settings.TRENDING_HALF_LIFE_HOURS,
+    size=settings.TRENDING_SIZE,
+    refresh_interval=settings.TRENDING_REFRESH_INTERVAL_SECONDS,
+)
+
+def on_views_flushed(counts: dict):
+    # Flushed pages are re-read so cached counts stay current
+    page_cache.invalidate_many(counts)
+    trending.record(counts)
+
+# Buffered page view counting
+view_counter = ViewCounter(
+    db.pages,
+    flush_interval=settings.VIEW_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.VIEW_FLUSH_MAX_PENDING,
+    key_field="pagename",
+    on_flush=on_views_flushed,
+)
+
+# Live notification streams for connected clients of this worker
+notification_hub = NotificationHub(
+    queue_size=settings.NOTIFICATION_STREAM_QUEUE_SIZE,
+    heartbeat_seconds=settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS,
+)
+NOTIFICATION_CHANNEL = "notifications"
+# Single-use credentials for opening a stream, so bearer tokens stay out of URLs and logs
+stream_tickets = StreamTickets(primary_db.stream_tickets, ttl_seconds=settings.NOTIFICATION_STREAM_TICKET_SECONDS)
+
+# Per-user unread notification counters
+unread_counters = UnreadCounters(
+    db.notification_counters,
+    db.notifications,
+    reconcile_interval=settings.UNREAD_RECONCILE_INTERVAL_SECONDS,
+    # Read right after mark-read, so a lagging secondary would show the old count
+    read_counters=primary_db.notification_counters,
+    settle_seconds=settings.UNREAD_RECONCILE_SETTLE_SECONDS,
+)
+
+async def invalidate_public_page(pagename: str):
+    await invalidate_public_pages([pagename])
+
+async def invalidate_public_pages(pagenames: List[str]):
+    # Delivered to this worker's own subscriber as well as to the other workers
+    if pagenames:
+        await broadcast.publish(PAGE_CACHE_CHANNEL, {"pagenames": pagenames})
+        # Every page edit, suspension and deletion passes through here
+        reindex_pages(pagenames)
+
+def invalidate_page_caches(message: dict):
+    page_cache.invalidate_many(message["pagenames"])
+    for pagename in message["pagenames"]:
+        rendered_pages.invalidate(pagename)
+
+async def invalidate_rendered_page(pagename: str):
+    await invalidate_rendered_pages([pagename])
+
+async def invalidate_rendered_pages(pagenames: List[str]):
+    # Only the HTML embeds feedback; the cached page document is unaffected
+    if pagenames:
+        await broadcast.publish(PAGE_HTML_CHANNEL, {"pagenames": pagenames})
+
+def invalidate_rendered_html(message: dict):
+    for pagename in message["pagenames"]:
+        rendered_pages.invalidate(pagename)
 
 # Security
 SECRET_KEY = "notez-fun-secret-key-2024"
@@ -29,12 +160,50 @@ ACCESS_TOKEN_EXPIRE_DAYS = 7
 OWNER_PASSWORD = "onlyOwner12$"
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
 security = HTTPBearer()
 
+# Decoded tokens and authenticated users, so most requests skip the users lookup
+auth_cache = AuthCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+)
+
+# Token-bucket limits per client on the expensive paths
+rate_limiter = RateLimiter(
+    create_rate_limit_store(settings.RATE_LIMIT_BACKEND, db, settings.RATE_LIMIT_MAX_KEYS),
+    {
+        "login": RateLimit.parse(settings.RATE_LIMIT_LOGIN),
+        "register": RateLimit.parse(settings.RATE_LIMIT_REGISTER),
+        "feedback": RateLimit.parse(settings.RATE_LIMIT_FEEDBACK),
+        "page_view": RateLimit.parse(settings.RATE_LIMIT_PAGE_VIEW),
+    },
+    # Views are buffered in-process; a shared round trip each would cost more than the view
+    local_rules=["page_view"],
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
+
+# Sheds requests with 503 before this worker's event loop saturates
+admission = AdmissionController(
+    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    max_loop_lag=settings.ADMISSION_MAX_LOOP_LAG_SECONDS,
+    enabled=settings.ADMISSION_ENABLED,
+)
+
 # Create the main app without a prefix
 app = FastAPI(title="NOTEZ FUN API", description="Complete page building platform")
 
+@app.exception_handler(WaitQueueTimeoutError)
+async def database_pool_exhausted(request: Request, exc: WaitQueueTimeoutError):
+    # No pooled connection freed up within MONGO_WAIT_QUEUE_TIMEOUT_MS
+    return ORJSONResponse({"detail": "Server is busy, please try again"}, status_code=503, headers={"Retry-After": "1"})
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -105,9 +274,18 @@ class Notification(BaseModel):
     type: str  # "feedback" or "suspension"
     title: str
     message: str
+    page_id: Optional[str] = None
     is_read: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+# Fields fetched and returned by the list endpoints
+PAGE_SHAPE = DocumentShape(Page)
+FEEDBACK_SHAPE = DocumentShape(Feedback)
+NOTIFICATION_SHAPE = DocumentShape(Notification)
+
+# Public page body; the view count is served separately so the body can be cached
+PUBLIC_PAGE_FIELDS = {field: PAGE_SHAPE.defaults.get(field) for field in PAGE_SHAPE.fields if field != "view_count"}
+
 class OwnerLogin(BaseModel):
     password: str
 
@@ -115,12 +293,27 @@ class SuspendPage(BaseModel):
     page_id: str
     reason: str
 
+class BulkPages(BaseModel):
+    page_ids: List[str] = Field(..., min_length=1, max_length=settings.BULK_MAX_PAGES)
+
+class BulkSuspendPages(BulkPages):
+    reason: str
+
+class BulkMaintenancePages(BulkPages):
+    is_maintenance: bool
+
 # Auth Helper Functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server is busy, please try again", headers={"Retry-After": "1"})
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server is busy, please try again", headers={"Retry-After": "1"})
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -141,18 +334,107 @@ def validate_password(password: str):
         return False
     return True
 
+def decode_token(token: str) -> dict:
+    payload = auth_cache.get_payload(token)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        auth_cache.set_payload(token, payload)
+    return payload
+
+async def publish_notification_event(user_id: str, event: str, data):
+    await broadcast.publish(NOTIFICATION_CHANNEL, {"user_id": user_id, "event": event, "data": jsonable_encoder(data)})
+
+async def publish_new_notifications(notifications: List[dict]):
+    for notification in notifications:
+        await publish_notification_event(notification["user_id"], "notification", notification)
+
+# Inverted index for page search, refreshed off the request path whenever a page changes
+search_index = SearchIndex(db, read_database=secondary_db)
+
+def reindex_pages(pagenames: List[str]):
+    scheduler.submit("search_reindex", search_index.refresh(pagenames))
+
+
+# Notifications are queued and written in batches off the request path
+notification_dispatcher = NotificationDispatcher(
+    db.notification_outbox,
+    [MongoNotificationChannel(db.notifications, unread_counters, on_delivered=publish_new_notifications)],
+    batch_size=settings.NOTIFICATION_BATCH_SIZE,
+    linger=settings.NOTIFICATION_BATCH_LINGER_SECONDS,
+    queue_size=settings.NOTIFICATION_QUEUE_SIZE,
+    retry_interval=settings.NOTIFICATION_RETRY_INTERVAL_SECONDS,
+    max_attempts=settings.NOTIFICATION_MAX_ATTEMPTS,
+)
+
+async def on_notifications_archived(notifications: List[dict]):
+    # Archived notifications no longer count as unread; reconciliation repairs any race with mark-read
+    unread = Counter(notification["user_id"] for notification in notifications if not notification["is_read"])
+    await unread_counters.increment_many({user_id: -count for user_id, count in unread.items()})
+
+# Old notifications and feedback move to compressed archive collections
+notification_archiver = Archiver(
+    db.notifications,
+    db.notifications_archive,
+    older_than_days=settings.NOTIFICATION_ARCHIVE_AFTER_DAYS,
+    batch_size=settings.ARCHIVE_BATCH_SIZE,
+    on_archived=on_notifications_archived,
+)
+async def on_feedback_archived(feedback: List[dict]):
+    # Rendered pages embed their latest feedback, which may include what was just archived
+    page_ids = list({item["page_id"] for item in feedback})
+    pages = await db.pages.find({"id": {"$in": page_ids}}, {"_id": 0, "pagename": 1}).to_list(None)
+    await invalidate_rendered_pages([page["pagename"] for page in pages])
+
+feedback_archiver = Archiver(
+    db.feedback,
+    db.feedback_archive,
+    older_than_days=settings.FEEDBACK_ARCHIVE_AFTER_DAYS,
+    batch_size=settings.ARCHIVE_BATCH_SIZE,
+    on_archived=on_feedback_archived,
+)
+
+# Background jobs; singleton jobs run only on the worker holding the leader lease
+scheduler = JobScheduler(
+    db.scheduler_leases,
+    lease_seconds=settings.SCHEDULER_LEASE_SECONDS,
+    drain_timeout=settings.SCHEDULER_DRAIN_TIMEOUT_SECONDS,
+    on_run=app_metrics.record_job if settings.METRICS_ENABLED else None,
+)
+# Buffers and snapshots held by each worker
+scheduler.every(
+    "view_flush", view_counter.flush, settings.VIEW_FLUSH_INTERVAL_SECONDS, wakeup=view_counter.flush_wanted
+)
+scheduler.every("trending_refresh", trending.refresh, settings.TRENDING_REFRESH_INTERVAL_SECONDS)
+# Shared collections, worked on by one worker at a time
+scheduler.every(
+    "unread_reconcile", unread_counters.reconcile, settings.UNREAD_RECONCILE_INTERVAL_SECONDS, singleton=True
+)
+scheduler.every(
+    "notification_outbox_retry", notification_dispatcher.retry_outbox,
+    settings.NOTIFICATION_RETRY_INTERVAL_SECONDS, singleton=True,
+)
+if settings.NOTIFICATION_ARCHIVE_AFTER_DAYS > 0:
+    scheduler.every(
+        "notification_archive", notification_archiver.archive, settings.ARCHIVE_INTERVAL_SECONDS, singleton=True
+    )
+if settings.FEEDBACK_ARCHIVE_AFTER_DAYS > 0:
+    scheduler.every("feedback_archive", feedback_archiver.archive, settings.ARCHIVE_INTERVAL_SECONDS, singleton=True)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(credentials.credentials)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        user = await db.users.find_one({"id": user_id})
+        user = auth_cache.get_user(user_id)
         if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return User(**user)
+            user_doc = await primary_db.users.find_one({"id": user_id})
+            if user_doc is None:
+                raise HTTPException(status_code=401, detail="User not found")
+            user = User(**user_doc)
+            auth_cache.set_user(user_id, user)
+        return user
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
@@ -164,8 +446,66 @@ async def get_current_user_optional(credentials: HTTPAuthorizationCredentials =
     except:
         return None
 
+async def enforce_rate_limit(rule: str, key: str):
+    retry_after = await rate_limiter.check(rule, key)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+def rate_limit_by_ip(rule: str):
+    async def check(request: Request):
+        # Behind nginx, uvicorn takes the client address from X-Forwarded-For
+        await enforce_rate_limit(rule, request.client.host if request.client else "unknown")
+    return Depends(check)
+
+def rate_limit_by_user(rule: str):
+    async def check(current_user: User = Depends(get_current_user)):
+        await enforce_rate_limit(rule, current_user.id)
+    return Depends(check)
+
+async def paginate(collection, query: dict, limit: int, cursor: Optional[str], sort_field: str = "created_at", projection: Optional[dict] = None):
+    try:
+        return await fetch_page(collection, query, limit, cursor=cursor, sort_field=sort_field, projection=projection)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def page_filters(suspended: Optional[bool], maintenance: Optional[bool]) -> dict:
+    query = {}
+    if suspended is not None:
+        query["is_suspended"] = True if suspended else {"$ne": True}
+    if maintenance is not None:
+        query["is_maintenance"] = True if maintenance else {"$ne": True}
+    return query
+
+def created_range(query: dict, created_after: Optional[datetime], created_before: Optional[datetime]) -> dict:
+    if created_after or created_before:
+        query["created_at"] = {}
+        if created_after:
+            query["created_at"]["$gte"] = created_after
+        if created_before:
+            query["created_at"]["$lt"] = created_before
+    return query
+
+async def export_response(collection, query: dict, shape: DocumentShape, export_format: str, after: Optional[str], filename: str):
+    # ``after`` is the id of the last record a previous export delivered
+    resume_point = None
+    if after:
+        resume_point = await collection.find_one({"$and": [query, {"id": after}]}, {"_id": 0, "id": 1, "created_at": 1})
+        if not resume_point:
+            raise HTTPException(status_code=400, detail="Unknown resume point")
+    
+    encoder = create_encoder(export_format, shape.fields)
+    return StreamingResponse(
+        stream_export(collection, query, shape, encoder, batch_size=settings.EXPORT_BATCH_SIZE, after=resume_point),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
+
 # Authentication Routes
-@api_router.post("/register")
+@api_router.post("/register", dependencies=[rate_limit_by_ip("register")])
 async def register(user_data: UserCreate):
     # Validate password
     if not validate_password(user_data.password):
@@ -184,7 +524,7 @@ async def register(user_data: UserCreate):
         raise HTTPException(status_code=400, detail="Username already taken")
     
     # Create user
-    password_hash = get_password_hash(user_data.password)
+    password_hash = await get_password_hash(user_data.password)
     user = User(
         username=user_data.username,
         email=user_data.email,
@@ -206,10 +546,10 @@ async def register(user_data: UserCreate):
         }
     }
 
-@api_router.post("/login")
+@api_router.post("/login", dependencies=[rate_limit_by_ip("login")])
 async def login(login_data: UserLogin):
     user = await db.users.find_one({"email": login_data.email})
-    if not user or not verify_password(login_data.password, user["password_hash"]):
+    if not user or not await verify_password(login_data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Set token expiry based on remember_me
@@ -238,25 +578,51 @@ async def get_me(current_user: User = Depends(get_current_user)):
     }
 
 # Page Routes
+async def delete_page_dependents(page_ids: List[str]):
+    query = {"page_id": {"$in": page_ids}}
+    try:
+        # Unread notifications about these pages stop counting once deleted;
+        # reconciliation repairs any race with mark-read in between
+        unread = {
+            row["_id"]: -row["count"]
+            async for row in db.notifications.aggregate([
+                {"$match": {**query, "is_read": False}},
+                {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+            ])
+        }
+        await asyncio.gather(
+            db.feedback.delete_many(query),
+            db.notifications.delete_many(query),
+            db.feedback_archive.delete_many(query),
+            db.notifications_archive.delete_many(query),
+        )
+        await unread_counters.increment_many(unread)
+    except PyMongoError:
+        logger.exception("Failed to delete feedback and notifications of %d pages", len(page_ids))
+
 @api_router.post("/pages")
 async def create_page(page_data: PageCreate, current_user: User = Depends(get_current_user)):
-    # Check if pagename already exists
-    existing_page = await db.pages.find_one({"pagename": page_data.pagename})
-    if existing_page:
-        raise HTTPException(status_code=400, detail="Page name already exists")
-    
     page = Page(
         user_id=current_user.id,
         **page_data.dict()
     )
     
-    await db.pages.insert_one(page.dict())
+    # The unique pagename index rejects duplicates, also between concurrent requests
+    try:
+        await db.pages.insert_one(page.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Page name already exists")
+    reindex_pages([page.pagename])
     return page
 
 @api_router.get("/pages")
-async def get_user_pages(current_user: User = Depends(get_current_user)):
-    pages = await db.pages.find({"user_id": current_user.id}).to_list(1000)
-    return [Page(**page) for page in pages]
+async def get_user_pages(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user)
+):
+    pages, next_cursor = await paginate(db.pages, {"user_id": current_user.id}, limit, cursor, projection=PAGE_SHAPE.projection)
+    return list_response(PAGE_SHAPE.dump(pages), next_cursor)
 
 @api_router.get("/pages/{page_id}")
 async def get_page(page_id: str, current_user: User = Depends(get_current_user)):
@@ -267,49 +633,164 @@ async def get_page(page_id: str, current_user: User = Depends(get_current_user))
 
 @api_router.put("/pages/{page_id}")
 async def update_page(page_id: str, page_data: PageUpdate, current_user: User = Depends(get_current_user)):
-    page = await db.pages.find_one({"id": page_id, "user_id": current_user.id})
-    if not page:
-        raise HTTPException(status_code=404, detail="Page not found")
-    
     update_data = {k: v for k, v in page_data.dict().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
     
-    await db.pages.update_one({"id": page_id}, {"$set": update_data})
+    # Ownership check, update and read-back in one atomic round trip on the primary
+    updated_page = await db.pages.find_one_and_update(
+        {"id": page_id, "user_id": current_user.id},
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_page:
+        raise HTTPException(status_code=404, detail="Page not found")
+    await invalidate_public_page(updated_page["pagename"])
     
-    updated_page = await db.pages.find_one({"id": page_id})
     return Page(**updated_page)
 
 @api_router.delete("/pages/{page_id}")
 async def delete_page(page_id: str, current_user: User = Depends(get_current_user)):
-    result = await db.pages.delete_one({"id": page_id, "user_id": current_user.id})
-    if result.deleted_count == 0:
+    page = await db.pages.find_one_and_delete(
+        {"id": page_id, "user_id": current_user.id},
+        projection={"pagename": 1}
+    )
+    if not page:
         raise HTTPException(status_code=404, detail="Page not found")
+    view_counter.discard(page["pagename"])
+    await invalidate_public_page(page["pagename"])
     
-    # Delete related feedback and notifications
-    await db.feedback.delete_many({"page_id": page_id})
-    await db.notifications.delete_many({"page_id": page_id})
+    # Related feedback and notifications are deleted after responding; shutdown drains the job
+    scheduler.submit("delete_page_dependents", delete_page_dependents([page_id]))
     
     return {"message": "Page deleted successfully"}
 
+# Bulk page operations: one lookup and batched bulk_writes, with a result per page
+PAGE_BULK_PROJECTION = {"_id": 0, "id": 1, "user_id": 1, "pagename": 1, "title": 1}
+
+def bulk_response(results: List[dict]) -> dict:
+    succeeded = sum(1 for result in results if result["status"] == BULK_OK)
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+async def bulk_set_pages(page_ids: List[str], scope: dict, fields: dict):
+    results, pages = await bulk_update_pages(
+        db.pages, page_ids, scope, {"$set": {**fields, "updated_at": datetime.utcnow()}},
+        PAGE_BULK_PROJECTION, settings.BULK_WRITE_BATCH_SIZE
+    )
+    await invalidate_public_pages([page["pagename"] for page in pages])
+    return results, pages
+
+async def bulk_delete(page_ids: List[str], scope: dict) -> dict:
+    results, pages = await bulk_delete_pages(
+        db.pages, page_ids, scope, PAGE_BULK_PROJECTION, settings.BULK_WRITE_BATCH_SIZE
+    )
+    for page in pages:
+        view_counter.discard(page["pagename"])
+    await invalidate_public_pages([page["pagename"] for page in pages])
+    scheduler.submit("delete_page_dependents", delete_page_dependents([page["id"] for page in pages]))
+    return bulk_response(results)
+
+@api_router.post("/pages/bulk/maintenance")
+async def bulk_set_own_maintenance(data: BulkMaintenancePages, current_user: User = Depends(get_current_user)):
+    results, _ = await bulk_set_pages(data.page_ids, {"user_id": current_user.id}, {"is_maintenance": data.is_maintenance})
+    return bulk_response(results)
+
+@api_router.post("/pages/bulk/delete")
+async def bulk_delete_own_pages(data: BulkPages, current_user: User = Depends(get_current_user)):
+    return await bulk_delete(data.page_ids, {"user_id": current_user.id})
+
 # Public Page Routes
-@api_router.get("/public/page/{pagename}")
-async def get_public_page(pagename: str):
-    page = await db.pages.find_one({"pagename": pagename})
+PUBLIC_PAGE_CACHE_CONTROL = cache_control(settings.PUBLIC_PAGE_MAX_AGE_SECONDS, settings.PUBLIC_PAGE_STALE_WHILE_REVALIDATE_SECONDS)
+# Internal nginx location aliased to SSR_CACHE_DIR
+SSR_ACCEL_PREFIX = "/_rendered/"
+
+async def load_public_page(pagename: str) -> dict:
+    # Cached until the next invalidation, so filled from the primary: a lagging
+    # secondary could hand back the document from before the edit that invalidated it
+    page = await page_cache.get_or_load(
+        pagename, lambda: primary_db.pages.find_one({"pagename": pagename}, {"_id": 0})
+    )
     if not page:
         raise HTTPException(status_code=404, detail="Page not found")
+    return page
+
+@api_router.get("/public/page/{pagename}")
+async def get_public_page(pagename: str, request: Request):
+    # Cacheable by browsers and CDNs; views are counted through the /view endpoint
+    page = await load_public_page(pagename)
+    etag = make_etag(page["id"], page["updated_at"])
+    headers = validator_headers(etag, page["updated_at"], PUBLIC_PAGE_CACHE_CONTROL)
+    if is_not_modified(request.headers, etag, page["updated_at"]):
+        return Response(status_code=304, headers=headers)
     
-    # Increment view count
-    await db.pages.update_one(
-        {"pagename": pagename}, 
-        {"$inc": {"view_count": 1}}
-    )
-    
-    # Get updated page
-    updated_page = await db.pages.find_one({"pagename": pagename})
-    return Page(**updated_page)
+    body = {field: page.get(field, default) for field, default in PUBLIC_PAGE_FIELDS.items()}
+    return ORJSONResponse(body, headers=headers)
+
+@api_router.post("/public/page/{pagename}/view", dependencies=[rate_limit_by_ip("page_view")])
+async def record_public_page_view(pagename: str):
+    page = await load_public_page(pagename)
+    # Buffer the view and serve the stored count plus the unflushed delta
+    view_count = page.get("view_count", 0) + view_counter.increment(pagename)
+    return ORJSONResponse({"view_count": view_count}, headers={"Cache-Control": "no-store"})
+
+async def render_public_page(pagename: str) -> Optional[str]:
+    # Rendered HTML is kept until the next invalidation, so it is built from
+    # the primary rather than a cached or secondary copy that may lag
+    page = await primary_db.pages.find_one({"pagename": pagename}, {"_id": 0})
+    if not page:
+        return None
+    feedback = await primary_db.feedback.find({"page_id": page["id"]}, FEEDBACK_SHAPE.projection).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(settings.SSR_FEEDBACK_LIMIT).to_list(settings.SSR_FEEDBACK_LIMIT)
+    return render_page_html(page, feedback)
+
+@api_router.get("/public/render/{pagename}", response_class=HTMLResponse)
+async def get_rendered_public_page(pagename: str, request: Request):
+    headers = {"Cache-Control": PUBLIC_PAGE_CACHE_CONTROL}
+    # The file can be invalidated between rendering and opening it; render again then
+    for _ in range(3):
+        path = await rendered_pages.get_or_render(pagename, lambda: render_public_page(pagename))
+        if path is None:
+            return HTMLResponse("<h1>Page not found</h1>", status_code=404)
+        if request.headers.get("x-sendfile-type") == "X-Accel-Redirect":
+            # nginx sends the file itself with sendfile(); see nginx.conf
+            relative = path.relative_to(settings.SSR_CACHE_DIR).as_posix()
+            return Response(media_type="text/html; charset=utf-8", headers={
+                **headers, "X-Accel-Redirect": f"{SSR_ACCEL_PREFIX}{relative}",
+            })
+        try:
+            stat_result = os.stat(path)
+        except FileNotFoundError:
+            continue
+        return FileResponse(path, media_type="text/html; charset=utf-8", stat_result=stat_result, headers=headers)
+    raise HTTPException(status_code=503, detail="Page is being updated, try again")
+
+@api_router.get("/public/trending")
+async def get_trending_pages(limit: int = Query(settings.TRENDING_SIZE, ge=1, le=settings.TRENDING_SIZE)):
+    return ORJSONResponse({"items": trending.trending[:limit], "generated_at": trending.generated_at})
+
+@api_router.get("/public/top")
+async def get_top_pages(limit: int = Query(settings.TRENDING_SIZE, ge=1, le=settings.TRENDING_SIZE)):
+    return ORJSONResponse({"items": trending.top[:limit], "generated_at": trending.generated_at})
+
+@api_router.get("/public/search")
+async def search_public_pages(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=settings.LIST_MAX_PAGE_SIZE)
+):
+    try:
+        results, next_cursor = await search_index.search(
+            q, limit, cursor,
+            max_results=settings.SEARCH_MAX_RESULTS,
+            snippet_length=settings.SEARCH_SNIPPET_LENGTH,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return list_response(results, next_cursor)
 
 # Feedback Routes
-@api_router.post("/feedback")
+@api_router.post("/feedback", dependencies=[rate_limit_by_user("feedback")])
 async def submit_feedback(feedback_data: FeedbackCreate, current_user: User = Depends(get_current_user)):
     page = await db.pages.find_one({"id": feedback_data.page_id})
     if not page:
@@ -329,41 +810,165 @@ async def submit_feedback(feedback_data: FeedbackCreate, current_user: User = De
         user_id=page["user_id"],
         type="feedback",
         title="New Feedback Received",
-        message=f"{current_user.username} left feedback on your page '{page['title']}'"
+        message=f"{current_user.username} left feedback on your page '{page['title']}'",
+        page_id=page["id"]
     )
     
-    await db.notifications.insert_one(notification.dict())
+    await notification_dispatcher.enqueue(notification.dict())
+    # The rendered HTML embeds recent feedback; broadcasting its invalidation is another write
+    scheduler.submit("invalidate_rendered_page", invalidate_rendered_page(page["pagename"]))
     
     return feedback
 
 @api_router.get("/feedback/{page_id}")
-async def get_page_feedback(page_id: str):
-    feedback_list = await db.feedback.find({"page_id": page_id}).to_list(1000)
-    return [Feedback(**feedback) for feedback in feedback_list]
+async def get_page_feedback(
+    page_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE)
+):
+    feedback_list, next_cursor = await paginate(secondary_db.feedback, {"page_id": page_id}, limit, cursor, projection=FEEDBACK_SHAPE.projection)
+    return list_response(FEEDBACK_SHAPE.dump(feedback_list), next_cursor)
+
+@api_router.get("/feedback/{page_id}/archive")
+async def get_archived_page_feedback(
+    page_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE)
+):
+    feedback_list, next_cursor = await paginate(secondary_db.feedback_archive, {"page_id": page_id}, limit, cursor, projection=FEEDBACK_SHAPE.projection)
+    return list_response(FEEDBACK_SHAPE.dump(feedback_list), next_cursor)
 
 # Notification Routes
 @api_router.get("/notifications")
-async def get_notifications(current_user: User = Depends(get_current_user)):
-    notifications = await db.notifications.find({"user_id": current_user.id}).sort("created_at", -1).to_list(1000)
-    return [Notification(**notification) for notification in notifications]
+async def get_notifications(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user)
+):
+    notifications, next_cursor = await paginate(db.notifications, {"user_id": current_user.id}, limit, cursor, projection=NOTIFICATION_SHAPE.projection)
+    return list_response(NOTIFICATION_SHAPE.dump(notifications), next_cursor)
+
+@api_router.get("/notifications/archive")
+async def get_archived_notifications(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user)
+):
+    notifications, next_cursor = await paginate(secondary_db.notifications_archive, {"user_id": current_user.id}, limit, cursor, projection=NOTIFICATION_SHAPE.projection)
+    return list_response(NOTIFICATION_SHAPE.dump(notifications), next_cursor)
 
 @api_router.put("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str, current_user: User = Depends(get_current_user)):
     result = await db.notifications.update_one(
-        {"id": notification_id, "user_id": current_user.id},
-        {"$set": {"is_read": True}}
+        {"id": notification_id, "user_id": current_user.id, "is_read": False},
+        # read_at starts the retention clock (NOTIFICATION_READ_TTL_DAYS)
+        {"$set": {"is_read": True, "read_at": datetime.utcnow()}}
     )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Notification not found")
+    
+    count = await unread_counters.decrement(current_user.id)
+    await publish_notification_event(current_user.id, "unread_count", {"unread_count": count})
     return {"message": "Notification marked as read"}
 
+@api_router.put("/notifications/read-all")
+async def mark_all_notifications_read(current_user: User = Depends(get_current_user)):
+    result = await db.notifications.update_many(
+        {"user_id": current_user.id, "is_read": False},
+        {"$set": {"is_read": True, "read_at": datetime.utcnow()}}
+    )
+    if result.modified_count:
+        count = await unread_counters.decrement(current_user.id, result.modified_count)
+        await publish_notification_event(current_user.id, "unread_count", {"unread_count": count})
+    return {"message": "All notifications marked as read", "marked_read": result.modified_count}
+
 @api_router.get("/notifications/unread-count")
 async def get_unread_count(current_user: User = Depends(get_current_user)):
-    count = await db.notifications.count_documents({"user_id": current_user.id, "is_read": False})
+    count = await unread_counters.get(current_user.id)
     return {"unread_count": count}
 
+@api_router.post("/notifications/stream-ticket")
+async def create_stream_ticket(current_user: User = Depends(get_current_user)):
+    ticket = await stream_tickets.issue(current_user.id)
+    return {"ticket": ticket, "expires_in": settings.NOTIFICATION_STREAM_TICKET_SECONDS}
+
+@api_router.get("/notifications/stream")
+async def stream_notifications(ticket: str):
+    # EventSource cannot send an Authorization header, so a single-use ticket comes in the query string
+    user_id = await stream_tickets.redeem(ticket)
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired stream ticket")
+    # Connect before counting, so a notification published meanwhile is streamed rather than lost
+    queue = notification_hub.connect(user_id)
+    try:
+        count = await unread_counters.get(user_id)
+    except Exception:
+        notification_hub.disconnect(user_id, queue)
+        raise
+    # Notifications are published after their counter update, so the count includes the
+    # events queued so far and follows them, replacing the increments they caused
+    notification_hub.send(queue, "unread_count", {"unread_count": count})
+    return StreamingResponse(
+        notification_hub.stream(user_id, queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Export Routes
+EXPORT_FORMAT = Query("ndjson", alias="format", pattern="^(ndjson|csv)$")
+
+@api_router.get("/export/pages")
+async def export_user_pages(
+    export_format: str = EXPORT_FORMAT,
+    after: Optional[str] = None,
+    suspended: Optional[bool] = None,
+    maintenance: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    query = {"user_id": current_user.id, **page_filters(suspended, maintenance)}
+    created_range(query, created_after, created_before)
+    return await export_response(db.pages, query, PAGE_SHAPE, export_format, after, "pages")
+
+@api_router.get("/export/feedback")
+async def export_user_feedback(
+    export_format: str = EXPORT_FORMAT,
+    after: Optional[str] = None,
+    page_id: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    # Feedback left on the user's own pages
+    page_query = {"user_id": current_user.id}
+    if page_id:
+        page_query["id"] = page_id
+    page_ids = await db.pages.distinct("id", page_query)
+    
+    query = created_range({"page_id": {"$in": page_ids}}, created_after, created_before)
+    return await export_response(db.feedback, query, FEEDBACK_SHAPE, export_format, after, "feedback")
+
+@api_router.get("/export/notifications")
+async def export_user_notifications(
+    export_format: str = EXPORT_FORMAT,
+    after: Optional[str] = None,
+    is_read: Optional[bool] = None,
+    type: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    query = {"user_id": current_user.id}
+    if is_read is not None:
+        query["is_read"] = is_read
+    if type:
+        query["type"] = type
+    created_range(query, created_after, created_before)
+    return await export_response(db.notifications, query, NOTIFICATION_SHAPE, export_format, after, "notifications")
+
 # Owner Admin Routes
-@api_router.post("/owner/login")
+@api_router.post("/owner/login", dependencies=[rate_limit_by_ip("login")])
 async def owner_login(login_data: OwnerLogin):
     if login_data.password != OWNER_PASSWORD:
         raise HTTPException(status_code=401, detail="Invalid owner password")
@@ -377,8 +982,7 @@ async def owner_login(login_data: OwnerLogin):
 
 async def verify_owner(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(credentials.credentials)
         role = payload.get("role")
         if role != "owner":
             raise HTTPException(status_code=403, detail="Owner access required")
@@ -387,56 +991,228 @@ async def verify_owner(credentials: HTTPAuthorizationCredentials = Depends(secur
         raise HTTPException(status_code=401, detail="Invalid token")
 
 @api_router.get("/owner/pages")
-async def get_all_pages(owner: bool = Depends(verify_owner)):
-    pages = await db.pages.find().to_list(1000)
-    result = []
-    for page in pages:
-        user = await db.users.find_one({"id": page["user_id"]})
-        page_data = Page(**page)
-        result.append({
-            **page_data.dict(),
-            "username": user["username"] if user else "Unknown"
-        })
-    return result
+async def get_all_pages(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1, le=settings.LIST_MAX_PAGE_SIZE),
+    sort: str = Query("created_at", pattern="^(created_at|view_count)$"),
+    suspended: Optional[bool] = None,
+    maintenance: Optional[bool] = None,
+    owner: bool = Depends(verify_owner)
+):
+    query = page_filters(suspended, maintenance)
+    pages, next_cursor = await paginate(secondary_db.pages, query, limit, cursor, sort_field=sort, projection=PAGE_SHAPE.projection)
+    
+    # Attach usernames with one batched lookup instead of one query per page
+    user_ids = list({page["user_id"] for page in pages})
+    users = await secondary_db.users.find(
+        {"id": {"$in": user_ids}}, {"_id": 0, "id": 1, "username": 1}
+    ).to_list(len(user_ids))
+    usernames = {user["id"]: user["username"] for user in users}
+    
+    items = PAGE_SHAPE.dump(pages)
+    for item in items:
+        item["username"] = usernames.get(item["user_id"], "Unknown")
+    return list_response(items, next_cursor)
+
+@api_router.get("/owner/export/pages")
+async def export_all_pages(
+    export_format: str = EXPORT_FORMAT,
+    after: Optional[str] = None,
+    user_id: Optional[str] = None,
+    suspended: Optional[bool] = None,
+    maintenance: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    owner: bool = Depends(verify_owner)
+):
+    query = page_filters(suspended, maintenance)
+    if user_id:
+        query["user_id"] = user_id
+    created_range(query, created_after, created_before)
+    return await export_response(db.pages, query, PAGE_SHAPE, export_format, after, "pages")
+
+@api_router.get("/owner/export/feedback")
+async def export_all_feedback(
+    export_format: str = EXPORT_FORMAT,
+    after: Optional[str] = None,
+    page_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    owner: bool = Depends(verify_owner)
+):
+    query = {}
+    if page_id:
+        query["page_id"] = page_id
+    if user_id:
+        query["user_id"] = user_id
+    created_range(query, created_after, created_before)
+    return await export_response(db.feedback, query, FEEDBACK_SHAPE, export_format, after, "feedback")
+
+@api_router.get("/owner/export/notifications")
+async def export_all_notifications(
+    export_format: str = EXPORT_FORMAT,
+    after: Optional[str] = None,
+    user_id: Optional[str] = None,
+    is_read: Optional[bool] = None,
+    type: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    owner: bool = Depends(verify_owner)
+):
+    query = {}
+    if user_id:
+        query["user_id"] = user_id
+    if is_read is not None:
+        query["is_read"] = is_read
+    if type:
+        query["type"] = type
+    created_range(query, created_after, created_before)
+    return await export_response(db.notifications, query, NOTIFICATION_SHAPE, export_format, after, "notifications")
 
 @api_router.post("/owner/suspend")
 async def suspend_page(suspend_data: SuspendPage, owner: bool = Depends(verify_owner)):
-    page = await db.pages.find_one({"id": suspend_data.page_id})
-    if not page:
-        raise HTTPException(status_code=404, detail="Page not found")
-    
-    # Suspend the page
-    await db.pages.update_one(
+    page = await db.pages.find_one_and_update(
         {"id": suspend_data.page_id},
-        {"$set": {"is_suspended": True, "suspension_reason": suspend_data.reason}}
+        {"$set": {"is_suspended": True, "suspension_reason": suspend_data.reason, "updated_at": datetime.utcnow()}},
+        projection={"id": 1, "user_id": 1, "pagename": 1, "title": 1}
     )
+    if not page:
+        raise HTTPException(status_code=404, detail="Page not found")
+    await invalidate_public_page(page["pagename"])
     
     # Send notification to page owner
     notification = Notification(
         user_id=page["user_id"],
         type="suspension",
         title="Page Suspended",
-        message=f"Your page '{page['title']}' has been suspended. Reason: {suspend_data.reason}"
+        message=f"Your page '{page['title']}' has been suspended. Reason: {suspend_data.reason}",
+        page_id=page["id"]
     )
     
-    await db.notifications.insert_one(notification.dict())
+    await notification_dispatcher.enqueue(notification.dict())
     
     return {"message": "Page suspended successfully"}
 
 @api_router.post("/owner/unsuspend/{page_id}")
 async def unsuspend_page(page_id: str, owner: bool = Depends(verify_owner)):
-    result = await db.pages.update_one(
+    page = await db.pages.find_one_and_update(
         {"id": page_id},
-        {"$set": {"is_suspended": False, "suspension_reason": None}}
+        {"$set": {"is_suspended": False, "suspension_reason": None, "updated_at": datetime.utcnow()}},
+        projection={"pagename": 1}
     )
-    if result.modified_count == 0:
+    if not page:
         raise HTTPException(status_code=404, detail="Page not found")
+    await invalidate_public_page(page["pagename"])
     
     return {"message": "Page unsuspended successfully"}
 
+@api_router.post("/owner/pages/bulk/suspend")
+async def bulk_suspend_pages(data: BulkSuspendPages, owner: bool = Depends(verify_owner)):
+    results, pages = await bulk_set_pages(
+        data.page_ids, {}, {"is_suspended": True, "suspension_reason": data.reason}
+    )
+    # All owners are notified with one insert_many
+    await notification_dispatcher.deliver_many([
+        Notification(
+            user_id=page["user_id"],
+            type="suspension",
+            title="Page Suspended",
+            message=f"Your page '{page['title']}' has been suspended. Reason: {data.reason}",
+            page_id=page["id"]
+        ).dict()
+        for page in pages
+    ])
+    return bulk_response(results)
+
+@api_router.post("/owner/pages/bulk/unsuspend")
+async def bulk_unsuspend_pages(data: BulkPages, owner: bool = Depends(verify_owner)):
+    results, _ = await bulk_set_pages(data.page_ids, {}, {"is_suspended": False, "suspension_reason": None})
+    return bulk_response(results)
+
+@api_router.post("/owner/pages/bulk/maintenance")
+async def bulk_set_maintenance(data: BulkMaintenancePages, owner: bool = Depends(verify_owner)):
+    results, _ = await bulk_set_pages(data.page_ids, {}, {"is_maintenance": data.is_maintenance})
+    return bulk_response(results)
+
+@api_router.post("/owner/pages/bulk/delete")
+async def bulk_delete_any_pages(data: BulkPages, owner: bool = Depends(verify_owner)):
+    return await bulk_delete(data.page_ids, {})
+
+@api_router.get("/owner/stats/views")
+async def get_view_counter_stats(owner: bool = Depends(verify_owner)):
+    return view_counter.stats()
+
+@api_router.get("/owner/stats/page-cache")
+async def get_page_cache_stats(owner: bool = Depends(verify_owner)):
+    return {**page_cache.stats(), "broadcast": broadcast.stats()}
+
+@api_router.get("/owner/stats/rendered-pages")
+async def get_rendered_page_stats(owner: bool = Depends(verify_owner)):
+    return rendered_pages.stats()
+
+@api_router.get("/owner/stats/rate-limits")
+async def get_rate_limit_stats(owner: bool = Depends(verify_owner)):
+    return {**rate_limiter.stats(), "admission": admission.stats()}
+
+@api_router.get("/owner/stats/trending")
+async def get_trending_stats(owner: bool = Depends(verify_owner)):
+    return trending.stats()
+
+@api_router.get("/owner/stats/auth-cache")
+async def get_auth_cache_stats(owner: bool = Depends(verify_owner)):
+    return auth_cache.stats()
+
+@api_router.get("/owner/stats/notification-streams")
+async def get_notification_stream_stats(owner: bool = Depends(verify_owner)):
+    return {**notification_hub.stats(), "tickets": stream_tickets.stats()}
+
+@api_router.get("/owner/stats/unread-counters")
+async def get_unread_counter_stats(owner: bool = Depends(verify_owner)):
+    return unread_counters.stats()
+
+@api_router.get("/owner/stats/scheduler")
+async def get_scheduler_stats(owner: bool = Depends(verify_owner)):
+    return scheduler.stats()
+
+@api_router.get("/owner/stats/retention")
+async def get_retention_stats(owner: bool = Depends(verify_owner)):
+    return {
+        "notification_read_ttl_days": settings.NOTIFICATION_READ_TTL_DAYS,
+        "archives": [notification_archiver.stats(), feedback_archiver.stats()],
+    }
+
+@api_router.get("/owner/stats/search")
+async def get_search_stats(owner: bool = Depends(verify_owner)):
+    return search_index.stats()
+
+@api_router.get("/owner/stats/notification-dispatch")
+async def get_notification_dispatch_stats(owner: bool = Depends(verify_owner)):
+    return notification_dispatcher.stats()
+
+@api_router.post("/owner/maintenance/reconcile-unread")
+async def reconcile_unread_counters(owner: bool = Depends(verify_owner)):
+    corrected = await unread_counters.reconcile()
+    return {"message": "Unread counters reconciled", "corrected": corrected}
+
+@api_router.post("/owner/maintenance/rebuild-search-index")
+async def rebuild_search_index(owner: bool = Depends(verify_owner)):
+    # Takes minutes on large collections, so it runs as a background job
+    scheduler.submit("search_rebuild", search_index.rebuild())
+    return {"message": "Search index rebuild started"}
+
 # Include the router in the main app
 app.include_router(api_router)
 
+# Inside CORS, so refusals still carry the CORS headers browsers need to read them
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    exempt_paths=["/api/", "/metrics"],
+    # Long-lived streams would hold a slot for their whole duration
+    exempt_prefixes=["/api/notifications/stream", "/api/export/", "/api/owner/export/"],
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -445,6 +1221,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    # Outermost, so CORS and error handling are included in request timings
+    app.add_middleware(MetricsMiddleware, metrics=app_metrics)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        return PlainTextResponse(app_metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -452,6 +1236,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def start_background_tasks():
+    if settings.ENSURE_INDEXES_ON_STARTUP:
+        try:
+            await ensure_indexes(db)
+        except Exception:
+            logger.exception("Failed to ensure database indexes")
+    try:
+        read_ttl = settings.NOTIFICATION_READ_TTL_DAYS
+        await ensure_ttl_index(db.notifications, "read_at", int(read_ttl * 86400) if read_ttl > 0 else None)
+    except PyMongoError:
+        logger.exception("Failed to ensure the read notification TTL index")
+    broadcast.subscribe(PAGE_CACHE_CHANNEL, invalidate_page_caches)
+    broadcast.subscribe(PAGE_HTML_CHANNEL, invalidate_rendered_html)
+    broadcast.subscribe(NOTIFICATION_CHANNEL, notification_hub.dispatch)
+    await broadcast.start()
+    await rate_limiter.start()
+    admission.start()
+    await trending.start()
+    notification_dispatcher.start()
+    await scheduler.start()
+    if settings.METRICS_ENABLED:
+        app_metrics.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    # Running jobs finish first; the components below then write out what they buffered
+    await scheduler.stop()
+    await notification_dispatcher.stop()
+    await view_counter.stop()
+    await trending.stop()
+    await broadcast.stop()
+    await admission.stop()
+    if settings.METRICS_ENABLED:
+        await app_metrics.stop()
+    password_hasher.shutdown()
+    mongo.close()
@@ -0,0 +1,55 @@
+"""Coalescing of concurrent calls for the same key"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; callers arriving meanwhile share its outcome.
+
+    The call runs in the task of the caller that started it. If that caller
+    is cancelled, so is the call, and a caller that was waiting on it runs
+    it again instead of failing with it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.shared = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._calls))
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the outcome of ``call()``, or of the call already running for ``key``"""
+        pending = self._calls.get(key)
+        if pending is not None:
+            self.shared += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # Cancelled with the caller that started it, not with us
+                return await self.run(key, call)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Retrieve it here so asyncio does not log it when no caller was waiting
+            future.exception()
+            raise
+        finally:
+            self._calls.pop(key, None)
+        future.set_result(result)
+        return result
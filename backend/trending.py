@@ -0,0 +1,154 @@
+"""Trending and top pages rankings from hourly view buckets"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from indexes import ensure_ttl_index
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_PAGE = {"is_suspended": {"$ne": True}, "is_maintenance": {"$ne": True}}
+RANKING_FIELDS = {"_id": 0, "pagename": 1, "title": 1, "short_description": 1, "view_count": 1}
+
+
+def _hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class TrendingTracker:
+    """Keeps per-page hourly view buckets and precomputed top-N rankings.
+
+    Views flushed by the view counter are added to ``{pagename, hour,
+    views}`` documents (expired by a TTL index after ``window_hours``).
+    Every ``refresh_interval`` seconds a scheduler job calls ``refresh``,
+    which sums the buckets per page with an exponential decay of
+    ``half_life_hours``, so a view an hour ago counts more than one
+    yesterday, and the best ``size`` public pages become the trending
+    snapshot. The all-time top pages by ``view_count``
+    are refreshed alongside. Requests only ever read the snapshots.
+    """
+
+    def __init__(
+        self,
+        buckets,
+        pages,
+        window_hours: int = 48,
+        half_life_hours: float = 6.0,
+        size: int = 50,
+        refresh_interval: float = 60.0,
+    ):
+        self._buckets = buckets
+        self._pages = pages
+        self.window_hours = window_hours
+        self.half_life_hours = half_life_hours
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self._pending: Dict[Tuple[str, datetime], int] = {}
+        self.trending: List[Dict[str, Any]] = []
+        self.top: List[Dict[str, Any]] = []
+        self.generated_at: Optional[datetime] = None
+
+        # Counters
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.bucket_writes = 0
+
+    def record(self, counts: Dict[str, int]) -> None:
+        """Add flushed ``{pagename: views}`` to the current hour's buckets"""
+        hour = _hour(datetime.utcnow())
+        for pagename, views in counts.items():
+            key = (pagename, hour)
+            self._pending[key] = self._pending.get(key, 0) + views
+
+    async def flush(self) -> int:
+        """Write buffered bucket increments and return how many buckets were updated"""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        try:
+            await self._buckets.bulk_write([
+                UpdateOne({"hour": hour, "pagename": pagename}, {"$inc": {"views": views}}, upsert=True)
+                for (pagename, hour), views in batch.items()
+            ], ordered=False)
+        except PyMongoError:
+            for key, views in batch.items():
+                self._pending[key] = self._pending.get(key, 0) + views
+            raise
+        self.bucket_writes += len(batch)
+        return len(batch)
+
+    async def _rank_trending(self, now: datetime) -> List[Dict[str, Any]]:
+        half_life_ms = self.half_life_hours * 3600 * 1000
+        scores = await self._buckets.aggregate([
+            {"$match": {"hour": {"$gte": now - timedelta(hours=self.window_hours)}}},
+            {"$group": {
+                "_id": "$pagename",
+                "views": {"$sum": "$views"},
+                "score": {"$sum": {"$multiply": [
+                    "$views",
+                    {"$pow": [0.5, {"$divide": [{"$subtract": [now, "$hour"]}, half_life_ms]}]},
+                ]}},
+            }},
+            {"$sort": {"score": -1}},
+            # Leave room for pages that turn out to be suspended or gone
+            {"$limit": self.size * 2},
+        ]).to_list(self.size * 2)
+        if not scores:
+            return []
+
+        pages = await self._pages.find(
+            {"pagename": {"$in": [row["_id"] for row in scores]}, **PUBLIC_PAGE}, RANKING_FIELDS
+        ).to_list(len(scores))
+        by_name = {page["pagename"]: page for page in pages}
+        ranking = []
+        for row in scores:
+            page = by_name.get(row["_id"])
+            if page is None:
+                continue
+            ranking.append({**page, "recent_views": row["views"], "score": round(row["score"], 3)})
+            if len(ranking) == self.size:
+                break
+        return ranking
+
+    async def refresh(self) -> None:
+        """Flush buffered buckets and recompute both rankings"""
+        try:
+            await self.flush()
+            now = datetime.utcnow()
+            self.trending = await self._rank_trending(now)
+            self.top = await self._pages.find(PUBLIC_PAGE, RANKING_FIELDS).sort(
+                [("view_count", -1), ("id", -1)]
+            ).limit(self.size).to_list(self.size)
+        except Exception:
+            self.refresh_errors += 1
+            raise
+        self.generated_at = now
+        self.refreshes += 1
+
+    async def start(self) -> None:
+        """Ensure the bucket TTL index"""
+        try:
+            await ensure_ttl_index(self._buckets, "hour", (self.window_hours + 1) * 3600)
+        except PyMongoError:
+            logger.exception("Failed to ensure trending bucket TTL index")
+
+    async def stop(self) -> None:
+        """Write out buffered buckets"""
+        try:
+            await self.flush()
+        except PyMongoError:
+            logger.exception("Failed to flush trending buckets on shutdown")
+
+    def stats(self) -> dict:
+        """Get refresh counters"""
+        return {
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "bucket_writes": self.bucket_writes,
+            "buckets_pending": len(self._pending),
+            "trending": len(self.trending),
+            "generated_at": self.generated_at,
+        }
@@ -0,0 +1,116 @@
+"""Write-behind view counter for public pages"""
+import asyncio
+import logging
+from typing import Callable, Dict, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Buffers page view increments in memory and flushes them in batches.
+
+    Every public page view used to cost one ``$inc`` round trip. Views are
+    now accumulated per page key (``key_field``) and written with a single
+    unordered ``bulk_write`` at most every ``flush_interval`` seconds, or
+    sooner once ``max_pending`` views are buffered (``flush_wanted`` is
+    set), by a scheduler job calling ``flush``. ``on_flush`` is called
+    with the ``{key: views}`` batch that was written.
+    """
+
+    def __init__(
+        self,
+        collection,
+        flush_interval: float = 5.0,
+        max_pending: int = 10000,
+        key_field: str = "id",
+        on_flush: Optional[Callable[[Dict[str, int]], None]] = None,
+    ):
+        self._collection = collection
+        self.key_field = key_field
+        self.on_flush = on_flush
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[str, int] = {}
+        self._pending_total = 0
+        self._flush_lock = asyncio.Lock()
+        self.flush_wanted = asyncio.Event()
+
+        # Counters
+        self.views_recorded = 0
+        self.views_flushed = 0
+        self.writes_issued = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """Record views for a page and return its buffered (unflushed) delta"""
+        delta = self._pending.get(key, 0) + amount
+        self._pending[key] = delta
+        self._pending_total += amount
+        self.views_recorded += amount
+        if self._pending_total >= self.max_pending:
+            self.flush_wanted.set()
+        return delta
+
+    def pending(self, key: str) -> int:
+        """Get the buffered view delta for a page"""
+        return self._pending.get(key, 0)
+
+    def discard(self, key: str) -> None:
+        """Drop buffered views for a page, e.g. after it was deleted"""
+        self._pending_total -= self._pending.pop(key, 0)
+
+    async def flush(self) -> int:
+        """Write all buffered increments to Mongo and return the number of pages updated"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            batch_total, self._pending_total = self._pending_total, 0
+            self.flush_wanted.clear()
+
+            operations = [
+                UpdateOne({self.key_field: key}, {"$inc": {"view_count": count}})
+                for key, count in batch.items()
+            ]
+            try:
+                await self._collection.bulk_write(operations, ordered=False)
+            except Exception:
+                # Put the batch back so the views are retried on the next flush
+                self.flush_errors += 1
+                for key, count in batch.items():
+                    self._pending[key] = self._pending.get(key, 0) + count
+                self._pending_total += batch_total
+                logger.exception("Failed to flush %d buffered page views", batch_total)
+                return 0
+
+            self.flushes += 1
+            self.writes_issued += 1
+            self.views_flushed += batch_total
+            if self.on_flush is not None:
+                self.on_flush(batch)
+            return len(operations)
+
+    async def stop(self) -> None:
+        """Write out anything still buffered"""
+        await self.flush()
+
+    def stats(self) -> dict:
+        """Get counters describing how many writes the buffer saved"""
+        return {
+            "views_recorded": self.views_recorded,
+            "views_flushed": self.views_flushed,
+            "views_pending": self._pending_total,
+            "pages_pending": len(self._pending),
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "writes_issued": self.writes_issued,
+            "writes_saved": max(self.views_flushed - self.writes_issued, 0),
+            "write_amplification_saved": (
+                round(self.views_flushed / self.writes_issued, 2) if self.writes_issued else 0.0
+            ),
+            "flush_interval_seconds": self.flush_interval,
+        }
@@ -135,7 +135,7 @@ class NotezFunAPITester:
             "pages",
             200
         )
-        return success and isinstance(response, list)
+        return success and isinstance(response.get('items'), list)
 
     def test_get_page(self):
         """Test getting a specific page"""
@@ -219,7 +219,7 @@ class NotezFunAPITester:
             200,
             token=None  # Public endpoint
         )
-        return success and isinstance(response, list)
+        return success and isinstance(response.get('items'), list)
 
     def test_get_notifications(self):
         """Test getting user notifications"""
@@ -229,7 +229,7 @@ class NotezFunAPITester:
             "notifications",
             200
         )
-        return success and isinstance(response, list)
+        return success and isinstance(response.get('items'), list)
 
     def test_get_unread_count(self):
         """Test getting unread notification count"""
@@ -274,7 +274,7 @@ class NotezFunAPITester:
             200,
             owner=True
         )
-        return success and isinstance(response, list)
+        return success and isinstance(response.get('items'), list)
 
     def test_suspend_page(self, reason):
         """Test suspending a page as owner"""
@@ -393,7 +393,8 @@ def main():
     tester.test_get_unread_count()
     
     # Get notifications to find one to mark as read
-    _, notifications = tester.run_test("Get Notifications for ID", "GET", "notifications", 200)
+    _, response = tester.run_test("Get Notifications for ID", "GET", "notifications", 200)
+    notifications = response.get('items', [])
     if notifications and len(notifications) > 0:
         notification_id = notifications[0]['id']
         tester.test_mark_notification_read(notification_id)
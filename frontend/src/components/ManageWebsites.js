@@ -5,18 +5,23 @@ import axios from 'axios';
 const ManageWebsites = () => {
   const { backendUrl } = useAuth();
   const [pages, setPages] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [editingPage, setEditingPage] = useState(null);
   const [editFormData, setEditFormData] = useState({});
+  const [selectedIds, setSelectedIds] = useState([]);
 
   useEffect(() => {
     fetchPages();
   }, []);
 
-  const fetchPages = async () => {
+  const fetchPages = async (cursor = null) => {
     try {
-      const response = await axios.get(`${backendUrl}/api/pages`);
-      setPages(response.data);
+      const response = await axios.get(`${backendUrl}/api/pages`, {
+        params: cursor ? { cursor } : {}
+      });
+      setPages(cursor ? (prev) => [...prev, ...response.data.items] : response.data.items);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error fetching pages:', error);
     } finally {
@@ -60,6 +65,38 @@ const ManageWebsites = () => {
     }
   };
 
+  const toggleSelected = (pageId) => {
+    setSelectedIds((prev) =>
+      prev.includes(pageId) ? prev.filter((id) => id !== pageId) : [...prev, pageId]
+    );
+  };
+
+  const toggleSelectAll = () => {
+    setSelectedIds(selectedIds.length === pages.length ? [] : pages.map((page) => page.id));
+  };
+
+  const runBulkAction = async (action, payload = {}) => {
+    try {
+      const response = await axios.post(`${backendUrl}/api/pages/bulk/${action}`, {
+        page_ids: selectedIds,
+        ...payload
+      });
+      if (response.data.failed > 0) {
+        alert(`${response.data.failed} of ${selectedIds.length} pages could not be updated`);
+      }
+      setSelectedIds([]);
+      fetchPages();
+    } catch (error) {
+      alert('Error updating the selected pages');
+    }
+  };
+
+  const handleBulkDelete = () => {
+    if (window.confirm(`Are you sure you want to delete ${selectedIds.length} pages? This action cannot be undone.`)) {
+      runBulkAction('delete');
+    }
+  };
+
   const toggleMaintenance = async (pageId, currentStatus) => {
     try {
       await axios.put(`${backendUrl}/api/pages/${pageId}`, {
@@ -93,6 +130,36 @@ const ManageWebsites = () => {
         </div>
       ) : (
         <div className="space-y-6">
+          <div className="flex flex-wrap items-center gap-2">
+            <label className="flex items-center text-sm text-gray-700 mr-2">
+              <input
+                type="checkbox"
+                checked={selectedIds.length === pages.length}
+                onChange={toggleSelectAll}
+                className="h-4 w-4 text-purple-600 focus:ring-purple-500 border-gray-300 rounded mr-2"
+              />
+              {selectedIds.length > 0 ? `${selectedIds.length} selected` : 'Select all'}
+            </label>
+            {selectedIds.length > 0 && (
+              <>
+                <button
+                  onClick={() => runBulkAction('maintenance', { is_maintenance: true })}
+                  className="bg-yellow-600 hover:bg-yellow-700 text-white px-4 py-2 rounded text-sm transition duration-200"
+                >
+                  Enable Maintenance
+                </button>
+                <button
+                  onClick={() => runBulkAction('maintenance', { is_maintenance: false })}
+                  className="bg-gray-600 hover:bg-gray-700 text-white px-4 py-2 rounded text-sm transition duration-200"
+                >
+                  Disable Maintenance
+                </button>
+                <button onClick={handleBulkDelete} className="btn-danger">
+                  Delete Selected
+                </button>
+              </>
+            )}
+          </div>
           {pages.map((page) => (
             <div key={page.id} className="border border-gray-200 rounded-lg p-6">
               {editingPage === page.id ? (
@@ -165,6 +232,12 @@ const ManageWebsites = () => {
                 // View Mode
                 <div>
                   <div className="flex justify-between items-start mb-4">
+                    <input
+                      type="checkbox"
+                      checked={selectedIds.includes(page.id)}
+                      onChange={() => toggleSelected(page.id)}
+                      className="h-4 w-4 mt-2 mr-4 text-purple-600 focus:ring-purple-500 border-gray-300 rounded"
+                    />
                     <div className="flex-1">
                       <h3 className="text-xl font-bold text-gray-800">{page.title}</h3>
                       <p className="text-gray-600 mt-1">{page.short_description}</p>
@@ -221,6 +294,13 @@ const ManageWebsites = () => {
               )}
             </div>
           ))}
+          {nextCursor && (
+            <div className="text-center">
+              <button onClick={() => fetchPages(nextCursor)} className="btn-secondary">
+                Load More
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -4,28 +4,69 @@ import { useAuth } from '../contexts/AuthContext';
 import axios from 'axios';
 
 const Navbar = () => {
-  const { user, logout, isAuthenticated, backendUrl } = useAuth();
+  const { user, logout, isAuthenticated, backendUrl, token } = useAuth();
   const navigate = useNavigate();
   const [unreadCount, setUnreadCount] = useState(0);
 
   useEffect(() => {
+    if (!isAuthenticated || !token) return;
+
     const fetchUnreadCount = async () => {
-      if (isAuthenticated) {
-        try {
-          const response = await axios.get(`${backendUrl}/api/notifications/unread-count`);
-          setUnreadCount(response.data.unread_count);
-        } catch (error) {
-          console.error('Error fetching unread count:', error);
-        }
+      try {
+        const response = await axios.get(`${backendUrl}/api/notifications/unread-count`);
+        setUnreadCount(response.data.unread_count);
+      } catch (error) {
+        console.error('Error fetching unread count:', error);
       }
     };
 
     fetchUnreadCount();
-    
+
+    // Prefer the server-push stream; fall back to polling where EventSource is unavailable
+    if (window.EventSource) {
+      let source = null;
+      let reconnect = null;
+      let closed = false;
+
+      // Each connection needs a fresh single-use ticket, so reconnect by hand
+      const connect = async () => {
+        try {
+          const response = await axios.post(`${backendUrl}/api/notifications/stream-ticket`);
+          if (closed) return;
+          source = new EventSource(
+            `${backendUrl}/api/notifications/stream?ticket=${encodeURIComponent(response.data.ticket)}`
+          );
+          source.addEventListener('unread_count', (event) => {
+            setUnreadCount(JSON.parse(event.data).unread_count);
+          });
+          source.addEventListener('notification', () => {
+            setUnreadCount((count) => count + 1);
+          });
+          source.onerror = () => {
+            source.close();
+            if (!closed) reconnect = setTimeout(connect, 5000);
+          };
+        } catch (error) {
+          console.error('Error opening notification stream:', error);
+          if (!closed) reconnect = setTimeout(connect, 30000);
+        }
+      };
+
+      connect();
+      // A slow refresh corrects the count if the stream missed an event
+      const interval = setInterval(fetchUnreadCount, 300000);
+      return () => {
+        closed = true;
+        if (source) source.close();
+        clearTimeout(reconnect);
+        clearInterval(interval);
+      };
+    }
+
     // Refresh count every 30 seconds
     const interval = setInterval(fetchUnreadCount, 30000);
     return () => clearInterval(interval);
-  }, [isAuthenticated, backendUrl]);
+  }, [isAuthenticated, backendUrl, token]);
 
   const handleLogout = () => {
     logout();
@@ -5,16 +5,20 @@ import axios from 'axios';
 const Notifications = () => {
   const { backendUrl } = useAuth();
   const [notifications, setNotifications] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     fetchNotifications();
   }, []);
 
-  const fetchNotifications = async () => {
+  const fetchNotifications = async (cursor = null) => {
     try {
-      const response = await axios.get(`${backendUrl}/api/notifications`);
-      setNotifications(response.data);
+      const response = await axios.get(`${backendUrl}/api/notifications`, {
+        params: cursor ? { cursor } : {}
+      });
+      setNotifications(cursor ? (prev) => [...prev, ...response.data.items] : response.data.items);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error fetching notifications:', error);
     } finally {
@@ -37,6 +41,15 @@ const Notifications = () => {
     }
   };
 
+  const markAllAsRead = async () => {
+    try {
+      await axios.put(`${backendUrl}/api/notifications/read-all`);
+      setNotifications(prev => prev.map(notification => ({ ...notification, is_read: true })));
+    } catch (error) {
+      console.error('Error marking all notifications as read:', error);
+    }
+  };
+
   const getNotificationIcon = (type) => {
     switch (type) {
       case 'feedback':
@@ -78,7 +91,14 @@ const Notifications = () => {
 
   return (
     <div className="card">
-      <h2 className="text-2xl font-bold text-gray-800 mb-6">Notifications</h2>
+      <div className="flex justify-between items-center mb-6">
+        <h2 className="text-2xl font-bold text-gray-800">Notifications</h2>
+        {notifications.some(notification => !notification.is_read) && (
+          <button onClick={markAllAsRead} className="btn-secondary">
+            Mark All as Read
+          </button>
+        )}
+      </div>
       
       {notifications.length === 0 ? (
         <div className="text-center py-8">
@@ -131,6 +151,14 @@ const Notifications = () => {
             </div>
           ))}
           
+          {nextCursor && (
+            <div className="text-center">
+              <button onClick={() => fetchNotifications(nextCursor)} className="btn-secondary">
+                Load More
+              </button>
+            </div>
+          )}
+          
           <div className="mt-6 p-4 bg-gray-50 rounded-lg">
             <p className="text-sm text-gray-600">
               💡 <strong>Tip:</strong> Click on unread notifications to mark them as read.
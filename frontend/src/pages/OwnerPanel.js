@@ -7,6 +7,7 @@ const OwnerPanel = () => {
   const [isAuthenticated, setIsAuthenticated] = useState(false);
   const [password, setPassword] = useState('');
   const [pages, setPages] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [suspendingPage, setSuspendingPage] = useState(null);
@@ -40,10 +41,13 @@ const OwnerPanel = () => {
     setLoading(false);
   };
 
-  const fetchPages = async () => {
+  const fetchPages = async (cursor = null) => {
     try {
-      const response = await axios.get(`${backendUrl}/api/owner/pages`);
-      setPages(response.data);
+      const response = await axios.get(`${backendUrl}/api/owner/pages`, {
+        params: cursor ? { cursor } : {}
+      });
+      setPages(cursor ? (prev) => [...prev, ...response.data.items] : response.data.items);
+      setNextCursor(response.data.next_cursor);
       setIsAuthenticated(true);
     } catch (error) {
       if (error.response?.status === 401 || error.response?.status === 403) {
@@ -148,7 +152,7 @@ const OwnerPanel = () => {
         <div className="flex justify-between items-center mb-6">
           <h2 className="text-2xl font-bold text-gray-800">All Platform Pages</h2>
           <div className="text-sm text-gray-600">
-            Total Pages: <span className="font-semibold">{pages.length}</span>
+            Loaded Pages: <span className="font-semibold">{pages.length}{nextCursor ? '+' : ''}</span>
           </div>
         </div>
 
@@ -248,6 +252,13 @@ const OwnerPanel = () => {
                 )}
               </div>
             ))}
+            {nextCursor && (
+              <div className="text-center">
+                <button onClick={() => fetchPages(nextCursor)} className="btn-secondary">
+                  Load More
+                </button>
+              </div>
+            )}
           </div>
         )}
 
@@ -7,18 +7,25 @@ const PublicPage = () => {
   const { pagename } = useParams();
   const { user, backendUrl, isAuthenticated } = useAuth();
   const [page, setPage] = useState(null);
+  const [viewCount, setViewCount] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [feedback, setFeedback] = useState('');
   const [feedbackList, setFeedbackList] = useState([]);
+  const [feedbackCursor, setFeedbackCursor] = useState(null);
   const [submittingFeedback, setSubmittingFeedback] = useState(false);
   const [showFeedback, setShowFeedback] = useState(false);
 
   useEffect(() => {
     fetchPage();
-    fetchFeedback();
+    recordView();
   }, [pagename]);
 
+  // Feedback is looked up by page id, known once the page has loaded
+  useEffect(() => {
+    fetchFeedback();
+  }, [page?.id]);
+
   const fetchPage = async () => {
     try {
       const response = await axios.get(`${backendUrl}/api/public/page/${pagename}`);
@@ -30,11 +37,24 @@ const PublicPage = () => {
     }
   };
 
-  const fetchFeedback = async () => {
+  const recordView = async () => {
+    // The page body may come from a cache, so views are counted separately
+    try {
+      const response = await axios.post(`${backendUrl}/api/public/page/${pagename}/view`);
+      setViewCount(response.data.view_count);
+    } catch (error) {
+      console.error('Error recording view:', error);
+    }
+  };
+
+  const fetchFeedback = async (cursor = null) => {
     if (!page) return;
     try {
-      const response = await axios.get(`${backendUrl}/api/feedback/${page.id}`);
-      setFeedbackList(response.data);
+      const response = await axios.get(`${backendUrl}/api/feedback/${page.id}`, {
+        params: cursor ? { cursor } : {}
+      });
+      setFeedbackList(cursor ? (prev) => [...prev, ...response.data.items] : response.data.items);
+      setFeedbackCursor(response.data.next_cursor);
     } catch (error) {
       console.error('Error fetching feedback:', error);
     }
@@ -113,7 +133,7 @@ const PublicPage = () => {
           <h1 className="text-4xl font-bold text-gray-800 mb-4">{page.title}</h1>
           <p className="text-xl text-gray-600 mb-4">{page.short_description}</p>
           <div className="text-sm text-gray-500">
-            Views: <span className="font-semibold">{page.view_count}</span>
+            Views: <span className="font-semibold">{viewCount ?? '…'}</span>
           </div>
         </div>
         
@@ -172,6 +192,13 @@ const PublicPage = () => {
               ) : (
                 <p className="text-gray-500">No feedback yet. Be the first to share your thoughts!</p>
               )}
+              {feedbackCursor && (
+                <div className="text-center">
+                  <button onClick={() => fetchFeedback(feedbackCursor)} className="btn-secondary">
+                    Load More
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
@@ -198,7 +198,8 @@ db.createCollection('notifications', {
   }
 });
 
-// Create indexes for better performance
+// Create indexes for better performance (keep in sync with backend/indexes.py,
+// which the backend also ensures at startup)
 db.users.createIndex({ "email": 1 }, { unique: true });
 db.users.createIndex({ "username": 1 }, { unique: true });
 db.users.createIndex({ "id": 1 }, { unique: true });
@@ -208,17 +209,52 @@ db.pages.createIndex({ "pagename": 1 }, { unique: true });
 db.pages.createIndex({ "user_id": 1 });
 db.pages.createIndex({ "created_at": -1 });
 db.pages.createIndex({ "view_count": -1 });
+db.pages.createIndex({ "created_at": -1, "id": -1 });
+db.pages.createIndex({ "view_count": -1, "id": -1 });
+db.pages.createIndex({ "user_id": 1, "created_at": -1, "id": -1 });
 
 db.feedback.createIndex({ "id": 1 }, { unique: true });
 db.feedback.createIndex({ "page_id": 1 });
 db.feedback.createIndex({ "user_id": 1 });
 db.feedback.createIndex({ "created_at": -1 });
+db.feedback.createIndex({ "page_id": 1, "created_at": -1, "id": -1 });
+db.feedback.createIndex({ "created_at": -1, "id": -1 });
 
 db.notifications.createIndex({ "id": 1 }, { unique: true });
 db.notifications.createIndex({ "user_id": 1 });
 db.notifications.createIndex({ "is_read": 1 });
 db.notifications.createIndex({ "created_at": -1 });
 db.notifications.createIndex({ "type": 1 });
+db.notifications.createIndex({ "user_id": 1, "created_at": -1, "id": -1 });
+db.notifications.createIndex({ "created_at": -1, "id": -1 });
+db.notifications.createIndex({ "user_id": 1, "is_read": 1 });
+db.notifications.createIndex({ "page_id": 1 });
+// Read notifications expire after NOTIFICATION_READ_TTL_DAYS (default 30)
+db.notifications.createIndex({ "read_at": 1 }, { expireAfterSeconds: 30 * 86400 });
+
+// Archives of old notifications and feedback, compressed with zstd
+db.createCollection('notifications_archive', { storageEngine: { wiredTiger: { configString: 'block_compressor=zstd' } } });
+db.notifications_archive.createIndex({ "id": 1 }, { unique: true });
+db.notifications_archive.createIndex({ "user_id": 1, "created_at": -1, "id": -1 });
+db.notifications_archive.createIndex({ "page_id": 1 });
+
+db.createCollection('feedback_archive', { storageEngine: { wiredTiger: { configString: 'block_compressor=zstd' } } });
+db.feedback_archive.createIndex({ "id": 1 }, { unique: true });
+db.feedback_archive.createIndex({ "page_id": 1, "created_at": -1, "id": -1 });
+
+db.page_view_buckets.createIndex({ "hour": 1, "pagename": 1 }, { unique: true });
+db.page_view_buckets.createIndex({ "hour": 1 }, { expireAfterSeconds: 49 * 3600 });
+
+db.notification_counters.createIndex({ "user_id": 1 }, { unique: true });
+
+db.notification_outbox.createIndex({ "id": 1 }, { unique: true });
+db.notification_outbox.createIndex({ "next_attempt_at": 1 });
+
+// Single-use notification stream tickets expire on their own
+db.stream_tickets.createIndex({ "expires_at": 1 }, { expireAfterSeconds: 0 });
+
+// Page search: postings by term, best weight first (see backend/search.py)
+db.search_postings.createIndex({ "term": 1, "weight": -1, "pagename": 1 });
 
 print('NOTEZ FUN database initialized successfully!');
 print('Collections created: users, pages, feedback, notifications');
@@ -0,0 +1,12 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend runs from its own directory and imports its modules by name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+import pytest
+
+from hashing import PasswordHasher, PasswordHasherBusy
+
+pytestmark = pytest.mark.anyio
+
+
+async def settle():
+    # Slots are released through call_soon_threadsafe from the worker thread
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+
+
+async def test_hash_and_verify_count_completed_calls():
+    hasher = PasswordHasher(rounds=4)
+    password_hash = await hasher.hash("Secret123")
+    assert await hasher.verify("Secret123", password_hash)
+    await settle()
+
+    assert hasher.stats()["completed"] == 2
+    assert hasher.stats()["failed"] == 0
+    assert hasher.stats()["in_flight"] == 0
+
+
+async def test_failed_calls_are_not_counted_as_completed():
+    hasher = PasswordHasher(rounds=4)
+    with pytest.raises(ValueError):
+        await hasher.verify("Secret123", "not a bcrypt hash")
+    await settle()
+
+    assert hasher.stats()["completed"] == 0
+    assert hasher.stats()["failed"] == 1
+    assert hasher.stats()["in_flight"] == 0
+
+
+async def test_cancelled_caller_keeps_the_slot_until_the_work_finishes():
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_queue=0)
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    task = asyncio.ensure_future(hasher._run(work))
+    await asyncio.to_thread(started.wait, 5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # The worker is still busy, so there is no room for another call
+    assert hasher.stats()["in_flight"] == 1
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.hash("Secret123")
+
+    release.set()
+    await settle()
+    assert hasher.stats()["in_flight"] == 0
+    assert hasher.stats()["completed"] == 1
+    await hasher.hash("Secret123")
+    hasher.shutdown()
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from http_cache import http_date, is_not_modified, make_etag
+
+MODIFIED = datetime(2024, 5, 1, 12, 30, 15, 250000)
+ETAG = make_etag("page", MODIFIED)
+
+
+def test_etag_changes_with_the_modification_time():
+    assert ETAG.startswith('W/"page-')
+    assert make_etag("page", MODIFIED + timedelta(milliseconds=1)) != ETAG
+
+
+def test_no_validators_means_modified():
+    assert not is_not_modified({}, ETAG, MODIFIED)
+
+
+@pytest.mark.parametrize("if_none_match", [
+    ETAG,
+    ETAG[2:],  # Weak comparison ignores the W/ prefix
+    f'"other", {ETAG}',
+    "*",
+])
+def test_matching_if_none_match(if_none_match):
+    assert is_not_modified({"if-none-match": if_none_match}, ETAG, MODIFIED)
+
+
+def test_stale_if_none_match():
+    assert not is_not_modified({"if-none-match": 'W/"page-1"'}, ETAG, MODIFIED)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    # A mismatched ETag means modified even though the date would still match
+    headers = {"if-none-match": 'W/"page-1"', "if-modified-since": http_date(MODIFIED + timedelta(days=1))}
+    assert not is_not_modified(headers, ETAG, MODIFIED)
+    # ...and a matching ETag means not modified even though the date is older
+    headers = {"if-none-match": ETAG, "if-modified-since": http_date(MODIFIED - timedelta(days=1))}
+    assert is_not_modified(headers, ETAG, MODIFIED)
+
+
+def test_if_modified_since_at_second_resolution():
+    # The validator was sent without the sub-second part of the modification time
+    assert is_not_modified({"if-modified-since": http_date(MODIFIED)}, ETAG, MODIFIED)
+    assert is_not_modified({"if-modified-since": http_date(MODIFIED + timedelta(hours=1))}, ETAG, MODIFIED)
+    assert not is_not_modified({"if-modified-since": http_date(MODIFIED - timedelta(seconds=1))}, ETAG, MODIFIED)
+
+
+@pytest.mark.parametrize("if_modified_since", ["yesterday", "", "Mon, 99 Foo 2024 00:00:00 GMT"])
+def test_unparseable_if_modified_since_means_modified(if_modified_since):
+    assert not is_not_modified({"if-modified-since": if_modified_since}, ETAG, MODIFIED)
@@ -0,0 +1,71 @@
+import sys
+import threading
+
+from metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_metrics_render_prometheus_text():
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests", ("route",)))
+    in_flight = registry.register(Gauge("in_flight", "In flight"))
+    latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    requests.inc("/a")
+    requests.inc("/a")
+    in_flight.inc()
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    text = registry.render()
+    assert 'requests_total{route="/a"} 2' in text
+    assert "in_flight 1" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "latency_seconds_count 2" in text
+
+
+def test_concurrent_updates_are_not_lost_while_rendering():
+    # Switch threads often so unlocked read-modify-writes would interleave
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    registry = Registry()
+    counter = registry.register(Counter("commands_total", "Commands", ("command",)))
+    gauge = registry.register(Gauge("in_use", "In use", ("address",)))
+    histogram = registry.register(Histogram("duration_seconds", "Duration", ("command",)))
+    threads, per_thread = 8, 2000
+    done = threading.Event()
+    errors = []
+
+    def record(worker):
+        for i in range(per_thread):
+            # New label sets keep resizing the dicts the renderer iterates
+            command = f"cmd{worker}-{i % 50}"
+            counter.inc(command)
+            gauge.inc("host:27017")
+            histogram.observe(0.001, command)
+
+    def render():
+        while not done.is_set():
+            try:
+                registry.render()
+            except RuntimeError as exc:
+                errors.append(exc)
+                return
+
+    try:
+        renderer = threading.Thread(target=render)
+        renderer.start()
+        workers = [threading.Thread(target=record, args=(worker,)) for worker in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        done.set()
+        renderer.join()
+    finally:
+        sys.setswitchinterval(previous)
+
+    assert errors == []
+    assert sum(value for _, value in counter._samples()) == threads * per_thread
+    assert gauge._samples() == [[["host:27017"], threads * per_thread]]
+    # Bucket counts precede the trailing sum
+    assert sum(sum(state[:-1]) for _, state in histogram._samples()) == threads * per_thread
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from notification_counters import UnreadCounters
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def database():
+    return AsyncMongoMockClient()["counters_test"]
+
+
+def make_counters(database, settle_seconds=0.0):
+    return UnreadCounters(database.notification_counters, database.notifications, settle_seconds=settle_seconds)
+
+
+async def insert_notifications(database, user_id, count, is_read=False):
+    await database.notifications.insert_many([{"user_id": user_id, "is_read": is_read} for _ in range(count)])
+
+
+async def test_first_read_counts_notifications_from_before_the_counter(database):
+    await insert_notifications(database, "u1", 3)
+    counters = make_counters(database)
+    # A delivery before the first read must not start the counter from zero
+    await insert_notifications(database, "u1", 1)
+    await counters.increment_many({"u1": 1})
+
+    assert await counters.get("u1") == 4
+    await counters.increment_many({"u1": 1})
+    assert await counters.get("u1") == 5
+
+
+async def test_decrement_seeds_a_missing_counter(database):
+    await insert_notifications(database, "u1", 2)
+    await insert_notifications(database, "u1", 1, is_read=True)
+    counters = make_counters(database)
+
+    assert await counters.decrement("u1") == 2
+    assert await counters.get("u1") == 2
+
+
+async def test_reconcile_corrects_drift_and_creates_missing_counters(database):
+    await insert_notifications(database, "u1", 2)
+    await insert_notifications(database, "u2", 1)
+    await database.notification_counters.insert_many([
+        {"user_id": "u1", "unread_count": 7},
+        {"user_id": "u3", "unread_count": 2},
+    ])
+    counters = make_counters(database)
+
+    assert await counters.reconcile() == 3
+    assert await counters.get("u1") == 2
+    assert await counters.get("u2") == 1
+    assert await counters.get("u3") == 0
+    assert await counters.reconcile() == 0
+
+
+async def test_reconcile_leaves_a_counter_whose_increment_is_in_flight(database):
+    await insert_notifications(database, "u1", 2)
+    await database.notification_counters.insert_one({"user_id": "u1", "unread_count": 2})
+    counters = make_counters(database, settle_seconds=0.05)
+
+    # A notification is stored; its $inc lands while reconcile waits to confirm the mismatch
+    await insert_notifications(database, "u1", 1)
+    reconcile = asyncio.ensure_future(counters.reconcile())
+    await asyncio.sleep(0.01)
+    await counters.increment_many({"u1": 1})
+
+    assert await reconcile == 0
+    assert await counters.get("u1") == 3
+
+
+async def test_reconcile_skips_users_whose_notifications_change_while_settling(database):
+    await insert_notifications(database, "u1", 2)
+    await database.notification_counters.insert_one({"user_id": "u1", "unread_count": 5})
+    counters = make_counters(database, settle_seconds=0.05)
+
+    reconcile = asyncio.ensure_future(counters.reconcile())
+    await asyncio.sleep(0.01)
+    # Stored, its $inc not yet applied
+    await insert_notifications(database, "u1", 1)
+
+    assert await reconcile == 0
+    await counters.increment_many({"u1": 1})
+    counters.settle_seconds = 0
+    assert await counters.reconcile() == 1
+    assert await counters.get("u1") == 3
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from notification_dispatch import NotificationChannel, NotificationDispatcher
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingChannel(NotificationChannel):
+    name = "recording"
+
+    def __init__(self, fail=False):
+        self.delivered = []
+        self.fail = fail
+
+    async def deliver(self, notifications):
+        if self.fail:
+            raise RuntimeError("channel down")
+        self.delivered.extend(notifications)
+
+
+@pytest.fixture
+def outbox():
+    return AsyncMongoMockClient()["dispatch_test"].notification_outbox
+
+
+def notification(i):
+    return {"id": f"n{i}", "user_id": "u1", "title": f"Notification {i}"}
+
+
+async def test_enqueue_does_no_outbox_write(outbox):
+    dispatcher = NotificationDispatcher(outbox, [RecordingChannel()])
+    await dispatcher.enqueue(notification(1))
+
+    assert dispatcher.stats()["queued"] == 1
+    assert await outbox.count_documents({}) == 0
+
+
+async def test_consumer_writes_batch_to_outbox_and_clears_it_after_delivery(outbox):
+    channel = RecordingChannel()
+    dispatcher = NotificationDispatcher(outbox, [channel], linger=0.01)
+    written = []
+    write_outbox = dispatcher._write_outbox
+
+    async def record_write(entries):
+        written.append(len(entries))
+        await write_outbox(entries)
+
+    dispatcher._write_outbox = record_write
+    for i in range(3):
+        await dispatcher.enqueue(notification(i))
+    dispatcher.start()
+    await dispatcher.stop()
+
+    # One outbox write for the whole batch, removed once delivered
+    assert written == [3]
+    assert [n["id"] for n in channel.delivered] == ["n0", "n1", "n2"]
+    assert await outbox.count_documents({}) == 0
+
+
+async def test_failed_delivery_stays_in_outbox_for_retry(outbox):
+    channel = RecordingChannel(fail=True)
+    dispatcher = NotificationDispatcher(outbox, [channel], linger=0.01, retry_interval=30)
+    await dispatcher.enqueue(notification(1))
+    dispatcher.start()
+    await dispatcher.stop()
+
+    entry = await outbox.find_one({})
+    assert entry["attempts"] == 1
+    assert entry["next_attempt_at"] > datetime.utcnow() + timedelta(seconds=30)
+
+    channel.fail = False
+    await outbox.update_one({}, {"$set": {"next_attempt_at": datetime.utcnow()}})
+    assert await dispatcher.retry_outbox() == 1
+    assert [n["id"] for n in channel.delivered] == ["n1"]
+    assert await outbox.count_documents({}) == 0
+
+
+async def test_full_queue_writes_to_outbox_for_retry(outbox):
+    channel = RecordingChannel()
+    dispatcher = NotificationDispatcher(outbox, [channel], queue_size=1, retry_interval=0)
+    await dispatcher.enqueue(notification(1))
+    await dispatcher.enqueue(notification(2))
+
+    assert dispatcher.stats()["deferred_to_retry"] == 1
+    assert [entry["payload"]["id"] for entry in await outbox.find({}).to_list(None)] == ["n2"]
+    await asyncio.sleep(0.01)
+    assert await dispatcher.retry_outbox() == 1
+    assert [n["id"] for n in channel.delivered] == ["n2"]
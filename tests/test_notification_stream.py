@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from notification_stream import NotificationHub
+
+pytestmark = pytest.mark.anyio
+
+
+def parse(frame):
+    lines = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+    return lines["event"], json.loads(lines["data"])
+
+
+async def test_events_published_while_counting_precede_the_initial_count():
+    hub = NotificationHub()
+    queue = hub.connect("u1")
+    # Published between connecting and reading the count, which already includes it
+    hub.dispatch({"user_id": "u1", "event": "notification", "data": {"id": "n1"}})
+    hub.send(queue, "unread_count", {"unread_count": 3})
+    hub.dispatch({"user_id": "u1", "event": "notification", "data": {"id": "n2"}})
+
+    stream = hub.stream("u1", queue)
+    assert (await stream.__anext__()).startswith("retry:")
+    events = [parse(await stream.__anext__()) for _ in range(3)]
+    await stream.aclose()
+
+    assert events == [
+        ("notification", {"id": "n1"}),
+        ("unread_count", {"unread_count": 3}),
+        ("notification", {"id": "n2"}),
+    ]
+    assert hub.stats()["connections"] == 0
+
+
+async def test_full_queue_drops_the_oldest_event():
+    hub = NotificationHub(queue_size=2)
+    queue = hub.connect("u1")
+    for i in range(3):
+        hub.dispatch({"user_id": "u1", "event": "notification", "data": {"id": i}})
+
+    assert [queue.get_nowait()[1]["id"] for _ in range(2)] == [1, 2]
+    assert hub.stats()["dropped"] == 1
@@ -0,0 +1,24 @@
+from page_renderer import render_page_html
+
+
+def make_page(pagename):
+    return {
+        "pagename": pagename,
+        "title": "Title",
+        "short_description": "Short",
+        "long_description": "Long",
+    }
+
+
+def test_feedback_link_url_encodes_the_pagename():
+    html = render_page_html(make_page('a b/"c"?&d'), [])
+
+    assert 'href="/a%20b%2F%22c%22%3F%26d?app=1"' in html
+
+
+def test_feedback_is_html_escaped():
+    feedback = [{"username": "<b>me</b>", "message": "<script>x</script>"}]
+    html = render_page_html(make_page("page"), feedback)
+
+    assert "<script>x</script>" not in html
+    assert "&lt;b&gt;me&lt;/b&gt;" in html
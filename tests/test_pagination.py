@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def make_token(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("value", [datetime(2024, 1, 2, 3, 4, 5, 678000), 42, 1.5, "name"])
+def test_cursor_round_trip(value):
+    token = encode_cursor("field", {"field": value, "id": "abc"})
+    assert decode_cursor(token, "field") == (value, "abc")
+
+
+def test_cursor_for_another_sort_order_is_rejected():
+    token = encode_cursor("created_at", {"created_at": datetime(2024, 1, 1), "id": "abc"})
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, "view_count")
+
+
+@pytest.mark.parametrize("key", [
+    {"t": "raw", "v": {"$ne": None}},
+    {"t": "raw", "v": ["a"]},
+    {"t": "raw", "v": None},
+    {"t": "raw", "v": True},
+    {"t": "dt", "v": {"$gt": ""}},
+    {"t": "dt", "v": "not a date"},
+    {"t": "other", "v": 1},
+    "raw",
+])
+def test_cursor_values_other_than_scalars_are_rejected(key):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(make_token({"f": "field", "k": key, "id": "abc"}), "field")
+
+
+@pytest.mark.parametrize("last_id", [{"$gt": ""}, None, 7])
+def test_cursor_id_must_be_a_string(last_id):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(make_token({"f": "field", "k": {"t": "raw", "v": 1}, "id": last_id}), "field")
+
+
+@pytest.mark.parametrize("token", ["", "%%%", make_token([1, 2]), make_token({"f": "field"})])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, "field")
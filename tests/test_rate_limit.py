@@ -0,0 +1,187 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import rate_limit
+from rate_limit import AdmissionController, RateLimit, RateLimitStore
+
+
+async def settle():
+    # Let woken waiters run; asyncio.wait resumes them through a few callbacks
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_parse_rate_limit():
+    limit = RateLimit.parse("30/minute")
+    assert limit.capacity == 30
+    assert limit.rate == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("spec", ["", "10", "0/minute", "ten/minute", "10/week", "-1/second"])
+def test_parse_rejects_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        RateLimit.parse(spec)
+
+
+def test_bucket_allows_a_burst_of_capacity_then_reports_the_wait(clock):
+    store = RateLimitStore()
+    limit = RateLimit(2, 1)  # 2 tokens, refilled at 2 per second
+
+    assert store.take("k", limit) == 0
+    assert store.take("k", limit) == 0
+    assert store.take("k", limit) == pytest.approx(0.5)
+
+
+def test_bucket_refills_over_time(clock):
+    store = RateLimitStore()
+    limit = RateLimit(2, 1)
+    store.take("k", limit)
+    store.take("k", limit)
+
+    clock.value += 0.25
+    assert store.take("k", limit) == pytest.approx(0.25)
+    clock.value += 0.25
+    assert store.take("k", limit) == 0
+
+
+def test_refill_is_capped_at_capacity(clock):
+    store = RateLimitStore()
+    limit = RateLimit(2, 1)
+    store.take("k", limit)
+
+    clock.value += 3600
+    assert [store.take("k", limit) for _ in range(3)] == [0, 0, pytest.approx(0.5)]
+
+
+def test_wait_accounts_for_cost(clock):
+    store = RateLimitStore()
+    limit = RateLimit(4, 2)  # refilled at 2 per second
+
+    assert store.take("k", limit, cost=3) == 0
+    # One token left, three more needed
+    assert store.take("k", limit, cost=4) == pytest.approx(1.5)
+
+
+def test_rejected_requests_do_not_draw_tokens(clock):
+    store = RateLimitStore()
+    limit = RateLimit(1, 1)
+    store.take("k", limit)
+    store.take("k", limit)
+    store.take("k", limit)
+
+    clock.value += 1
+    assert store.take("k", limit) == 0
+
+
+def test_keys_have_separate_buckets_and_the_least_recent_is_evicted(clock):
+    store = RateLimitStore(max_keys=2)
+    limit = RateLimit(1, 60)
+    store.take("a", limit)
+    store.take("b", limit)
+    store.take("a", limit)  # a is now the most recently used
+    store.take("c", limit)
+
+    assert store.stats()["keys"] == 2
+    # b was evicted, so it starts from a full bucket again
+    assert store.take("b", limit) == 0
+    assert store.take("c", limit) > 0
+
+
+@pytest.mark.anyio
+async def test_admission_queues_in_arrival_order():
+    controller = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout=1.0)
+    assert await controller.acquire()
+
+    admitted = []
+
+    async def request(name):
+        if await controller.acquire():
+            admitted.append(name)
+
+    first = asyncio.create_task(request("first"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(request("second"))
+    await asyncio.sleep(0)
+    assert controller.stats()["queued"] == 2
+
+    controller.release()
+    await settle()
+    assert admitted == ["first"]
+    controller.release()
+    await asyncio.gather(first, second)
+    assert admitted == ["first", "second"]
+    # Slots were handed over, never freed and taken again
+    assert controller.in_flight == 1
+
+
+@pytest.mark.anyio
+async def test_admission_sheds_when_the_queue_is_full_or_the_wait_times_out():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+    assert await controller.acquire()
+
+    waiting = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    assert not await controller.acquire()
+    assert not await waiting
+
+    stats = controller.stats()
+    assert (stats["shed_queue_full"], stats["shed_timeout"], stats["queued"]) == (1, 1, 0)
+    controller.release()
+    assert controller.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_slot_handed_to_a_cancelled_request_passes_to_the_next():
+    controller = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout=1.0)
+    assert await controller.acquire()
+    cancelled = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    next_in_line = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    # The slot is handed over, then the client goes away before its task resumes
+    controller.release()
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    assert await next_in_line
+    assert controller.in_flight == 1
+    controller.release()
+    assert controller.in_flight == 0
+    assert controller.stats()["queued"] == 0
+
+
+@pytest.mark.anyio
+async def test_admission_refuses_while_the_loop_lags():
+    controller = AdmissionController(max_loop_lag=0.1)
+    controller.loop_lag = 0.5
+
+    assert not await controller.acquire()
+    assert controller.stats()["shed_loop_lag"] == 1
+    assert controller.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_leaves_the_queue():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1.0)
+    assert await controller.acquire()
+    waiting = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert controller.stats()["queued"] == 0
+    controller.release()
+    assert controller.in_flight == 0
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from scheduler import LEADER_LEASE, JobScheduler
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def leases():
+    return AsyncMongoMockClient()["scheduler_test"].scheduler_leases
+
+
+def make_scheduler(leases, worker_id, **kwargs):
+    scheduler = JobScheduler(leases, **kwargs)
+    scheduler.worker_id = worker_id
+    return scheduler
+
+
+async def test_lease_is_held_until_it_expires(leases):
+    first = make_scheduler(leases, "first")
+    second = make_scheduler(leases, "second")
+
+    assert await first._try_lease()
+    assert not await second._try_lease()
+    # The holder renews its own lease
+    assert await first._try_lease()
+
+
+async def test_lease_is_taken_over_after_expiry(leases):
+    first = make_scheduler(leases, "first")
+    second = make_scheduler(leases, "second")
+    await first._elect()
+    assert first.is_leader
+
+    # The holder stopped renewing and the lease ran out
+    await leases.update_one({"_id": LEADER_LEASE}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+    await second._elect()
+    await first._elect()
+
+    assert second.is_leader
+    assert not first.is_leader
+    assert (await leases.find_one({"_id": LEADER_LEASE}))["holder"] == "second"
+
+
+async def test_released_lease_is_taken_over_at_once(leases):
+    first = make_scheduler(leases, "first")
+    second = make_scheduler(leases, "second")
+    await first._elect()
+
+    await first.stop()
+    # BSON dates have millisecond precision
+    await asyncio.sleep(0.01)
+    await second._elect()
+
+    assert not first.is_leader
+    assert second.is_leader
+
+
+async def test_singleton_jobs_only_run_on_the_leader(leases):
+    runs = []
+    leader = JobScheduler(leases, lease_seconds=0.3)
+    follower = JobScheduler(leases, lease_seconds=0.3)
+    for scheduler in (leader, follower):
+        scheduler.every("job", lambda runner=scheduler: runs.append(runner) or asyncio.sleep(0), 0.05, singleton=True)
+
+    await leader.start()
+    await follower.start()
+    await asyncio.sleep(0.2)
+    await follower.stop()
+    await leader.stop()
+
+    assert runs and set(runs) == {leader}
+    assert follower.jobs["job"].skipped > 0
+
+
+async def test_stop_waits_for_running_jobs(leases):
+    scheduler = make_scheduler(leases, "worker", drain_timeout=1.0)
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(True)
+
+    scheduler.submit("work", work())
+    await scheduler.stop()
+
+    job = scheduler.jobs["work"]
+    assert finished == [True]
+    assert (job.runs, job.failures) == (1, 0)
+
+
+async def test_stop_cancels_jobs_past_the_drain_timeout(leases):
+    runs = []
+    scheduler = make_scheduler(leases, "worker", drain_timeout=0.05, on_run=lambda *run: runs.append(run))
+    scheduler.submit("stuck", asyncio.sleep(60))
+
+    await scheduler.stop()
+
+    job = scheduler.jobs["stuck"]
+    assert (job.runs, job.failures, job.last_error) == (1, 1, "cancelled")
+    assert runs[0][0] == "stuck" and runs[0][2] is True
+    assert scheduler.stats()["in_flight"] == 0
+
+
+async def test_failed_job_is_recorded_and_keeps_running(leases):
+    calls = []
+
+    async def flaky():
+        calls.append(True)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    scheduler = make_scheduler(leases, "worker")
+    scheduler.every("flaky", flaky, 0.01)
+    await scheduler.start()
+    await asyncio.sleep(0.1)
+    await scheduler.stop()
+
+    job = scheduler.jobs["flaky"]
+    assert job.failures == 1
+    assert job.runs > 1
+    assert "boom" in job.last_error
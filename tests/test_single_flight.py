@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_calls_share_one_run():
+    flights = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    tasks = [asyncio.ensure_future(flights.run("key", call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert "key" in flights
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["value"] * 3
+    assert calls == 1
+    assert flights.shared == 2
+    assert len(flights) == 0
+
+
+async def test_waiters_share_the_exception():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        raise ValueError("boom")
+
+    tasks = [asyncio.ensure_future(flights.run("key", call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+async def test_waiter_runs_the_call_when_its_starter_is_cancelled():
+    flights = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    starter = asyncio.ensure_future(flights.run("key", call))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(flights.run("key", call))
+    await asyncio.sleep(0)
+    starter.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await waiter == 2
+    with pytest.raises(asyncio.CancelledError):
+        await starter